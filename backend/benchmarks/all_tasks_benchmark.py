@@ -0,0 +1,105 @@
+"""
+Compares building the all-tasks payload with the aggregated get_all_tasks
+query against the previous string_agg + one user lookup per assignment.
+
+Synthetic users, tasks and assignments are created inside one transaction
+that is rolled back at the end, so the database is left untouched.
+
+Usage (from the backend directory, DB_URL must be set):
+    python -m benchmarks.all_tasks_benchmark
+    python -m benchmarks.all_tasks_benchmark --assignments 50,500,5000 --repeat 5
+"""
+import argparse
+import json
+import time
+
+from src.dals import task_dal, user_dal
+from src.utils import format_response
+from src.utils.db import sync_db_util, query_metrics
+
+LEGACY_ALL_TASKS_QUERY = '''SELECT t.task_id, t.task_name, t.task_type, t.description, t.start_time, t.end_time, t.max_participants,
+string_agg(a.user_id || ':' || a.assignment_id, ',') AS user_assignments
+FROM tasks t
+LEFT JOIN assignments a ON t.task_id = a.task_id
+WHERE t.start_time >= CURRENT_TIMESTAMP
+GROUP BY t.task_id
+ORDER BY t.start_time;
+'''
+
+
+def seed(conn, assignments):
+    user_count = max(10, assignments // 5)
+    task_count = max(10, assignments // 10)
+
+    with conn.cursor() as cur:
+        cur.execute('''INSERT INTO users (user_id, email, password_hash, first_name, last_name, verified)
+        SELECT 'bench_u' || i, 'bench_u' || i || '@example.com', 'x', 'First' || i, 'Last' || i, TRUE
+        FROM generate_series(1, %s) AS i;''', (user_count,))
+        cur.execute('''INSERT INTO tasks (task_name, task_type, description, start_time, end_time, max_participants)
+        SELECT 'bench task ' || i, 'bench', 'benchmark task', now() + interval '1 year' + i * interval '1 hour',
+        now() + interval '1 year' + i * interval '1 hour' + interval '30 minutes', NULL
+        FROM generate_series(1, %s) AS i RETURNING task_id;''', (task_count,))
+        task_ids = [row[0] for row in cur.fetchall()]
+        cur.execute('''INSERT INTO assignments (task_id, user_id, assigned_by)
+        SELECT (%s::int[])[1 + i %% %s], 'bench_u' || (1 + i %% %s), 'benchmark'
+        FROM generate_series(1, %s) AS i;''', (task_ids, task_count, user_count, assignments))
+
+
+def legacy_all_tasks(conn):
+    tasks = {}
+    for task in sync_db_util.execute_query_fetchall(LEGACY_ALL_TASKS_QUERY, conn=conn):
+        tasks[task[0]] = {'task_name': task[1], 'users': []}
+        if task[7]:
+            for pair in task[7].split(','):
+                user_id, assignment_id = pair.split(':')
+                user = user_dal.get_user_by_id(user_id, conn=conn)
+                tasks[task[0]]['users'].append({
+                    'user_id': user.user_id,
+                    'first_name': user.first_name,
+                    'last_name': user.last_name,
+                    'assignment_id': assignment_id
+                })
+    return tasks
+
+
+def aggregated_all_tasks(conn):
+    return format_response.handleAllAssignments(task_dal.get_all_tasks(conn=conn))
+
+
+def measure(func, conn, repeat):
+    timings = []
+    for _ in range(repeat):
+        query_metrics.reset_request_stats()
+        start = time.perf_counter()
+        func(conn)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        'queries': query_metrics.get_request_stats()['query_count'],
+        'median_ms': round(timings[len(timings) // 2] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--assignments', default='50,500,5000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        for assignments in [int(value) for value in args.assignments.split(',')]:
+            with sync_db_util.connection() as conn:
+                seed(conn, assignments)
+                result = {
+                    'assignments': assignments,
+                    'per_user_lookups': measure(legacy_all_tasks, conn, args.repeat),
+                    'aggregated': measure(aggregated_all_tasks, conn, args.repeat),
+                }
+                conn.rollback()
+            print(json.dumps(result))
+    finally:
+        sync_db_util.close_all_connections()
+
+
+if __name__ == '__main__':
+    main()
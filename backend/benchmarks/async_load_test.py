@@ -0,0 +1,131 @@
+"""
+Load test for endpoints served with SERVER_MODE=eventlet (psycopg2 on green
+threads) and SERVER_MODE=async (asyncpg data layer).
+
+Only endpoints that query the database on every request in both modes are
+measured. /all_tasks is answered from the in-memory task board and would
+compare nothing but Flask.
+
+Each mode gets its own server process; requests are sent from a thread pool.
+--user-id has to be a user with the user role, coordinators are refused
+/my_tasks.
+
+Usage (from the backend directory, DB_URL and JWT_SECRET_KEY must be set):
+    python -m benchmarks.async_load_test --user-id <user_id>
+    python -m benchmarks.async_load_test --user-id <user_id> --requests 2000 --concurrency 32
+    python -m benchmarks.async_load_test --user-id <user_id> --endpoints my_pending_tasks
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Both read the user and their assignments through the DAL of the server mode
+ENDPOINTS = {
+    'my_tasks': '/api/v1/tasks/user/my_tasks',
+    'my_pending_tasks': '/api/v1/tasks/my_pending_tasks',
+}
+
+def serve(port):
+    # Importing run applies the monkey patching for SERVER_MODE
+    import run
+    run.socketio.run(run.app, host='127.0.0.1', port=port, debug=False, allow_unsafe_werkzeug=True, log_output=False)
+
+
+def create_token(user_id):
+    from flask import Flask
+    from flask_jwt_extended import JWTManager, create_access_token
+
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY')
+    JWTManager(app)
+    with app.app_context():
+        return create_access_token(identity=user_id)
+
+
+def wait_until_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(base_url + '/', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server at {base_url} did not start')
+
+
+def run_load(url, token, requests, concurrency):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def send(_):
+        start = time.perf_counter()
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=30) as response:
+            response.read()
+            status = response.status
+        return time.perf_counter() - start, status
+
+    # Warm up both pools before measuring
+    for _ in range(concurrency):
+        send(None)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(send, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status != 200)
+
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 4),
+        'throughput_rps': round(requests / elapsed, 2),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--user-id', required=True)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--modes', default='eventlet,async')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    token = create_token(args.user_id)
+    base_url = f'http://127.0.0.1:{args.port}'
+
+    for server_mode in args.modes.split(','):
+        env = dict(os.environ, SERVER_MODE=server_mode)
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.async_load_test', '--serve', '--user-id', args.user_id, '--port', str(args.port)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_ready(base_url)
+            for endpoint in args.endpoints.split(','):
+                result = run_load(base_url + ENDPOINTS[endpoint], token, args.requests, args.concurrency)
+                result['server_mode'] = server_mode
+                result['endpoint'] = endpoint
+                print(json.dumps(result))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
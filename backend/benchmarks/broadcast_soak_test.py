@@ -0,0 +1,209 @@
+"""
+Soak test for broadcast delivery across several Socket.IO worker processes
+sharing a message queue (SOCKETIO_MESSAGE_QUEUE, postgres by default).
+
+Each worker runs on its own port. Socket.IO clients are spread over the
+workers and keep the board, while a coordinator creates tasks through all
+of them. Every client has to receive every created task in a tasks_delta,
+whichever worker handled the write.
+
+Soak users and tasks are deleted at the end.
+
+Usage (from the backend directory, DB_URL and JWT_SECRET_KEY must be set,
+migrations applied):
+    python -m benchmarks.broadcast_soak_test
+    python -m benchmarks.broadcast_soak_test --workers 4 --clients 40 --writes 400 --concurrency 8
+    python -m benchmarks.broadcast_soak_test --queue none   # workers without a queue, for comparison
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import engineio.payload
+import socketio
+
+from benchmarks.async_load_test import create_token, wait_until_ready
+
+# Without websocket-client the soak clients long poll, and a poll that returns while a client is behind
+# carries every queued packet. The Python client rejects more than 16 by default, browsers do not.
+engineio.payload.Payload.max_decode_packets = 1024
+
+COORDINATOR_ID = 'soak_coordinator'
+TASK_PREFIX = 'soak task '
+
+
+def serve(port):
+    # Importing run applies the monkey patching and picks up the message queue from the environment
+    import run
+    run.socketio.run(run.app, host='127.0.0.1', port=port, debug=False, allow_unsafe_werkzeug=True, log_output=False)
+
+
+def seed_users(clients):
+    from src.utils.db import sync_db_util
+
+    with sync_db_util.transaction() as conn:
+        sync_db_util.execute_query_return_row_count('''INSERT INTO users (user_id, email, password_hash, first_name, last_name, verified, role)
+        VALUES (%s, %s, 'x', 'Soak', 'Coordinator', TRUE, 'Coordinator');''', (COORDINATOR_ID, COORDINATOR_ID + '@example.com'), conn=conn)
+        sync_db_util.execute_query_return_row_count('''INSERT INTO users (user_id, email, password_hash, first_name, last_name, verified)
+        SELECT 'soak_u' || i, 'soak_u' || i || '@example.com', 'x', 'Soak', 'User' || i, TRUE
+        FROM generate_series(1, %s) AS i;''', (clients,), conn=conn)
+
+
+def clean_up():
+    from src.utils.db import sync_db_util
+
+    with sync_db_util.transaction() as conn:
+        sync_db_util.execute_query_return_row_count('DELETE FROM tasks WHERE task_name LIKE %s;', (TASK_PREFIX + '%',), conn=conn)
+        sync_db_util.execute_query_return_row_count("DELETE FROM users WHERE user_id LIKE 'soak\\_%%';", conn=conn)
+
+
+class BoardClient:
+    def __init__(self, url, token):
+        self.received = {}
+        self.seqs = []
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on('tasks_full_sync', self.on_full_sync)
+        self.sio.on('tasks_delta', self.on_delta)
+        self.sio.connect(url, auth={'token': token}, wait_timeout=10)
+        self.sio.emit('request_full_sync')
+
+    def on_full_sync(self, board):
+        self.ready.set()
+
+    def on_delta(self, delta):
+        now = time.perf_counter()
+        with self.lock:
+            self.seqs.append(delta['seq'])
+            for task in delta['tasks']['upserted'].values():
+                self.received.setdefault(task['task_name'], now)
+
+
+def create_task(base_url, token, index):
+    start_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=365, minutes=index)
+    body = json.dumps({
+        'task_name': f'{TASK_PREFIX}{index}',
+        'task_type': 'soak',
+        'description': 'broadcast soak test',
+        'start_time': start_time.isoformat(),
+        'end_time': (start_time + datetime.timedelta(minutes=30)).isoformat(),
+    }).encode('utf-8')
+    request = urllib.request.Request(
+        base_url + '/api/v1/tasks/coordinator/create', data=body, method='POST',
+        headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+    )
+
+    sent_at = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+        return f'{TASK_PREFIX}{index}', sent_at, response.status
+
+
+def summarize(clients, sent, timeout):
+    deadline = time.monotonic() + timeout
+    expected = len(sent) * len(clients)
+    while time.monotonic() < deadline:
+        if sum(len([name for name in client.received if name in sent]) for client in clients) >= expected:
+            break
+        time.sleep(0.1)
+
+    latencies = []
+    seq_gaps = 0
+    duplicate_seqs = 0
+    for client in clients:
+        with client.lock:
+            latencies.extend(client.received[name] - sent_at for name, sent_at in sent.items() if name in client.received)
+            seqs = sorted(client.seqs)
+        duplicate_seqs += len(seqs) - len(set(seqs))
+        if seqs:
+            seq_gaps += (seqs[-1] - seqs[0] + 1) - len(set(seqs))
+
+    latencies.sort()
+    return {
+        'expected_deliveries': expected,
+        'delivered': len(latencies),
+        'missing': expected - len(latencies),
+        'seq_gaps': seq_gaps,
+        'duplicate_seqs': duplicate_seqs,
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        'p99_ms': round(latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000, 2) if latencies else None,
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=40)
+    parser.add_argument('--writes', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--base-port', type=int, default=5101)
+    parser.add_argument('--queue', default=os.environ.get('SOCKETIO_MESSAGE_QUEUE') or 'postgres')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    base_urls = [f'http://127.0.0.1:{args.base_port + i}' for i in range(args.workers)]
+    env = dict(os.environ, SERVER_MODE='eventlet', SOCKETIO_MESSAGE_QUEUE='' if args.queue == 'none' else args.queue)
+    servers = []
+    clients = []
+
+    seed_users(args.clients)
+    try:
+        for base_url in base_urls:
+            servers.append(subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.broadcast_soak_test', '--serve', '--port', base_url.rsplit(':', 1)[1]],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+        for base_url in base_urls:
+            wait_until_ready(base_url)
+
+        # Clients round robin over the workers, so most deliveries cross a process boundary
+        for i in range(args.clients):
+            clients.append(BoardClient(base_urls[i % args.workers], create_token(f'soak_u{i + 1}')))
+        for client in clients:
+            client.ready.wait(10)
+
+        token = create_token(COORDINATOR_ID)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as executor:
+            results = list(executor.map(lambda i: create_task(base_urls[i % args.workers], token, i), range(args.writes)))
+        elapsed = time.perf_counter() - start
+
+        sent = {name: sent_at for name, sent_at, status in results if status == 201}
+        result = {
+            'workers': args.workers,
+            'queue': args.queue,
+            'clients': args.clients,
+            'writes': args.writes,
+            'write_errors': args.writes - len(sent),
+            'write_throughput_rps': round(args.writes / elapsed, 2),
+        }
+        result.update(summarize(clients, sent, args.timeout))
+        print(json.dumps(result))
+
+    finally:
+        for client in clients:
+            client.sio.disconnect()
+        for server in servers:
+            server.terminate()
+            server.wait()
+        clean_up()
+
+
+if __name__ == '__main__':
+    main()
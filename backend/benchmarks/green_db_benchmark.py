@@ -0,0 +1,90 @@
+"""
+Measures how many concurrent requests the eventlet server can push through
+sync_db_util while a slow query is running, with and without green mode.
+
+Usage (from the backend directory, DB_URL must be set):
+    python -m benchmarks.green_db_benchmark
+    python -m benchmarks.green_db_benchmark --requests 200 --concurrency 8 --slow-query-seconds 0.5
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from src.utils.db import sync_db_util
+
+
+def run_mode(requests, concurrency, slow_query_seconds):
+    latencies = []
+
+    def fast_request(_):
+        start = time.perf_counter()
+        sync_db_util.execute_query_fetchone('SELECT 1;')
+        latencies.append(time.perf_counter() - start)
+
+    def slow_request():
+        sync_db_util.execute_query_fetchone(f'SELECT pg_sleep({slow_query_seconds});')
+
+    # Warm up the pool so connection setup is not part of the measurement
+    sync_db_util.execute_query_fetchone('SELECT 1;')
+
+    pool = eventlet.GreenPool(concurrency)
+    start = time.perf_counter()
+
+    # Keep one slow query in flight for the whole run, like a slow get_all_tasks
+    slow = eventlet.spawn(slow_request)
+    for _ in pool.imap(fast_request, range(requests)):
+        pass
+    fast_elapsed = time.perf_counter() - start
+    slow.wait()
+
+    latencies.sort()
+    sync_db_util.close_all_connections()
+
+    return {
+        'green_mode': os.environ.get('DB_GREEN_MODE'),
+        'requests': requests,
+        'concurrency': concurrency,
+        'elapsed_seconds': round(fast_elapsed, 4),
+        'throughput_rps': round(requests / fast_elapsed, 2),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--slow-query-seconds', type=float, default=1.0)
+    parser.add_argument('--single', action='store_true', help='Run only the mode set in DB_GREEN_MODE')
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_mode(args.requests, args.concurrency, args.slow_query_seconds)))
+        return
+
+    # The wait callback is process wide, so each mode runs in its own interpreter
+    results = []
+    for green_mode in ('false', 'true'):
+        env = dict(os.environ, DB_GREEN_MODE=green_mode)
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.green_db_benchmark', '--single',
+             '--requests', str(args.requests),
+             '--concurrency', str(args.concurrency),
+             '--slow-query-seconds', str(args.slow_query_seconds)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
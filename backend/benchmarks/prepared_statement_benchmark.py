@@ -0,0 +1,73 @@
+"""
+Compares the hot user lookups with and without server-side prepared
+statements: mean latency per call and the planning time Postgres reports.
+
+Usage (from the backend directory, DB_URL must be set):
+    python -m benchmarks.prepared_statement_benchmark --user-id <existing user_id>
+"""
+import argparse
+import json
+import time
+
+from src.dals import user_dal
+from src.utils.db import sync_db_util, statement_cache
+
+HOT_LOOKUPS = {
+    'check_user_exists_by_id': ('SELECT EXISTS(SELECT 1 FROM users WHERE user_id = %s);', user_dal.check_user_exists_by_id),
+    'get_user_role': ('SELECT role FROM users WHERE user_id = %s;', user_dal.get_user_role),
+}
+
+
+def planning_time_ms(query, params, prepared):
+    # EXPLAIN ANALYZE reports how long the planner took for this execution
+    with sync_db_util.connection() as conn:
+        with conn.cursor() as cur:
+            if prepared:
+                cache = sync_db_util.get_statement_cache(conn)
+                # Run a few times so Postgres settles on a generic plan
+                for _ in range(6):
+                    cache.execute(cur, query, params)
+                name = cache.prepare(cur, query)
+                cur.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) EXECUTE {name} (%s);', params)
+            else:
+                cur.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {query}', params)
+            plan = cur.fetchone()[0][0]
+        conn.rollback()
+    return plan['Planning Time']
+
+
+def time_calls(function, user_id, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function(user_id)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--user-id', required=True)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = []
+    for name, (query, function) in HOT_LOOKUPS.items():
+        for prepared in (False, True):
+            sync_db_util.prepared_statements_enabled = prepared
+
+            # Warm up the pool and the statement cache
+            function(args.user_id)
+
+            results.append({
+                'lookup': name,
+                'prepared': prepared,
+                'mean_call_ms': round(time_calls(function, args.user_id, args.iterations), 4),
+                'planning_time_ms': planning_time_ms(query, (args.user_id,), prepared),
+            })
+
+    for result in results:
+        print(json.dumps(result))
+    print(json.dumps({'statement_cache': statement_cache.get_stats()}))
+
+
+if __name__ == '__main__':
+    main()
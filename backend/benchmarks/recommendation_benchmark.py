@@ -0,0 +1,230 @@
+"""
+Benchmarks the recommender on synthetic data, no database needed.
+
+Users, tasks and assignments are generated at the requested scale. Task
+popularity follows a Zipf law (--skew 0 is uniform), and every user leans
+towards a few topics, so collaborative and content-based filtering both have
+something to find. One assignment per user, drawn at random from their
+picks, is held out. A share of users
+(--cold-users) keeps no training history at all and is served like a
+brand-new user.
+
+The generated data replaces the data sources of recommendation_store and
+content_index, then train_collaborative_filtering,
+train_content_based_filtering and recommend_tasks_for_user are run against
+it. The report has fit time, peak memory, per-query latency and the hit
+rate, i.e. the share of users whose held-out task is in their top --k,
+next to a most-popular baseline. It is printed and written to --output.
+--compare takes an earlier report and prints the change of every metric.
+
+Usage (from the backend directory):
+    python -m benchmarks.recommendation_benchmark
+    python -m benchmarks.recommendation_benchmark --users 20000 --tasks 5000 --per-user 15 --skew 1.2 --output after.json --compare before.json
+"""
+import argparse
+import datetime
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.utils import content_index, recommendation, recommendation_store, task_vector_index
+
+TOPIC_WORDS = 40
+TASK_TYPES = ['cleanup', 'tutoring', 'event', 'fundraiser', 'outreach']
+
+
+class SyntheticData:
+    """
+    Synthetic users, tasks and assignments behind the same calls the DALs
+    answer, so they can stand in for the database.
+    """
+
+    def __init__(self, users, tasks, per_user, skew, topics, cold_users, seed):
+        rng = np.random.default_rng(seed)
+        self.user_ids = [f'user{i}' for i in range(users)]
+        task_topics = rng.integers(topics, size=tasks)
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        self.tasks = []
+        for task_id in range(1, tasks + 1):
+            topic = task_topics[task_id - 1]
+            words = [f'topic{topic}word{w}' for w in rng.integers(TOPIC_WORDS, size=12)]
+            self.tasks.append((
+                task_id, ' '.join(words[:3]), TASK_TYPES[topic % len(TASK_TYPES)], ' '.join(words[3:]),
+                now + datetime.timedelta(days=30, hours=task_id),
+            ))
+
+        # Zipf popularity over a random ordering of the tasks, users mostly pick from their own topics
+        popularity = 1 / np.arange(1, tasks + 1) ** skew
+        popularity = popularity[rng.permutation(tasks)]
+        topic_tasks = [np.flatnonzero(task_topics == topic) for topic in range(topics)]
+
+        self.training = []
+        self.held_out = {}
+        cold = set(rng.choice(users, size=int(users * cold_users), replace=False).tolist())
+        for index, user_id in enumerate(self.user_ids):
+            favourite = [t for t in rng.choice(topics, size=2, replace=False) if len(topic_tasks[t])]
+            pool = np.concatenate([topic_tasks[t] for t in favourite]) if favourite else np.arange(tasks)
+            # A fifth of the picks ignore the user's topics
+            pool = np.concatenate([pool, rng.integers(tasks, size=max(1, len(pool) // 4))])
+            weights = popularity[pool] / popularity[pool].sum()
+            picks = min(len(np.unique(pool)), max(2, rng.poisson(per_user)))
+            chosen = list(dict.fromkeys((pool[rng.choice(len(pool), size=picks * 3, p=weights)] + 1).tolist()))[:picks]
+
+            # Picks come out of the weighted draw popular first, the last one would almost never be a popular task
+            held_out = chosen.pop(rng.integers(len(chosen)))
+            self.held_out[user_id] = held_out
+            if index not in cold:
+                self.training.extend((user_id, task_id) for task_id in chosen)
+
+        self.cold_user_ids = [self.user_ids[i] for i in sorted(cold)]
+        self.history = {}
+        for user_id, task_id in self.training:
+            self.history.setdefault(user_id, []).append(task_id)
+
+    def get_user_task_interactions(self, user_id=None, conn=None):
+        if user_id:
+            return [(user_id, task_id) for task_id in self.history.get(user_id, [])]
+        return list(self.training)
+
+    def get_unavailable_tasks(self, user_id, conn=None):
+        # Synthetic tasks have no capacity and never overlap, only the user's own tasks are unavailable
+        return [(task_id, 'assigned') for task_id in self.history.get(user_id, [])]
+
+    def get_task_content(self, task_ids=None, conn=None):
+        if task_ids is None:
+            return list(self.tasks)
+        return [self.tasks[task_id - 1] for task_id in task_ids if 0 < task_id <= len(self.tasks)]
+
+    def get_task_metadata(self, conn=None):
+        return [task[:4] for task in self.tasks]
+
+
+def use_data_source(data):
+    # Everything the recommender reads now comes from data, and nothing trained on the database is kept
+    recommendation_store.get_user_task_interactions = data.get_user_task_interactions
+    recommendation_store.get_unavailable_tasks = data.get_unavailable_tasks
+    content_index.get_task_content = data.get_task_content
+    recommendation_store.model = None
+    content_index.loaded = False
+    content_index.snapshot = None
+    task_vector_index.basis = None
+    task_vector_index.index = None
+
+
+def measure(func, *args):
+    # Timed on its own, tracemalloc slows allocation heavy code down
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'fit_ms': round(elapsed * 1000, 1), 'peak_mb': round(peak / 2**20, 1)}
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return {
+        'p50_ms': round(timings[len(timings) // 2] * 1000, 3),
+        'p99_ms': round(timings[max(0, int(len(timings) * 0.99) - 1)] * 1000, 3),
+    }
+
+
+def evaluate(data, user_ids, k):
+    timings = []
+    hits = 0
+    for user_id in user_ids:
+        start = time.perf_counter()
+        recommended = recommendation_store.recommend_tasks_for_user(user_id, k)
+        timings.append(time.perf_counter() - start)
+        hits += data.held_out[user_id] in {task['task_id'] for task in recommended}
+
+    return dict(percentiles(timings), users=len(user_ids), hit_rate=round(hits / len(user_ids), 4))
+
+
+def popularity_hit_rate(data, user_ids, k):
+    counts = {}
+    for _, task_id in data.training:
+        counts[task_id] = counts.get(task_id, 0) + 1
+    ranked = sorted(counts, key=counts.get, reverse=True)
+
+    hits = 0
+    for user_id in user_ids:
+        # The most popular tasks the hybrid model could recommend too
+        unavailable = {task_id for task_id, _ in data.get_unavailable_tasks(user_id)}
+        top = [task_id for task_id in ranked if task_id not in unavailable][:k]
+        hits += data.held_out[user_id] in top
+    return round(hits / len(user_ids), 4)
+
+
+def compare(result, baseline, prefix=''):
+    changes = {}
+    for key, value in result.items():
+        previous = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            changes.update(compare(value, previous or {}, f'{prefix}{key}.'))
+        elif isinstance(value, (int, float)) and isinstance(previous, (int, float)) and previous:
+            changes[prefix + key] = f'{previous} -> {value} ({(value - previous) / previous:+.1%})'
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--per-user', type=int, default=10, help='mean assignments per user')
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of task popularity, 0 is uniform')
+    parser.add_argument('--topics', type=int, default=50)
+    parser.add_argument('--cold-users', type=float, default=0.1, help='share of users with no training history')
+    parser.add_argument('--queries', type=int, default=1000, help='users sampled for latency and hit rate')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='recommendation_benchmark.json')
+    parser.add_argument('--compare', help='an earlier --output file')
+    args = parser.parse_args()
+
+    data = SyntheticData(args.users, args.tasks, args.per_user, args.skew, args.topics, args.cold_users, args.seed)
+    use_data_source(data)
+
+    result = {
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'training_interactions': len(data.training),
+        'collaborative_filtering': measure(recommendation.train_collaborative_filtering, data.training),
+        'content_based_filtering': measure(recommendation.train_content_based_filtering, data.get_task_metadata()),
+    }
+
+    start = time.perf_counter()
+    recommendation_store.train()
+    task_vector_index.fit()
+    task_vector_index.get_index()
+    result['serving_model_fit_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+    rng = np.random.default_rng(args.seed + 1)
+    cold = set(data.cold_user_ids)
+    warm_user_ids = [user_id for user_id in data.user_ids if user_id not in cold]
+    warm_sample = rng.choice(warm_user_ids, size=min(args.queries, len(warm_user_ids)), replace=False).tolist()
+    cold_sample = rng.choice(data.cold_user_ids, size=min(args.queries, len(data.cold_user_ids)), replace=False).tolist() if cold else []
+
+    result['warm_users'] = evaluate(data, warm_sample, args.k)
+    result['warm_users']['popularity_hit_rate'] = popularity_hit_rate(data, warm_sample, args.k)
+    if cold_sample:
+        result['cold_users'] = evaluate(data, cold_sample, args.k)
+        result['cold_users']['popularity_hit_rate'] = popularity_hit_rate(data, cold_sample, args.k)
+
+    print(json.dumps(result))
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            for metric, change in compare(result, json.load(f)).items():
+                print(f'{metric}: {change}')
+
+
+if __name__ == '__main__':
+    main()
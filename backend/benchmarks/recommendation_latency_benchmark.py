@@ -0,0 +1,116 @@
+"""
+Compares /recommend_tasks latency when the model is trained on every
+request, when a model trained ahead of time is scored per request, and
+when the endpoint reads the rows precomputed by the batch job, as
+recommendation_engine does.
+
+Synthetic users, tasks and assignments are created inside one transaction
+that is rolled back at the end, so the database is left untouched.
+
+Usage (from the backend directory, DB_URL must be set):
+    python -m benchmarks.recommendation_latency_benchmark
+    python -m benchmarks.recommendation_latency_benchmark --users 2000 --tasks 500 --assignments 20000 --requests 50
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+
+from src.dals import assignment_dal, task_dal, recommendation_dal
+from src.utils import recommendation
+from src.utils.db import sync_db_util
+
+
+def seed(conn, users, tasks, assignments):
+    with conn.cursor() as cur:
+        cur.execute('''INSERT INTO users (user_id, email, password_hash, first_name, last_name, verified)
+        SELECT 'bench_u' || i, 'bench_u' || i || '@example.com', 'x', 'First' || i, 'Last' || i, TRUE
+        FROM generate_series(1, %s) AS i;''', (users,))
+        cur.execute('''INSERT INTO tasks (task_name, task_type, description, start_time, end_time, max_participants)
+        SELECT 'bench task ' || i, (ARRAY['cleanup', 'tutoring', 'event', 'fundraiser'])[1 + i %% 4],
+        'benchmark task number ' || i, now() + interval '1 year' + i * interval '1 hour',
+        now() + interval '1 year' + i * interval '1 hour' + interval '30 minutes', NULL
+        FROM generate_series(1, %s) AS i RETURNING task_id;''', (tasks,))
+        task_ids = [row[0] for row in cur.fetchall()]
+        # Distinct (user, task) pairs, users pick tasks with a skew towards the first ones
+        cur.execute('''INSERT INTO assignments (task_id, user_id, assigned_by)
+        SELECT DISTINCT (%s::int[])[1 + floor(power(random(), 2) * %s)::int], 'bench_u' || (1 + floor(random() * %s)::int), 'benchmark'
+        FROM generate_series(1, %s) AS i;''', (task_ids, tasks, users, assignments))
+
+
+def percentiles(timings):
+    timings.sort()
+    return {
+        'p50_ms': round(timings[len(timings) // 2] * 1000, 3),
+        'p99_ms': round(timings[max(0, int(len(timings) * 0.99) - 1)] * 1000, 3),
+    }
+
+
+def on_demand(conn, user_id):
+    # What every request did before: read everything, train, score
+    model = recommendation.build_model(assignment_dal.get_user_task_interactions(conn=conn), task_dal.get_task_metadata(conn=conn))
+    return recommendation.recommend_from_model(model, user_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=300)
+    parser.add_argument('--assignments', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=30)
+    args = parser.parse_args()
+
+    try:
+        with sync_db_util.connection() as conn:
+            seed(conn, args.users, args.tasks, args.assignments)
+            user_ids = [f'bench_u{random.randint(1, args.users)}' for _ in range(args.requests)]
+
+            on_demand_timings = []
+            for user_id in user_ids:
+                start = time.perf_counter()
+                on_demand(conn, user_id)
+                on_demand_timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            model = recommendation.build_model(assignment_dal.get_user_task_interactions(conn=conn), task_dal.get_task_metadata(conn=conn))
+            training_ms = (time.perf_counter() - start) * 1000
+
+            # Enough lookups for a stable p99, they take microseconds
+            stored_timings = []
+            for user_id in user_ids * 100:
+                start = time.perf_counter()
+                recommendation.recommend_from_model(model, user_id)
+                stored_timings.append(time.perf_counter() - start)
+
+            # Batch scoring of every user, then one indexed read per request
+            start = time.perf_counter()
+            open_task_ids = [row[0] for row in task_dal.get_task_metadata(conn=conn)]
+            computed_at = datetime.datetime.now(datetime.timezone.utc)
+            recommendation_dal.clear_recommendations(conn=conn)
+            for batch_user_ids, task_ids, scores in recommendation.score_all_users(model, open_task_ids, 20):
+                recommendation_dal.insert_recommendations(batch_user_ids, task_ids, scores, computed_at, conn=conn)
+            precompute_ms = (time.perf_counter() - start) * 1000
+
+            precomputed_timings = []
+            for user_id in user_ids * 10:
+                start = time.perf_counter()
+                recommendation_dal.get_user_recommendations(user_id, conn=conn)
+                precomputed_timings.append(time.perf_counter() - start)
+
+            conn.rollback()
+
+        print(json.dumps({
+            'users': args.users,
+            'tasks': args.tasks,
+            'assignments': args.assignments,
+            'train_per_request': percentiles(on_demand_timings),
+            'trained_model': dict(percentiles(stored_timings), training_ms=round(training_ms, 2)),
+            'precomputed': dict(percentiles(precomputed_timings), precompute_ms=round(precompute_ms, 2)),
+        }))
+    finally:
+        sync_db_util.close_all_connections()
+
+
+if __name__ == '__main__':
+    main()
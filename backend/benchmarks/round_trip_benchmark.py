@@ -0,0 +1,111 @@
+"""
+Counts database round trips for the signup, assign, update assignment and
+update status operations. Runs against a throwaway task that is deleted
+afterwards.
+
+A round trip is a statement, plus the BEGIN and COMMIT psycopg2 sends for
+every transaction (one per pool checkout). Each result is printed next to
+the count of the tree before unit-of-work transactions (user-004).
+
+Usage (from the backend directory, DB_URL must be set):
+    python -m benchmarks.round_trip_benchmark --user-id <User> --other-user-id <User> --coordinator-id <Coordinator>
+"""
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+
+from src.dals import task_dal
+from src.managers import task_coordinator_manager, task_manager, task_user_manager
+from src.models.assignment_model import Status
+from src.utils.db import sync_db_util
+
+# Measured with this script on the tree before user-004 (commit 3068626), every statement ran in its own transaction.
+# update_status raised a naive/aware datetime TypeError there after 3 statements, the count is of its full path
+# (user check, assignment, task, updated_at, status).
+BASELINE = {
+    'signup_task': {'statements': 7, 'transactions': 7, 'round_trips': 21},
+    'assign_task': {'statements': 8, 'transactions': 8, 'round_trips': 24},
+    'update_assignment': {'statements': 9, 'transactions': 9, 'round_trips': 27},
+    'update_status': {'statements': 5, 'transactions': 5, 'round_trips': 15},
+}
+
+statement_count = 0
+original_run_statement = sync_db_util.run_statement
+
+
+def counting_run_statement(cur, query, params=None):
+    global statement_count
+    statement_count += 1
+    return original_run_statement(cur, query, params)
+
+
+def measure(operation, function):
+    global statement_count
+    statement_count = 0
+    checkouts_before = sync_db_util.get_pool_stats()['checkouts']
+    sync_db_util.run_statement = counting_run_statement
+
+    try:
+        result = function()
+    finally:
+        sync_db_util.run_statement = original_run_statement
+
+    transactions = sync_db_util.get_pool_stats()['checkouts'] - checkouts_before
+    round_trips = statement_count + 2 * transactions
+    baseline = BASELINE[operation]
+    return {
+        'operation': operation,
+        'result': result,
+        'statements': statement_count,
+        'transactions': transactions,
+        'round_trips': round_trips,
+        'baseline_round_trips': baseline['round_trips'],
+        'round_trips_saved': baseline['round_trips'] - round_trips,
+    }
+
+
+def get_assignment_id(task_id, user_id):
+    return sync_db_util.execute_query_fetchone(
+        'SELECT assignment_id FROM assignments WHERE task_id = %s AND user_id = %s;', (task_id, user_id))[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--user-id', required=True)
+    parser.add_argument('--other-user-id', required=True)
+    parser.add_argument('--coordinator-id', required=True)
+    args = parser.parse_args()
+
+    start_time = datetime.now(timezone.utc) + timedelta(days=365)
+    task_id = sync_db_util.execute_query_fetchone(
+        '''INSERT INTO tasks (task_name, task_type, description, start_time, end_time, max_participants)
+        VALUES (%s, %s, %s, %s, %s, %s) RETURNING task_id;''',
+        ('round trip benchmark', 'benchmark', 'throwaway task', start_time, start_time + timedelta(hours=1), 5))[0]
+
+    results = []
+    try:
+        results.append(measure('signup_task', lambda: task_user_manager.signup_task(args.user_id, task_id)))
+        results.append(measure('assign_task', lambda: task_coordinator_manager.assign_task(args.coordinator_id, args.other_user_id, task_id)))
+
+        # Free the first user again so the assignment can be moved to them
+        assignment_id = get_assignment_id(task_id, args.other_user_id)
+        sync_db_util.execute_query_insert('DELETE FROM assignments WHERE assignment_id = %s;', (get_assignment_id(task_id, args.user_id),))
+        results.append(measure('update_assignment', lambda: task_coordinator_manager.update_assignment(args.coordinator_id, args.user_id, assignment_id)))
+
+        # Status can only change once the task is over, so move it into the past
+        past = datetime.now(timezone.utc) - timedelta(days=365)
+        sync_db_util.execute_query_insert('UPDATE tasks SET start_time = %s, end_time = %s WHERE task_id = %s;', (past, past + timedelta(hours=1), task_id))
+        results.append(measure('update_status', lambda: task_manager.update_status(args.user_id, Status.COMPLETED, assignment_id)))
+    finally:
+        task_dal.delete_task(task_id)
+
+    for result in results:
+        print(json.dumps(result))
+
+    for result in results:
+        print(f"{result['operation']}: {result['baseline_round_trips']} -> {result['round_trips']} round trips "
+              f"({result['round_trips_saved']} fewer)")
+
+
+if __name__ == '__main__':
+    main()
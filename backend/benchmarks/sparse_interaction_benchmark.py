@@ -0,0 +1,77 @@
+"""
+Compares building the user x task interaction matrix as a dense pandas
+pivot, as train_collaborative_filtering used to, against the CSR matrix it
+builds now, including the TruncatedSVD fit on each.
+
+Interactions are generated in memory, no database is needed. Peak memory is
+measured with tracemalloc, which sees numpy, pandas and scipy allocations.
+
+Usage (from the backend directory):
+    python -m benchmarks.sparse_interaction_benchmark
+    python -m benchmarks.sparse_interaction_benchmark --users 10000 --tasks 5000 --per-user 20
+    python -m benchmarks.sparse_interaction_benchmark --skip-dense
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import TruncatedSVD
+
+from src.utils import recommendation
+
+
+def generate_interactions(users, tasks, per_user, seed=0):
+    # Skewed towards low task ids, a few popular tasks get most of the sign-ups
+    rng = np.random.default_rng(seed)
+    user_column = np.repeat(np.arange(users), per_user)
+    task_column = (rng.random(users * per_user) ** 2 * tasks).astype(np.int64)
+    return [(f'user{u}', int(t)) for u, t in zip(user_column, task_column)]
+
+
+def train_dense(interactions):
+    # The previous implementation, pivot() needs the pairs to be unique
+    df = pd.DataFrame(interactions, columns=["user_id", "task_id"]).drop_duplicates()
+    df["interaction"] = 1
+    user_task_matrix = df.pivot(index="user_id", columns="task_id", values="interaction").fillna(0)
+    svd = TruncatedSVD(n_components=10, random_state=0)
+    user_factors = svd.fit_transform(user_task_matrix)
+    return user_task_matrix, user_factors, svd.components_
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {'fit_ms': round(elapsed * 1000, 1), 'peak_mb': round(peak / 2**20, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--per-user', type=int, default=20)
+    parser.add_argument('--skip-dense', action='store_true', help='the dense matrix alone is users * tasks * 8 bytes')
+    args = parser.parse_args()
+
+    interactions = generate_interactions(args.users, args.tasks, args.per_user)
+    result = {'users': args.users, 'tasks': args.tasks, 'interactions': len(interactions)}
+
+    (matrix, _, _), build = measure(recommendation.build_interaction_matrix, interactions)
+    result['sparse_matrix'] = dict(build, shape=list(matrix.shape), nnz=int(matrix.nnz))
+    _, result['sparse_train'] = measure(recommendation.train_collaborative_filtering, interactions)
+
+    if not args.skip_dense:
+        (user_task_matrix, _, _), result['dense_train'] = measure(train_dense, interactions)
+        result['dense_train']['shape'] = list(user_task_matrix.shape)
+
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
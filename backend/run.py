@@ -1,14 +1,70 @@
-import eventlet
-eventlet.monkey_patch() # Handles multiple requests asynchronously
+import os
+import signal
+
+# SERVER_MODE=eventlet (default) serves the sync data layer on green threads,
+# SERVER_MODE=async serves on real threads with the asyncpg data layer
+server_mode = os.environ.get("SERVER_MODE", "eventlet").lower()
+
+# WORKERS > 1 forks that many eventlet processes sharing one port, they need SOCKETIO_MESSAGE_QUEUE
+workers = int(os.environ.get("WORKERS", 1))
+
+if server_mode == "eventlet":
+    import eventlet
+    import eventlet.wsgi
+    eventlet.monkey_patch() # Handles multiple requests asynchronously
+
 from flask_socketio import SocketIO
 
 from src import create_app
+from src.utils import message_queue
+from src.views.socket_view import register_socket_handlers
+
+def build_server():
+    # Creat app instance
+    app = create_app()
+
+    # Initialize Flask-SocketIO, with the message queue workers share when one is configured
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet" if server_mode == "eventlet" else "threading", **message_queue.socketio_options())
+    register_socket_handlers(socketio)
+    return app, socketio
+
+def serve_workers(port):
+    if server_mode != "eventlet":
+        raise SystemExit("WORKERS > 1 needs SERVER_MODE=eventlet")
+    if not message_queue.is_shared():
+        raise SystemExit("WORKERS > 1 needs SOCKETIO_MESSAGE_QUEUE, otherwise clients miss other workers' broadcasts")
+
+    # The kernel hands each connection to one worker, so clients have to use the websocket
+    # transport, long polling needs sticky sessions in front of separate worker ports
+    sock = eventlet.listen(('0.0.0.0', port))
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            # Everything holding connections or threads is created after the fork
+            app, _ = build_server()
+            eventlet.wsgi.server(sock, app, log_output=False)
+            os._exit(0)
+        children.append(pid)
+
+    print(f"Serving on port {port} with {workers} workers")
+
+    def stop_workers(signum, frame):
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
 
-# Creat app instance
-app = create_app()
+    signal.signal(signal.SIGTERM, stop_workers)
+    signal.signal(signal.SIGINT, stop_workers)
+    for pid in children:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
 
-# Initialize Flask-SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*")
+if __name__ == "__main__" and workers > 1:
+    serve_workers(int(os.environ.get("PORT", 5000)))
+else:
+    app, socketio = build_server()
 
-if __name__ == "__main__":
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    if __name__ == "__main__":
+        socketio.run(app, host='0.0.0.0', port=int(os.environ.get("PORT", 5000)), debug=True, allow_unsafe_werkzeug=server_mode != "eventlet")
@@ -1,3 +1,6 @@
+import time
+# First, so the startup report counts the imports below
+from src.utils import startup_report
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS, cross_origin
 from flask_jwt_extended import JWTManager
@@ -13,13 +16,15 @@ from src.views.user_view import user
 from src.views.task_view import task
 from src.views.task_user_view import task_user
 from src.views.task_coordinator_view import task_coordinator
-from src.utils.db import sync_connect_db_example, sync_db_util
+from src.utils import caller_context, cache_invalidation, recommendation_engine
+from src.utils.db import sync_connect_db_example, sync_db_util, async_connect_db_example, async_db_util, query_metrics
 from src.constants.http_status_codes import HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
 
 #  Load variables from the .env file
 load_dotenv()
 
 def create_app(test_config=None):
+    create_app_started = time.perf_counter()
 
     app = Flask(__name__, instance_relative_config=True)
     CORS(app)   
@@ -33,8 +38,15 @@ def create_app(test_config=None):
     else:
         app.config.from_mapping(test_config)
 
+    # Keep this worker's caches in step with writes made by other workers
+    cache_invalidation.start_listener()
+
+    # The recommender is loaded in the background or on first use, or runs in its own process
+    recommendation_engine.start()
+
     # Configure JWT manager
     jwt = JWTManager(app)
+    jwt.user_lookup_loader(caller_context.load_caller)
     
     # Configure gmail client for sending emails
     app.config['MAIL_SERVER'] = 'smtp.gmail.com'
@@ -67,6 +79,21 @@ def create_app(test_config=None):
         swagger_blueprint.name = f"swagger_ui_{api_file['name']}"
         app.register_blueprint(swagger_blueprint, url_prefix=api_file['prefix'])
 
+    @app.before_request
+    def reset_db_request_state():
+        # Read-your-writes and query counters are tracked per request
+        sync_db_util.reset_read_routing()
+        query_metrics.reset_request_stats()
+
+    @app.after_request
+    def add_db_metrics_headers(response):
+        # Makes N+1 query patterns visible while developing
+        if app.debug:
+            stats = query_metrics.get_request_stats()
+            response.headers['X-DB-Query-Count'] = str(stats['query_count'])
+            response.headers['X-DB-Time-Ms'] = str(stats['db_time_ms'])
+        return response
+
     @app.route('/static/<path:filename>')
     def serve_static(filename):
         return send_from_directory('src/static', filename)
@@ -74,6 +101,7 @@ def create_app(test_config=None):
     @atexit.register
     def app_shutdown_cleanup():
         sync_db_util.close_all_connections()
+        async_db_util.close_all_connections()
 
     @app.get("/")
     def hello():
@@ -84,7 +112,10 @@ def create_app(test_config=None):
         if connectionType == "sync":
             return jsonify(sync_connect_db_example.get_db_info())
         elif connectionType == "async":
-            return "Async connection not yet implemented."
+            # The asyncpg loop thread does not run under eventlet's monkey patching
+            if not async_db_util.is_enabled():
+                return "Async connection is only available with SERVER_MODE=async."
+            return jsonify(async_db_util.run(async_connect_db_example.get_db_info()))
         else:
             return "Invalid connection type. Please use 'sync' or 'async'."
         
@@ -95,5 +126,6 @@ def create_app(test_config=None):
     @app.errorhandler(HTTP_500_INTERNAL_SERVER_ERROR)
     def handle_500(e):
         return jsonify({'error': 'Something went wrong, we are working on it'}), HTTP_500_INTERNAL_SERVER_ERROR
-    
+
+    startup_report.report(create_app_started)
     return app
@@ -0,0 +1,38 @@
+from src.utils.db import sync_db_util
+from src.models.assignment_model import Status
+
+@sync_db_util.read_only
+def get_user_task_stats(user_id, conn=None):
+    """
+    Assignment totals by status and completion streaks of user_id in one
+    query. Streaks count consecutive Completed assignments in task start
+    order, Pending ones are skipped. The current streak is the one that
+    includes the latest finished task, 0 when that task was Incompleted.
+    Returns (total, completed, incompleted, pending, longest_streak,
+    current_streak).
+    """
+    statement = '''WITH mine AS (
+        SELECT a.status, ROW_NUMBER() OVER (ORDER BY t.start_time, a.assignment_id) AS position
+        FROM assignments a
+        JOIN tasks t ON t.task_id = a.task_id
+        WHERE a.user_id = %s AND a.status <> %s
+    ),
+    runs AS (
+        -- Gaps and islands, positions minus the rank within the status is constant along a run
+        SELECT status, COUNT(*) AS length, MAX(position) AS last_position
+        FROM (SELECT status, position, position - ROW_NUMBER() OVER (PARTITION BY status ORDER BY position) AS run FROM mine) finished
+        GROUP BY status, run
+    )
+    SELECT
+        (SELECT COUNT(*) FROM assignments WHERE user_id = %s),
+        (SELECT COUNT(*) FROM mine WHERE status = %s),
+        (SELECT COUNT(*) FROM mine WHERE status = %s),
+        (SELECT COUNT(*) FROM assignments WHERE user_id = %s AND status = %s),
+        COALESCE((SELECT MAX(length) FROM runs WHERE status = %s), 0),
+        COALESCE((SELECT length FROM runs WHERE status = %s AND last_position = (SELECT COUNT(*) FROM mine)), 0);
+    '''
+
+    completed, incompleted, pending = Status.COMPLETED.value, Status.INCOMPLETED.value, Status.PENDING.value
+    params = (user_id, pending, user_id, completed, incompleted, user_id, pending, completed, completed)
+
+    return sync_db_util.execute_query_fetchone(statement, params, conn=conn)
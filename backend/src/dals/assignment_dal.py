@@ -1,10 +1,11 @@
 from src.utils.db import sync_db_util
 from src.models.assignment_model import Assignment, Status
 
-def get_assignment_by_id(assignment_id):
-    statement = f'''SELECT * FROM assignments WHERE assignment_id = '{assignment_id}';'''
+def get_assignment_by_id(assignment_id, conn=None):
+    statement = '''SELECT assignment_id, task_id, user_id, assigned_by, updated_at, status
+    FROM assignments WHERE assignment_id = %s;'''
 
-    assignment_id, task_id, user_id, assigned_by, updated_at, status = sync_db_util.execute_query_fetchone(statement)
+    assignment_id, task_id, user_id, assigned_by, updated_at, status = sync_db_util.execute_query_fetchone(statement, (assignment_id,), conn=conn)
 
     assignment = Assignment(
         assignment_id=assignment_id,
@@ -16,108 +17,159 @@ def get_assignment_by_id(assignment_id):
 
     return assignment
 
-def get_task_assignment_count(task_id):
-    statement = f'''SELECT COUNT(*) FROM assignments WHERE task_id = '{task_id}';'''
+def get_task_assignment_count(task_id, conn=None):
+    statement = '''SELECT COUNT(*) FROM assignments WHERE task_id = %s;'''
 
-    record = sync_db_util.execute_query_fetchone(statement)
+    record = sync_db_util.execute_query_fetchone(statement, (task_id,), conn=conn)
 
     return record[0]
 
-def get_my_assignments(user_id):
-    statement = f'''SELECT a.assignment_id, a.task_id, t.task_name, t.task_type, t.description, t.max_participants, t.start_time, t.end_time
+@sync_db_util.read_only
+def get_my_assignments(user_id, conn=None):
+    statement = '''SELECT a.assignment_id, a.task_id, t.task_name, t.task_type, t.description, t.max_participants, t.start_time, t.end_time
     FROM assignments a
     INNER JOIN tasks t ON a.task_id = t.task_id
-    WHERE a.user_id = '{user_id}'
+    WHERE a.user_id = %s
     AND t.start_time >= CURRENT_TIMESTAMP
     ORDER BY t.start_time ASC;
     '''
 
-    user_tasks = sync_db_util.execute_query_fetchall(statement)
+    user_tasks = sync_db_util.execute_query_fetchall(statement, (user_id,), conn=conn)
 
     return user_tasks
 
-def get_my_pending_assignments(user_id):
-    # print(Status.PENDING == 'Pending')
-    statement = f'''SELECT a.assignment_id, a.task_id, t.task_name, t.task_type, t.description, t.max_participants, t.start_time, t.end_time
+@sync_db_util.read_only
+def get_my_pending_assignments(user_id, conn=None):
+    statement = '''SELECT a.assignment_id, a.task_id, t.task_name, t.task_type, t.description, t.max_participants, t.start_time, t.end_time
     FROM assignments a
     INNER JOIN tasks t ON a.task_id = t.task_id
-    WHERE a.user_id = '{user_id}'
+    WHERE a.user_id = %s
     AND t.end_time < CURRENT_TIMESTAMP
-    AND a.status = 'Pending'
+    AND a.status = %s
     ORDER BY t.start_time ASC;
     '''
 
-    pending_user_tasks = sync_db_util.execute_query_fetchall(statement)
+    pending_user_tasks = sync_db_util.execute_query_fetchall(statement, (user_id, Status.PENDING), conn=conn)
 
     return pending_user_tasks
 
-def check_assignment_exists(task_id, user_id):
-    statement = f'''SELECT EXISTS(SELECT 1 FROM assignments WHERE task_id = '{task_id}' and user_id = '{user_id}');'''
+def check_assignment_exists(task_id, user_id, conn=None):
+    statement = '''SELECT EXISTS(SELECT 1 FROM assignments WHERE task_id = %s and user_id = %s);'''
 
-    record = sync_db_util.execute_query_fetchone(statement)
+    record = sync_db_util.execute_query_fetchone(statement, (task_id, user_id), conn=conn)
 
     return record[0]
 
-def check_user_free_at_time(user_id, start_time, end_time):
-    statement = f'''SELECT COUNT(*) AS overlap_count FROM assignments as a
+def check_user_free_at_time(user_id, start_time, end_time, conn=None):
+    statement = '''SELECT COUNT(*) AS overlap_count FROM assignments as a
     JOIN tasks AS t ON a.task_id = t.task_id
-    WHERE a.user_id = '{user_id}' AND (
-    t.start_time < '{end_time}'
-    AND t.end_time > '{start_time}'
+    WHERE a.user_id = %s AND (
+    t.start_time < %s
+    AND t.end_time > %s
     );
     '''
 
-    record = sync_db_util.execute_query_fetchone(statement)
+    record = sync_db_util.execute_query_fetchone(statement, (user_id, end_time, start_time), conn=conn)
 
     return record[0] == 0
 
-def assign_task(assignment: Assignment):
-    statement = f'''INSERT INTO assignments (task_id, user_id, assigned_by)
-    VALUES('{assignment.task_id}', '{assignment.user_id}', '{assignment.assigned_by}');
+def get_assignment_eligibility(task_id, user_id, conn=None):
+    """
+    Fetch everything needed to validate a new assignment in one round trip:
+    task times and capacity, whether the user already has the task, how many
+    of the user's assignments overlap it and how many users it already has.
+    Inside a transaction the task row stays locked so concurrent signups
+    cannot overfill it. Returns None if the task does not exist.
+    """
+    statement = '''SELECT t.start_time, t.end_time, t.max_participants,
+    EXISTS(SELECT 1 FROM assignments WHERE task_id = t.task_id AND user_id = %s) AS already_assigned,
+    (SELECT COUNT(*) FROM assignments AS a
+        JOIN tasks AS o ON a.task_id = o.task_id
+        WHERE a.user_id = %s AND o.start_time < t.end_time AND o.end_time > t.start_time) AS overlap_count,
+    (SELECT COUNT(*) FROM assignments WHERE task_id = t.task_id) AS assignment_count
+    FROM tasks t
+    WHERE t.task_id = %s
+    FOR UPDATE OF t;
     '''
 
-    sync_db_util.execute_query_insert(statement)
+    record = sync_db_util.execute_query_fetchone(statement, (user_id, user_id, task_id), conn=conn)
 
-def delete_assignment(assignment_id):
-    statement = f'''DELETE FROM assignments WHERE assignment_id = '{assignment_id}';'''
+    return record
 
-    sync_db_util.execute_query_insert(statement)
+def assign_task(assignment: Assignment, conn=None):
+    statement = '''INSERT INTO assignments (task_id, user_id, assigned_by)
+    VALUES(%s, %s, %s)
+    RETURNING assignment_id;
+    '''
 
-def update_assignment(assignment_id, user_id):
-    statement = f'''UPDATE assignments SET user_id = '{user_id}' WHERE assignment_id = '{assignment_id}';'''
+    record = sync_db_util.execute_query_fetchone(statement, (assignment.task_id, assignment.user_id, assignment.assigned_by), conn=conn)
+
+    return record[0]
 
-    set_assignment_updated_at(assignment_id)
+def delete_assignment(assignment_id, conn=None):
+    statement = '''DELETE FROM assignments WHERE assignment_id = %s RETURNING task_id, user_id;'''
 
-    sync_db_util.execute_query_return_row_count(statement)
+    record = sync_db_util.execute_query_fetchone(statement, (assignment_id,), conn=conn)
 
-def update_status(assignment_id, status):
-    statement = f'''UPDATE assignments SET status = '{status}' WHERE assignment_id = '{assignment_id}';'''
+    # (task_id, user_id) of the deleted assignment, None if it did not exist
+    return record
 
-    set_assignment_updated_at(assignment_id)
+def get_user_assignment_ids(user_id, conn=None):
+    statement = '''SELECT assignment_id, task_id FROM assignments WHERE user_id = %s;'''
 
-    sync_db_util.execute_query_return_row_count(statement)
+    return sync_db_util.execute_query_fetchall(statement, (user_id,), conn=conn)
 
-def set_assignment_updated_at(assignment_id):
-    statement = f'''UPDATE assignments SET updated_at = CURRENT_TIMESTAMP WHERE assignment_id = '{assignment_id}';'''
+def get_task_assignees(task_id, conn=None):
+    statement = '''SELECT assignment_id, user_id FROM assignments WHERE task_id = %s;'''
 
-    affected_rows = sync_db_util.execute_query_return_row_count(statement)
+    return sync_db_util.execute_query_fetchall(statement, (task_id,), conn=conn)
+
+@sync_db_util.read_only
+def get_board_assignments(assignment_ids=(), user_ids=(), conn=None):
+    # Assignee entries as they appear in the board's users lists, for upcoming tasks only
+    statement = '''SELECT a.assignment_id::text, a.task_id, u.user_id, u.first_name, u.last_name
+    FROM assignments a
+    INNER JOIN users u ON a.user_id = u.user_id
+    INNER JOIN tasks t ON a.task_id = t.task_id
+    WHERE (a.assignment_id = ANY(%s) OR a.user_id = ANY(%s))
+    AND t.start_time >= CURRENT_TIMESTAMP;
+    '''
+
+    return sync_db_util.execute_query_fetchall(statement, (list(assignment_ids), list(user_ids)), conn=conn)
+
+def update_assignment(assignment_id, user_id, conn=None):
+    statement = '''UPDATE assignments SET user_id = %s, updated_at = CURRENT_TIMESTAMP WHERE assignment_id = %s;'''
+
+    sync_db_util.execute_query_return_row_count(statement, (user_id, assignment_id), conn=conn)
+
+def update_status(assignment_id, status, conn=None):
+    statement = '''UPDATE assignments SET status = %s, updated_at = CURRENT_TIMESTAMP WHERE assignment_id = %s;'''
+
+    sync_db_util.execute_query_return_row_count(statement, (status, assignment_id), conn=conn)
+
+def set_assignment_updated_at(assignment_id, conn=None):
+    statement = '''UPDATE assignments SET updated_at = CURRENT_TIMESTAMP WHERE assignment_id = %s;'''
+
+    affected_rows = sync_db_util.execute_query_return_row_count(statement, (assignment_id,), conn=conn)
 
     return affected_rows
 
-def get_user_task_interactions(user_id=None):
+@sync_db_util.read_only
+def get_user_task_interactions(user_id=None, conn=None):
     """
     Fetch user-task interaction data from the assignments table.
     If user_id is provided, fetch interactions for that specific user.
     """
     if user_id:
-        query = f"""
+        query = """
         SELECT user_id, task_id
         FROM assignments
-        WHERE user_id = '{user_id}';
+        WHERE user_id = %s;
         """
+        return sync_db_util.execute_query_fetchall(query, (user_id,), conn=conn)
     else:
         query = """
         SELECT user_id, task_id
         FROM assignments;
         """
-    return sync_db_util.execute_query_fetchall(query)
\ No newline at end of file
+    return sync_db_util.execute_query_fetchall(query, conn=conn)
\ No newline at end of file
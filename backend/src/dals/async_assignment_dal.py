@@ -0,0 +1,25 @@
+from src.utils.db import async_db_util
+from src.models.assignment_model import Status
+
+async def get_my_assignments(user_id, conn=None):
+    statement = '''SELECT a.assignment_id, a.task_id, t.task_name, t.task_type, t.description, t.max_participants, t.start_time, t.end_time
+    FROM assignments a
+    INNER JOIN tasks t ON a.task_id = t.task_id
+    WHERE a.user_id = $1
+    AND t.start_time >= CURRENT_TIMESTAMP
+    ORDER BY t.start_time ASC;
+    '''
+
+    return await async_db_util.fetch(statement, user_id, conn=conn)
+
+async def get_my_pending_assignments(user_id, conn=None):
+    statement = '''SELECT a.assignment_id, a.task_id, t.task_name, t.task_type, t.description, t.max_participants, t.start_time, t.end_time
+    FROM assignments a
+    INNER JOIN tasks t ON a.task_id = t.task_id
+    WHERE a.user_id = $1
+    AND t.end_time < CURRENT_TIMESTAMP
+    AND a.status = $2
+    ORDER BY t.start_time ASC;
+    '''
+
+    return await async_db_util.fetch(statement, user_id, Status.PENDING.value, conn=conn)
@@ -0,0 +1,29 @@
+from src.utils.db import async_db_util
+
+async def get_all_tasks(conn=None):
+    statement = '''SELECT t.task_id AS task_name,
+    t.task_name AS task_name,
+    t.task_type AS task_type,
+    t.description AS description,
+    t.start_time AS start_time,
+    t.end_time AS end_time,
+    t.max_participants AS max_participants,
+    COALESCE(
+        json_agg(json_build_object(
+            'user_id', u.user_id,
+            'first_name', u.first_name,
+            'last_name', u.last_name,
+            'assignment_id', a.assignment_id::text
+        ) ORDER BY a.assignment_id) FILTER (WHERE a.assignment_id IS NOT NULL),
+        '[]'
+    ) AS users
+    FROM tasks t
+    LEFT JOIN assignments a ON t.task_id = a.task_id
+    LEFT JOIN users u ON a.user_id = u.user_id
+    WHERE t.start_time >= CURRENT_TIMESTAMP
+    GROUP BY t.task_id
+    ORDER BY t.start_time;
+    '''
+
+    # Records index like tuples, so the sync formatters work on them unchanged
+    return await async_db_util.fetch(statement, conn=conn)
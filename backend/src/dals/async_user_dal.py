@@ -0,0 +1,27 @@
+from src.utils.db import async_db_util
+from src.models.user_model import User
+
+def record_to_user(record):
+    return User(
+        user_id=record['user_id'],
+        email=record['email'],
+        password_hash=record['password_hash'],
+        first_name=record['first_name'],
+        last_name=record['last_name'],
+        verified=record['verified'],
+        role=record['role']
+    )
+
+async def find_user_by_id(user_id, conn=None):
+    # Existence check and lookup in one query, returns None if no record is found
+    statement = '''SELECT user_id, email, password_hash, first_name, last_name, verified, role
+    FROM users WHERE user_id = $1;'''
+
+    record = await async_db_util.fetchrow(statement, user_id, conn=conn)
+
+    return record_to_user(record) if record else None
+
+async def check_user_exists_by_id(user_id, conn=None):
+    statement = '''SELECT EXISTS(SELECT 1 FROM users WHERE user_id = $1);'''
+
+    return await async_db_util.fetchval(statement, user_id, conn=conn)
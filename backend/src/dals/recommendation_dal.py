@@ -0,0 +1,77 @@
+from src.utils.db import sync_db_util
+
+# Only one worker rewrites user_recommendations at a time
+PRECOMPUTE_LOCK_ID = 7427002
+
+def try_lock_recommendations(conn):
+    # Held until conn's transaction ends
+    record = sync_db_util.execute_query_fetchone('SELECT pg_try_advisory_xact_lock(%s);', (PRECOMPUTE_LOCK_ID,), conn=conn)
+
+    return record[0]
+
+def clear_recommendations(conn=None):
+    statement = '''DELETE FROM user_recommendations;'''
+
+    return sync_db_util.execute_query_return_row_count(statement, conn=conn)
+
+def insert_recommendations(user_ids, task_id_lists, score_lists, computed_at, conn=None):
+    # One statement for a whole batch of users, users deleted since the model was trained are skipped
+    statement = '''INSERT INTO user_recommendations (user_id, task_ids, scores, computed_at)
+    SELECT r.user_id, r.task_ids::int[], r.scores::real[], %s
+    FROM unnest(%s::varchar[], %s::text[], %s::text[]) AS r(user_id, task_ids, scores)
+    WHERE EXISTS (SELECT 1 FROM users u WHERE u.user_id = r.user_id);
+    '''
+
+    # Lists of different lengths cannot form one two-dimensional array, each is sent as an array literal
+    task_ids = ['{' + ','.join(map(str, ids)) + '}' for ids in task_id_lists]
+    scores = ['{' + ','.join(map(repr, values)) + '}' for values in score_lists]
+
+    return sync_db_util.execute_query_return_row_count(statement, (computed_at, list(user_ids), task_ids, scores), conn=conn)
+
+@sync_db_util.read_only
+def get_user_recommendations(user_id, conn=None):
+    # Tasks that were deleted, started, filled up, or taken by the user or overlapping one they took
+    # since the batch ran are left out
+    statement = '''SELECT t.task_id, r.computed_at
+    FROM user_recommendations r
+    CROSS JOIN LATERAL unnest(r.task_ids) WITH ORDINALITY AS ranked(task_id, rank)
+    JOIN tasks t ON t.task_id = ranked.task_id
+    WHERE r.user_id = %s AND t.start_time >= CURRENT_TIMESTAMP
+    AND NOT EXISTS (SELECT 1 FROM assignments a WHERE a.task_id = t.task_id AND a.user_id = r.user_id)
+    AND NOT (t.max_participants > 0 AND (SELECT COUNT(*) FROM assignments c WHERE c.task_id = t.task_id) >= t.max_participants)
+    AND NOT EXISTS (SELECT 1 FROM assignments a JOIN tasks o ON o.task_id = a.task_id
+        WHERE a.user_id = r.user_id AND o.start_time < t.end_time AND o.end_time > t.start_time)
+    ORDER BY ranked.rank;
+    '''
+
+    return sync_db_util.execute_query_fetchall(statement, (user_id,), conn=conn)
+
+@sync_db_util.read_only
+def get_unavailable_tasks(user_id, conn=None):
+    """
+    Every task user_id could not sign up for as (task_id, reason) rows from
+    one query. reason is 'assigned' for tasks the user already has,
+    'at_capacity' for upcoming tasks with max_participants reached and
+    'time_conflict' for upcoming tasks overlapping one of the user's. A task
+    can appear once per reason. Whether a task already started is left to
+    the caller, which has the start times.
+    """
+    statement = '''WITH mine AS (
+        SELECT o.task_id, o.start_time, o.end_time FROM assignments a
+        JOIN tasks o ON o.task_id = a.task_id
+        WHERE a.user_id = %s
+    )
+    SELECT task_id, 'assigned' FROM mine
+    UNION ALL
+    SELECT DISTINCT t.task_id, 'time_conflict' FROM mine m
+    JOIN tasks t ON t.start_time < m.end_time AND t.end_time > m.start_time
+    WHERE t.start_time >= CURRENT_TIMESTAMP AND t.task_id <> m.task_id
+    UNION ALL
+    SELECT t.task_id, 'at_capacity' FROM tasks t
+    JOIN assignments c ON c.task_id = t.task_id
+    WHERE t.start_time >= CURRENT_TIMESTAMP AND t.max_participants > 0
+    GROUP BY t.task_id, t.max_participants
+    HAVING COUNT(*) >= t.max_participants;
+    '''
+
+    return sync_db_util.execute_query_fetchall(statement, (user_id,), conn=conn)
@@ -1,10 +1,12 @@
+from src.utils import cache_invalidation
 from src.utils.db import sync_db_util
 from src.models.task_model import Task
 
-def get_task_by_id(task_id):
-    statement = f'''SELECT * FROM tasks WHERE task_id = '{task_id}';'''
+def get_task_by_id(task_id, conn=None):
+    statement = '''SELECT task_id, task_name, task_type, description, start_time, end_time, max_participants, created_at, updated_at
+    FROM tasks WHERE task_id = %s;'''
 
-    task_id, task_name, task_type, description, start_time, end_time, max_participants, created_at, updated_at = sync_db_util.execute_query_fetchone(statement)
+    task_id, task_name, task_type, description, start_time, end_time, max_participants, created_at, updated_at = sync_db_util.execute_query_fetchone(statement, (task_id,), conn=conn)
 
     task = Task(
         task_id=task_id,
@@ -18,70 +20,100 @@ def get_task_by_id(task_id):
 
     return task
 
-def get_all_tasks():
-    statement = f'''SELECT t.task_id AS task_name,
+# Upcoming tasks with their assignees, shaped for format_response.handleAllAssignments
+BOARD_TASKS_STATEMENT = '''SELECT t.task_id AS task_name,
     t.task_name AS task_name,
     t.task_type AS task_type,
     t.description AS description,
     t.start_time AS start_time,
     t.end_time AS end_time,
     t.max_participants AS max_participants,
-    string_agg(a.user_id || ':' || a.assignment_id, ',') AS user_assignments
+    COALESCE(
+        json_agg(json_build_object(
+            'user_id', u.user_id,
+            'first_name', u.first_name,
+            'last_name', u.last_name,
+            'assignment_id', a.assignment_id::text
+        ) ORDER BY a.assignment_id) FILTER (WHERE a.assignment_id IS NOT NULL),
+        '[]'
+    ) AS users
     FROM tasks t
     LEFT JOIN assignments a ON t.task_id = a.task_id
-    WHERE t.start_time >= CURRENT_TIMESTAMP
+    LEFT JOIN users u ON a.user_id = u.user_id
+    WHERE t.start_time >= CURRENT_TIMESTAMP {condition}
     GROUP BY t.task_id
     ORDER BY t.start_time;
     '''
 
-    tasks = sync_db_util.execute_query_fetchall(statement)
+@sync_db_util.read_only
+def get_all_tasks(conn=None):
+    statement = BOARD_TASKS_STATEMENT.format(condition='')
+
+    tasks = sync_db_util.execute_query_fetchall(statement, conn=conn)
 
     return tasks
 
-def check_task_exists(task: Task):
-    statement = f'''SELECT EXISTS(
-    SELECT 1 FROM tasks WHERE task_name = '{task.task_name}'
-    AND task_type = '{task.task_type}'
-    AND description = '{task.description}'
-    AND start_time = '{task.start_time}'
-    AND end_time = '{task.end_time}'
+@sync_db_util.read_only
+def get_board_tasks_by_ids(task_ids, conn=None):
+    # Same rows as get_all_tasks for just these tasks, ids that are missing are gone from the board
+    statement = BOARD_TASKS_STATEMENT.format(condition='AND t.task_id = ANY(%s)')
+
+    return sync_db_util.execute_query_fetchall(statement, (list(task_ids),), conn=conn)
+
+def check_task_exists(task: Task, conn=None):
+    statement = '''SELECT EXISTS(
+    SELECT 1 FROM tasks WHERE task_name = %s
+    AND task_type = %s
+    AND description = %s
+    AND start_time = %s
+    AND end_time = %s
     );
     '''
 
-    record = sync_db_util.execute_query_fetchone(statement)
+    record = sync_db_util.execute_query_fetchone(statement, (task.task_name, task.task_type, task.description, task.start_time, task.end_time), conn=conn)
 
     return record[0]
 
-def create_task(task: Task):
-    statement = f'''INSERT INTO tasks (task_name, task_type, description, start_time, end_time, max_participants)
-    VALUES('{task.task_name}', '{task.task_type}', '{task.description}', '{task.start_time}', '{task.end_time}', {task.max_participants if task.max_participants is not None else "NULL"});
+def create_task(task: Task, conn=None):
+    statement = '''INSERT INTO tasks (task_name, task_type, description, start_time, end_time, max_participants)
+    VALUES(%s, %s, %s, %s, %s, %s)
+    RETURNING task_id;
     '''
 
-    sync_db_util.execute_query_insert(statement)
+    record = sync_db_util.execute_query_fetchone(statement, (task.task_name, task.task_type, task.description, task.start_time, task.end_time, task.max_participants), conn=conn)
+    publish_content_change(record[0], conn=conn)
 
-def delete_task(task_id):
-    statement = f'''DELETE FROM tasks WHERE task_id = '{task_id}';'''
+    return record[0]
 
-    sync_db_util.execute_query_return_row_count(statement)
+def delete_task(task_id, conn=None):
+    statement = '''DELETE FROM tasks WHERE task_id = %s;'''
 
-def update_task(task_id, updates: dict):
-    update_query = [f"{key} = '{value}'" for key, value in updates.items()]
+    sync_db_util.execute_query_return_row_count(statement, (task_id,), conn=conn)
+    publish_content_change(task_id, conn=conn)
 
-    statement = f'''UPDATE tasks SET {', '.join(update_query)} WHERE task_id = '{task_id}';'''
+def update_task(task_id, updates: dict, conn=None):
+    # Column names cannot be bound as parameters, so only allow known task fields
+    invalid_fields = [key for key in updates if key not in Task.model_fields or key == 'task_id']
+    if invalid_fields:
+        raise ValueError(f"Invalid task fields: {', '.join(invalid_fields)}")
 
-    set_task_updated_at(task_id)
+    update_query = [f"{key} = %s" for key in updates]
 
-    sync_db_util.execute_query_return_row_count(statement)
+    statement = f'''UPDATE tasks SET {', '.join(update_query)}, updated_at = CURRENT_TIMESTAMP WHERE task_id = %s;'''
 
-def set_task_updated_at(task_id):
-    statement = f'''UPDATE tasks SET updated_at = CURRENT_TIMESTAMP WHERE task_id = '{task_id}';'''
+    sync_db_util.execute_query_return_row_count(statement, (*updates.values(), task_id), conn=conn)
+    publish_content_change(task_id, conn=conn)
 
-    affected_rows = sync_db_util.execute_query_return_row_count(statement)
+def set_task_updated_at(task_id, conn=None):
+    statement = '''UPDATE tasks SET updated_at = CURRENT_TIMESTAMP WHERE task_id = %s;'''
+
+    affected_rows = sync_db_util.execute_query_return_row_count(statement, (task_id,), conn=conn)
 
     # Should return 0 if the task_id does not exist, else should return 1
     return affected_rows
 
-def get_task_metadata():
+@sync_db_util.read_only
+def get_task_metadata(conn=None):
     """
     Fetch task metadata from the tasks table.
     Only includes tasks with a start time in the future.
@@ -91,4 +123,29 @@ def get_task_metadata():
     FROM tasks
     WHERE start_time >= CURRENT_TIMESTAMP;
     """
-    return sync_db_util.execute_query_fetchall(query)
\ No newline at end of file
+    return sync_db_util.execute_query_fetchall(query, conn=conn)
+
+@sync_db_util.read_only
+def get_task_content(task_ids=None, conn=None):
+    """
+    Text and start time of tasks for the content index, every task when
+    task_ids is None. Past tasks are included, they make up user histories.
+    """
+    if task_ids is None:
+        query = """
+        SELECT task_id, task_name, task_type, description, start_time
+        FROM tasks;
+        """
+        return sync_db_util.execute_query_fetchall(query, conn=conn)
+
+    query = """
+    SELECT task_id, task_name, task_type, description, start_time
+    FROM tasks
+    WHERE task_id = ANY(%s);
+    """
+    return sync_db_util.execute_query_fetchall(query, (list(task_ids),), conn=conn)
+
+def publish_content_change(task_id, conn=None):
+    # Every worker refreshes task_id in its content index, this one again once conn commits so it never keeps the old row
+    cache_invalidation.publish('task_content', task_id, conn=conn)
+    sync_db_util.after_commit(conn, lambda: cache_invalidation.dispatch('task_content', task_id))
@@ -1,10 +1,45 @@
+from src.utils import user_cache
 from src.utils.db import sync_db_util
 from src.models.user_model import User
 
-def get_user_by_id(user_id):
-    statement = f'''SELECT * FROM users WHERE user_id = '{user_id}';'''
+def get_user_by_id(user_id, conn=None):
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
 
-    user_id, email, password_hash, created_at, updated_at, first_name, last_name, verified, role = sync_db_util.execute_query_fetchone(statement)
+    read_generation = user_cache.get_generation()
+    statement = '''SELECT user_id, email, password_hash, created_at, updated_at, first_name, last_name, verified, role
+    FROM users WHERE user_id = %s;'''
+
+    user_id, email, password_hash, created_at, updated_at, first_name, last_name, verified, role = sync_db_util.execute_query_fetchone(statement, (user_id,), conn=conn)
+
+    user = User(
+        user_id=user_id,
+        email=email,
+        password_hash=password_hash,
+        first_name=first_name,
+        last_name=last_name,
+        verified=verified,
+        role=role
+    )
+
+    # Rows read inside a caller's transaction may not be committed yet
+    if conn is None:
+        user_cache.put(user, read_generation)
+
+    return user
+
+
+def get_user_by_email(email, conn=None):
+    cached = user_cache.get_by_email(email)
+    if cached is not None:
+        return cached
+
+    read_generation = user_cache.get_generation()
+    statement = '''SELECT user_id, email, password_hash, created_at, updated_at, first_name, last_name, verified, role
+    FROM users WHERE email = %s;'''
+
+    user_id, email, password_hash, created_at, updated_at, first_name, last_name, verified, role = sync_db_util.execute_query_fetchone(statement, (email,), conn=conn)
 
     user = User(
         user_id=user_id,
@@ -16,14 +51,26 @@ def get_user_by_id(user_id):
         role=role
     )
 
-    # returns None if no record is found
+    if conn is None:
+        user_cache.put(user, read_generation)
+
     return user
 
+def find_user_by_id(user_id, conn=None):
+    # Existence check and lookup in one query, returns None if no record is found
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    read_generation = user_cache.get_generation()
+    statement = '''SELECT user_id, email, password_hash, created_at, updated_at, first_name, last_name, verified, role
+    FROM users WHERE user_id = %s;'''
 
-def get_user_by_email(email):
-    statement = f'''SELECT * FROM users WHERE email = '{email}';'''
+    record = sync_db_util.execute_query_fetchone(statement, (user_id,), conn=conn)
+    if record is None:
+        return None
 
-    user_id, email, password_hash, created_at, updated_at, first_name, last_name, verified, role = sync_db_util.execute_query_fetchone(statement)
+    user_id, email, password_hash, created_at, updated_at, first_name, last_name, verified, role = record
 
     user = User(
         user_id=user_id,
@@ -35,20 +82,23 @@ def get_user_by_email(email):
         role=role
     )
 
-    # returns None if no record is found
+    if conn is None:
+        user_cache.put(user, read_generation)
+
     return user
 
-def get_user_role(user_id):
-    statement = f'''SELECT role FROM users WHERE user_id = '{user_id}';'''
+def get_user_role(user_id, conn=None):
+    statement = '''SELECT role FROM users WHERE user_id = %s;'''
 
-    record = sync_db_util.execute_query_fetchone(statement)
+    record = sync_db_util.execute_query_fetchone(statement, (user_id,), conn=conn)
 
     return record[0]
 
-def get_all_users():
-    statement = f'''SELECT user_id, first_name, last_name, email, role FROM users WHERE verified = TRUE ORDER BY first_name ASC;'''
+@sync_db_util.read_only
+def get_all_users(conn=None):
+    statement = '''SELECT user_id, first_name, last_name, email, role FROM users WHERE verified = TRUE ORDER BY first_name ASC;'''
 
-    users = sync_db_util.execute_query_fetchall(statement)
+    users = sync_db_util.execute_query_fetchall(statement, conn=conn)
     user_list = []
 
     for user in users:
@@ -60,67 +110,64 @@ def get_all_users():
             role=user[4]
         )
         user_list.append(user_obj.dict(exclude={"password_hash", "verified"}))
-    
+
     return user_list
 
-def check_user_exists_by_id(user_id):
-    statement = f'''SELECT EXISTS(SELECT 1 FROM users WHERE user_id = '{user_id}');'''
+def check_user_exists_by_id(user_id, conn=None):
+    statement = '''SELECT EXISTS(SELECT 1 FROM users WHERE user_id = %s);'''
 
-    record = sync_db_util.execute_query_fetchone(statement)
+    record = sync_db_util.execute_query_fetchone(statement, (user_id,), conn=conn)
 
     return record[0]
 
-def check_user_exists_by_email(email):
-    statement = f'''SELECT EXISTS(SELECT 1 FROM users WHERE email = '{email}');'''
+def check_user_exists_by_email(email, conn=None):
+    statement = '''SELECT EXISTS(SELECT 1 FROM users WHERE email = %s);'''
 
-    record = sync_db_util.execute_query_fetchone(statement)
+    record = sync_db_util.execute_query_fetchone(statement, (email,), conn=conn)
 
     return record[0]
 
-def set_user_updated_at(user_id):
-    statement = f'''UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE user_id = '{user_id}';'''
-    
-    affected_rows = sync_db_util.execute_query_return_row_count(statement)
+def set_user_updated_at(user_id, conn=None):
+    statement = '''UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE user_id = %s;'''
+
+    affected_rows = sync_db_util.execute_query_return_row_count(statement, (user_id,), conn=conn)
 
     # Should return 0 if the user_id does not exist, else should return 1
     return affected_rows
 
-def register(user: User):
-    statement = f'''INSERT INTO users (user_id, password_hash, email, created_at, updated_at, first_name, last_name, verified) 
-                    VALUES('{user.user_id}', '{user.password_hash}', '{user.email}', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, '{user.first_name}', '{user.last_name}', FALSE);
+def register(user: User, conn=None):
+    statement = '''INSERT INTO users (user_id, password_hash, email, created_at, updated_at, first_name, last_name, verified)
+                    VALUES(%s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, %s, %s, FALSE);
                 '''
-    
-    sync_db_util.execute_query_insert(statement)
-
-def delete_user(user_id):
-    statement = f'''DELETE FROM users WHERE user_id = '{user_id}';'''
-
-    sync_db_util.execute_query_return_row_count(statement)
-
-def verify_user(user_id):
-    statement = f'''UPDATE users SET verified = TRUE WHERE user_id = '{user_id}';'''
 
-    set_user_updated_at(user_id)
+    sync_db_util.execute_query_insert(statement, (str(user.user_id), user.password_hash, user.email, user.first_name, user.last_name), conn=conn)
 
-    sync_db_util.execute_query_return_row_count(statement)
+def delete_user(user_id, conn=None):
+    statement = '''DELETE FROM users WHERE user_id = %s;'''
 
-def update_user_password(user_id, password_hash):
-    statement = f'''UPDATE users SET password_hash = '{password_hash}' WHERE user_id = '{user_id}';'''
+    sync_db_util.execute_query_return_row_count(statement, (user_id,), conn=conn)
+    user_cache.invalidate(user_id, conn=conn)
 
-    set_user_updated_at(user_id)
+def verify_user(user_id, conn=None):
+    statement = '''UPDATE users SET verified = TRUE, updated_at = CURRENT_TIMESTAMP WHERE user_id = %s;'''
 
-    sync_db_util.execute_query_return_row_count(statement)
+    sync_db_util.execute_query_return_row_count(statement, (user_id,), conn=conn)
+    user_cache.invalidate(user_id, conn=conn)
 
-def update_user_first_name(user_id, first_name):
-    statement = f'''UPDATE users SET first_name = '{first_name}' WHERE user_id = '{user_id}';'''
+def update_user_password(user_id, password_hash, conn=None):
+    statement = '''UPDATE users SET password_hash = %s, updated_at = CURRENT_TIMESTAMP WHERE user_id = %s;'''
 
-    set_user_updated_at(user_id)
+    sync_db_util.execute_query_return_row_count(statement, (password_hash, user_id), conn=conn)
+    user_cache.invalidate(user_id, conn=conn)
 
-    sync_db_util.execute_query_return_row_count(statement)
+def update_user_first_name(user_id, first_name, conn=None):
+    statement = '''UPDATE users SET first_name = %s, updated_at = CURRENT_TIMESTAMP WHERE user_id = %s;'''
 
-def update_user_last_name(user_id, last_name):
-    statement = f'''UPDATE users SET last_name = '{last_name}' WHERE user_id = '{user_id}';'''
+    sync_db_util.execute_query_return_row_count(statement, (first_name, user_id), conn=conn)
+    user_cache.invalidate(user_id, conn=conn)
 
-    set_user_updated_at(user_id)
+def update_user_last_name(user_id, last_name, conn=None):
+    statement = '''UPDATE users SET last_name = %s, updated_at = CURRENT_TIMESTAMP WHERE user_id = %s;'''
 
-    sync_db_util.execute_query_return_row_count(statement)
\ No newline at end of file
+    sync_db_util.execute_query_return_row_count(statement, (last_name, user_id), conn=conn)
+    user_cache.invalidate(user_id, conn=conn)
@@ -0,0 +1,68 @@
+import asyncio
+
+from src.models.user_model import UserRole
+from src.dals import async_user_dal, async_assignment_dal
+from src.utils import format_response
+
+# Read paths for SERVER_MODE=async, independent queries are awaited together
+
+async def get_my_pending_tasks(user_id):
+    results = {'message': None, 'task_list': None}
+
+    try:
+        user_exists, task_list = await asyncio.gather(
+            async_user_dal.check_user_exists_by_id(user_id),
+            async_assignment_dal.get_my_pending_assignments(user_id)
+        )
+        if not user_exists:
+            results['message'] = 'DNE'
+            return results
+
+        results['task_list'] = format_response.handleMyTasks(task_list)
+        results['message'] = 'pending user tasks successfully retrieved'
+        return results
+
+    except Exception as e:
+        print(f'Error retrieving pending user tasks: {str(e)}')
+        return 'error'
+
+async def get_my_tasks(user_id):
+    results = {'message': None, 'task_list': None}
+
+    try:
+        user, task_list = await asyncio.gather(
+            async_user_dal.find_user_by_id(user_id),
+            async_assignment_dal.get_my_assignments(user_id)
+        )
+        if user is None:
+            results['message'] = 'DNE'
+            return results
+        # Access control for users only
+        if user.role != UserRole.USER:
+            results['message'] = 'user unauthorized'
+            return results
+
+        results['task_list'] = format_response.handleMyTasks(task_list)
+        results['message'] = 'user tasks successfully retrieved'
+        return results
+
+    except Exception as e:
+        print(f'Error retrieving user tasks: {str(e)}')
+        return 'error'
+
+async def get_user_data(user_id):
+    results = {'message': None, 'user_data': None}
+
+    try:
+        user = await async_user_dal.find_user_by_id(user_id)
+        if user is None:
+            results['message'] = 'DNE'
+            return results
+
+        results['user_data'] = user.dict(exclude={"password_hash", "verified"})
+        results['message'] = 'user data successfully retrieved'
+        return results
+
+    except Exception as e:
+        print(f'Error retrieving user data: {str(e)}')
+        return 'error'
@@ -4,22 +4,27 @@ from src.models.task_model import Task
 from src.models.user_model import UserRole
 from src.models.assignment_model import Assignment, Status
 from src.dals import task_dal, user_dal, assignment_dal
-from src.utils import format_response
+from src.utils import format_response, caller_context, task_board, task_changes, recommendation_engine, analytics
+from src.utils.db import sync_db_util
 
 def create_task(user_id: str, task: Task):    
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
-
-        # Access control for coordinators only
-        if user_dal.get_user_role(user_id) != UserRole.COORDINATOR:
-            return 'user unauthorized'
-
-        if task_dal.check_task_exists(task):
-            return 'task exists'
-
-        task_dal.create_task(task)
-        return 'task successfully created'
+        with sync_db_util.transaction() as conn:
+            user = caller_context.get_caller(user_id, conn=conn)
+            if user is None:
+                return 'DNE'
+
+            # Access control for coordinators only
+            if user.role != UserRole.COORDINATOR:
+                return 'user unauthorized'
+
+            if task_dal.check_task_exists(task, conn=conn):
+                return 'task exists'
+
+            task_id = task_dal.create_task(task, conn=conn)
+            task_board.bump_version(conn=conn)
+            task_changes.record_task(task_id, 'upserted')
+            return 'task successfully created'
     
     except Exception as e:
         print(f'Error creating task: {str(e)}')
@@ -27,53 +32,67 @@ def create_task(user_id: str, task: Task):
     
 def assign_task(user_id: str, assignee_id: str, task_id: str):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
+        # Run every check and the insert on one connection in one transaction
+        with sync_db_util.transaction() as conn:
+            assigner = caller_context.get_caller(user_id, conn=conn)
+            if assigner is None:
+                return 'DNE'
 
-        # Access control for coordinators only
-        assigner = user_dal.get_user_by_id(user_id)
-        if assigner.role != UserRole.COORDINATOR:
-            return 'user unauthorized'
+            # Access control for coordinators only
+            if assigner.role != UserRole.COORDINATOR:
+                return 'user unauthorized'
 
-        if not user_dal.check_user_exists_by_id(assignee_id):
-            return 'task doer does not exist'
-        
-        if assignment_dal.check_assignment_exists(task_id, assignee_id):
-            return 'assignment already exists'
-        
-        task = task_dal.get_task_by_id(task_id)
+            if not user_dal.check_user_exists_by_id(assignee_id, conn=conn):
+                return 'task doer does not exist'
+
+            start_time, end_time, max_participants, already_assigned, overlap_count, assignment_count = assignment_dal.get_assignment_eligibility(task_id, assignee_id, conn=conn)
+
+            if already_assigned:
+                return 'assignment already exists'
+
+            if overlap_count > 0:
+                return 'assignee not free'
+
+            if max_participants and assignment_count >= max_participants:
+                return 'maximum participants reached'
 
-        if not assignment_dal.check_user_free_at_time(assignee_id, task.start_time, task.end_time):
-            return 'assignee not free'
-        
-        if not task.max_participants or assignment_dal.get_task_assignment_count(task_id) < task.max_participants:
             assignment = Assignment(
                 task_id=task_id,
                 user_id=assignee_id,
                 assigned_by=assigner.email
             )
 
-            assignment_dal.assign_task(assignment)
+            assignment_id = assignment_dal.assign_task(assignment, conn=conn)
+            task_board.bump_version(conn=conn)
+            task_changes.record_assignment(assignment_id, task_id, 'upserted', [assignee_id])
+            recommendation_engine.record_assignment(assignment_id, conn=conn)
+            analytics.invalidate(assignee_id, conn=conn)
             return 'assignment successfully created'
         
-        else:
-            return 'maximum participants reached'
-        
     except Exception as e:
         print(f'Error making assignment: {str(e)}')
         return 'error'
     
 def delete_task(user_id: str, task_id: str):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
-
-        # Access control for coordinators only
-        if user_dal.get_user_role(user_id) != UserRole.COORDINATOR:
-            return 'user unauthorized'
-        
-        task_dal.delete_task(task_id)
-        return 'task successfully deleted'
+        with sync_db_util.transaction() as conn:
+            user = caller_context.get_caller(user_id, conn=conn)
+            if user is None:
+                return 'DNE'
+
+            # Access control for coordinators only
+            if user.role != UserRole.COORDINATOR:
+                return 'user unauthorized'
+
+            # The task's assignments are deleted with it, so their assignees have to be told
+            for assignment_id, assignee_id in assignment_dal.get_task_assignees(task_id, conn=conn):
+                task_changes.record_assignment(assignment_id, task_id, 'deleted', [assignee_id])
+                analytics.invalidate(assignee_id, conn=conn)
+
+            task_dal.delete_task(task_id, conn=conn)
+            task_board.bump_version(conn=conn)
+            task_changes.record_task(task_id, 'deleted')
+            return 'task successfully deleted'
     
     except Exception as e:
         print(f'Error deleting task: {str(e)}')
@@ -81,15 +100,22 @@ def delete_task(user_id: str, task_id: str):
 
 def delete_assignment(user_id: str, assignment_id: str):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
-
-        # Access control for coordinators only
-        if user_dal.get_user_role(user_id) != UserRole.COORDINATOR:
-            return 'user unauthorized'
-        
-        assignment_dal.delete_assignment(assignment_id)
-        return 'assignment successfully deleted'
+        with sync_db_util.transaction() as conn:
+            user = caller_context.get_caller(user_id, conn=conn)
+            if user is None:
+                return 'DNE'
+
+            # Access control for coordinators only
+            if user.role != UserRole.COORDINATOR:
+                return 'user unauthorized'
+
+            deleted = assignment_dal.delete_assignment(assignment_id, conn=conn)
+            task_board.bump_version(conn=conn)
+            if deleted is not None:
+                task_id, assignee_id = deleted
+                task_changes.record_assignment(assignment_id, task_id, 'deleted', [assignee_id])
+                analytics.invalidate(assignee_id, conn=conn)
+            return 'assignment successfully deleted'
     
     except Exception as e:
         print(f'Error deleting assignment: {str(e)}')
@@ -97,16 +123,20 @@ def delete_assignment(user_id: str, assignment_id: str):
     
 def update_task(user_id: str, updates: dict, task_id: str):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
-
-        # Access control for coordinators only
-        if user_dal.get_user_role(user_id) != UserRole.COORDINATOR:
-            return 'user unauthorized'
-        
-        updates = format_response.handleUpdates(updates)
-        task_dal.update_task(task_id, updates)
-        return 'task successfully updated'
+        with sync_db_util.transaction() as conn:
+            user = caller_context.get_caller(user_id, conn=conn)
+            if user is None:
+                return 'DNE'
+
+            # Access control for coordinators only
+            if user.role != UserRole.COORDINATOR:
+                return 'user unauthorized'
+
+            updates = format_response.handleUpdates(updates)
+            task_dal.update_task(task_id, updates, conn=conn)
+            task_board.bump_version(conn=conn)
+            task_changes.record_task(task_id, 'upserted')
+            return 'task successfully updated'
     
     except Exception as e:
         print(f'Error updating task: {str(e)}')
@@ -114,26 +144,35 @@ def update_task(user_id: str, updates: dict, task_id: str):
 
 def update_assignment(user_id: str, assignee_id: str, assignment_id: str):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
-
-        # Access control for coordinators only
-        if user_dal.get_user_role(user_id) != UserRole.COORDINATOR:
-            return 'user unauthorized'
-
-        if not user_dal.check_user_exists_by_id(assignee_id):
-            return 'task doer does not exist'
-
-        assignment = assignment_dal.get_assignment_by_id(assignment_id)
-        if assignment_dal.check_assignment_exists(assignment.task_id, assignee_id):
-            return 'assignment already exists'
-        
-        task = task_dal.get_task_by_id(assignment.task_id)
-        if not assignment_dal.check_user_free_at_time(assignee_id, task.start_time, task.end_time):
-            return 'assignee not free'
-        
-        assignment_dal.update_assignment(assignment_id, assignee_id)
-        return 'assignment successfully updated'
+        # Run every check and the update on one connection in one transaction
+        with sync_db_util.transaction() as conn:
+            user = caller_context.get_caller(user_id, conn=conn)
+            if user is None:
+                return 'DNE'
+
+            # Access control for coordinators only
+            if user.role != UserRole.COORDINATOR:
+                return 'user unauthorized'
+
+            if not user_dal.check_user_exists_by_id(assignee_id, conn=conn):
+                return 'task doer does not exist'
+
+            assignment = assignment_dal.get_assignment_by_id(assignment_id, conn=conn)
+            start_time, end_time, max_participants, already_assigned, overlap_count, assignment_count = assignment_dal.get_assignment_eligibility(assignment.task_id, assignee_id, conn=conn)
+
+            if already_assigned:
+                return 'assignment already exists'
+
+            if overlap_count > 0:
+                return 'assignee not free'
+
+            assignment_dal.update_assignment(assignment_id, assignee_id, conn=conn)
+            task_board.bump_version(conn=conn)
+            task_changes.record_assignment(assignment_id, assignment.task_id, 'upserted', [assignment.user_id, assignee_id])
+            recommendation_engine.record_assignment(assignment_id, conn=conn)
+            analytics.invalidate(assignment.user_id, conn=conn)
+            analytics.invalidate(assignee_id, conn=conn)
+            return 'assignment successfully updated'
     
     except Exception as e:
         print(f'Error updating assignment: {str(e)}')
@@ -143,12 +182,13 @@ def get_all_users(user_id):
     results = {'message': None, 'user_list': None}
 
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
+        user = caller_context.get_caller(user_id)
+        if user is None:
             results['message'] = 'DNE'
             return results
 
         # Access control for coordinators only
-        if user_dal.get_user_role(user_id) != UserRole.COORDINATOR:
+        if user.role != UserRole.COORDINATOR:
             results['message'] = 'user unauthorized'
             return results
         
@@ -162,21 +202,25 @@ def get_all_users(user_id):
 
 def override_status(user_id, status, assignment_id):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
+        with sync_db_util.transaction() as conn:
+            user = caller_context.get_caller(user_id, conn=conn)
+            if user is None:
+                return 'DNE'
 
-        # Access control for coordinators only
-        if user_dal.get_user_role(user_id) != UserRole.COORDINATOR:
-            return 'user unauthorized'
-        
-        assignment = assignment_dal.get_assignment_by_id(assignment_id)
-        
-        task_details = task_dal.get_task_by_id(assignment.task_id)
-        if task_details.end_time >= datetime.now():
-            return 'task not over'
+            # Access control for coordinators only
+            if user.role != UserRole.COORDINATOR:
+                return 'user unauthorized'
+
+            assignment = assignment_dal.get_assignment_by_id(assignment_id, conn=conn)
+
+            task_details = task_dal.get_task_by_id(assignment.task_id, conn=conn)
+            if task_details.end_time >= datetime.now(task_details.end_time.tzinfo):
+                return 'task not over'
 
-        assignment_dal.update_status(assignment_id, status)
-        return 'task status successfully overridden'
+            assignment_dal.update_status(assignment_id, status, conn=conn)
+            task_changes.record_status(assignment_id, assignment.task_id, assignment.user_id, status)
+            analytics.invalidate(assignment.user_id, conn=conn)
+            return 'task status successfully overridden'
     
     except Exception as e:
         print(f'Error overriding task status: {str(e)}')
@@ -184,18 +228,27 @@ def override_status(user_id, status, assignment_id):
 
 def delete_user(user_id, user_to_delete):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
-
-        # Access control for coordinators only
-        if user_dal.get_user_role(user_id) != UserRole.COORDINATOR:
-            return 'user unauthorized'
-        
-        if not user_dal.check_user_exists_by_id(user_to_delete):
-            return 'user to delete does not exist'
-        
-        user_dal.delete_user(user_to_delete)
-        return 'user deleted successfully'
+        with sync_db_util.transaction() as conn:
+            user = caller_context.get_caller(user_id, conn=conn)
+            if user is None:
+                return 'DNE'
+
+            # Access control for coordinators only
+            if user.role != UserRole.COORDINATOR:
+                return 'user unauthorized'
+
+            if not user_dal.check_user_exists_by_id(user_to_delete, conn=conn):
+                return 'user to delete does not exist'
+
+            # Their assignments go with them, so the board has to drop them too
+            for assignment_id, task_id in assignment_dal.get_user_assignment_ids(user_to_delete, conn=conn):
+                task_changes.record_assignment(assignment_id, task_id, 'deleted', [user_to_delete])
+
+            user_dal.delete_user(user_to_delete, conn=conn)
+            task_board.bump_version(conn=conn)
+            if user_to_delete == user_id:
+                caller_context.clear_caller()
+            return 'user deleted successfully'
     
     except Exception as e:
         print(f'Error deleting user: {str(e)}')
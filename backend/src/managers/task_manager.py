@@ -1,23 +1,24 @@
 from datetime import datetime
 
 from src.models.assignment_model import Status
-from src.dals import user_dal, task_dal, assignment_dal
-from src.utils import format_response
-from src.utils.recommendation import recommend_tasks_for_user
-from src.utils.analytics import calculate_task_analytics
+from src.dals import task_dal, assignment_dal
+from src.utils import format_response, caller_context, task_board, task_changes, recommendation_engine, analytics
+from src.utils.db import sync_db_util, async_db_util
+from src.managers import async_task_manager
 
 def get_all_tasks(user_id):
-    results = {'message': None, 'tasks': None, 'sorted_tasks': None}
+    results = {'message': None, 'tasks': None, 'sorted_tasks': None, 'etag': None}
 
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
+        if caller_context.get_caller(user_id) is None:
             results['message'] = 'DNE'
             return results
 
-        task_list = task_dal.get_all_tasks()
-        response = format_response.handleAllAssignments(task_list)
-        results['tasks'] = response[0]
-        results['sorted_tasks'] = response[1]
+        # Served from the in-memory snapshot, only rebuilt after a write
+        board = task_board.get_snapshot()
+        results['tasks'] = board['tasks']
+        results['sorted_tasks'] = board['sorted_tasks']
+        results['etag'] = board['etag']
         results['message'] = 'tasks successfully retrieved'
         return results
     
@@ -26,10 +27,13 @@ def get_all_tasks(user_id):
         return 'error'
 
 def get_my_pending_tasks(user_id):
+    if async_db_util.is_enabled():
+        return async_db_util.run(async_task_manager.get_my_pending_tasks(user_id))
+
     results = {'message': None, 'task_list': None}
 
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
+        if caller_context.get_caller(user_id) is None:
             results['message'] = 'DNE'
             return results
 
@@ -44,52 +48,73 @@ def get_my_pending_tasks(user_id):
     
 def update_status(user_id, status, assignment_id):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
+        with sync_db_util.transaction() as conn:
+            if caller_context.get_caller(user_id, conn=conn) is None:
+                return 'DNE'
+
+            # Ensure assignment is assigned to user
+            assignment = assignment_dal.get_assignment_by_id(assignment_id, conn=conn)
+            if assignment.user_id != user_id:
+                return 'user unauthorized'
 
-        # Ensure assignment is assigned to user
-        assignment = assignment_dal.get_assignment_by_id(assignment_id)
-        if assignment.user_id != user_id:
-            return 'user unauthorized'
+            if assignment.status != Status.PENDING:
+                return 'task not pending'
 
-        if assignment.status != Status.PENDING:
-            return 'task not pending'
-        
-        task_details = task_dal.get_task_by_id(assignment.task_id)
-        if task_details.end_time >= datetime.now():
-            return 'task not over'
+            task_details = task_dal.get_task_by_id(assignment.task_id, conn=conn)
+            if task_details.end_time >= datetime.now(task_details.end_time.tzinfo):
+                return 'task not over'
 
-        assignment_dal.update_status(assignment_id, status)
-        return 'task status successfully updated'
+            assignment_dal.update_status(assignment_id, status, conn=conn)
+            task_changes.record_status(assignment_id, assignment.task_id, user_id, status)
+            analytics.invalidate(user_id, conn=conn)
+            return 'task status successfully updated'
 
     except Exception as e:
         print(f'Error updating task status: {str(e)}')
         return 'error'
 
 def get_task_recommendations(user_id: str):
-    results = {'message': None, 'recommended_tasks': None}
+    results = {'message': None, 'recommended_tasks': None, 'computed_at': None}
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
+        if caller_context.get_caller(user_id) is None:
             results['message'] = 'DNE'
             return results
-        # Call the hybrid recommendation system
-        recommended_tasks = recommend_tasks_for_user(user_id)
+        # Precomputed by the batch job, or scored now for users it has not covered yet
+        recommended_tasks, computed_at = recommendation_engine.get_recommendations(user_id)
         results['recommended_tasks'] = recommended_tasks
+        results['computed_at'] = computed_at
         results['message'] = 'tasks successfully recommended'
         return results
     except Exception as e:
         print(f"Error fetching task recommendations: {e}")
         return 'error'
 
+def get_similar_tasks(user_id: str, task_id: int):
+    results = {'message': None, 'similar_tasks': None}
+    try:
+        if caller_context.get_caller(user_id) is None:
+            results['message'] = 'DNE'
+            return results
+        similar_tasks = recommendation_engine.similar_tasks(task_id)
+        if similar_tasks is None:
+            results['message'] = 'task DNE'
+            return results
+        results['similar_tasks'] = [{'task_id': similar_task_id, 'score': round(score, 4)} for similar_task_id, score in similar_tasks]
+        results['message'] = 'similar tasks successfully retrieved'
+        return results
+    except Exception as e:
+        print(f"Error fetching similar tasks: {e}")
+        results['message'] = 'error'
+        return results
+
 def get_task_analytics(user_id: str):
     results = {'message': None, 'analytics': None}
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
+        if caller_context.get_caller(user_id) is None:
             results['message'] = 'DNE'
             return results
-        # Call the analytics utility function
-        analytics = calculate_task_analytics(user_id)
-        results['analytics'] = analytics
+        # One aggregate query, or the cached result until the user's assignments change
+        results['analytics'] = analytics.calculate_task_analytics(user_id)
         results['message'] = 'analytics successfully retrieved'
         return results
     except Exception as e:
@@ -1,73 +1,89 @@
 from src.models.user_model import UserRole
 from src.models.assignment_model import Assignment
-from src.dals import task_dal, user_dal, assignment_dal
-from src.utils import format_response
+from src.dals import assignment_dal
+from src.utils import format_response, caller_context, task_board, task_changes, recommendation_engine, analytics
+from src.utils.db import sync_db_util, async_db_util
+from src.managers import async_task_manager
 
 def signup_task(user_id: str, task_id: str):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
+        # Run every check and the insert on one connection in one transaction
+        with sync_db_util.transaction() as conn:
+            user = caller_context.get_caller(user_id, conn=conn)
+            if user is None:
+                return 'DNE'
 
-        # Access control for users only
-        user = user_dal.get_user_by_id(user_id)
-        if user.role != UserRole.USER:
-            return 'user unauthorized'
-        
-        if assignment_dal.check_assignment_exists(task_id, user_id):
-            return 'assignment already exists'
-        
-        task = task_dal.get_task_by_id(task_id)
+            # Access control for users only
+            if user.role != UserRole.USER:
+                return 'user unauthorized'
+
+            start_time, end_time, max_participants, already_assigned, overlap_count, assignment_count = assignment_dal.get_assignment_eligibility(task_id, user_id, conn=conn)
+
+            if already_assigned:
+                return 'assignment already exists'
+
+            if overlap_count > 0:
+                return 'user not free'
+
+            if max_participants and assignment_count >= max_participants:
+                return 'maximum participants reached'
 
-        if not assignment_dal.check_user_free_at_time(user_id, task.start_time, task.end_time):
-            return 'user not free'
-        
-        if not task.max_participants or assignment_dal.get_task_assignment_count(task_id) < task.max_participants:
             assignment = Assignment(
                 task_id=task_id,
                 user_id=user_id,
                 assigned_by=user.email
             )
 
-            assignment_dal.assign_task(assignment)
+            assignment_id = assignment_dal.assign_task(assignment, conn=conn)
+            task_board.bump_version(conn=conn)
+            task_changes.record_assignment(assignment_id, task_id, 'upserted', [user_id])
+            recommendation_engine.record_assignment(assignment_id, conn=conn)
+            analytics.invalidate(user_id, conn=conn)
             return 'assignment successfully created'
-        
-        else:
-            return 'maximum participants reached'
-    
+
     except Exception as e:
         print(f'Error signing up for task: {str(e)}')
         return 'error'
     
 def drop_task(user_id: str, assignment_id: str):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
+        with sync_db_util.transaction() as conn:
+            user = caller_context.get_caller(user_id, conn=conn)
+            if user is None:
+                return 'DNE'
 
-        # Access control for users only
-        if user_dal.get_user_role(user_id) != UserRole.USER:
-            return 'user unauthorized'
-        
-        # Ensure assignment is assigned to user
-        assignment = assignment_dal.get_assignment_by_id(assignment_id)
-        if assignment.user_id != user_id:
-            return 'user unauthorized'
-        
-        assignment_dal.delete_assignment(assignment_id)
-        return 'task successfully dropped'
+            # Access control for users only
+            if user.role != UserRole.USER:
+                return 'user unauthorized'
+
+            # Ensure assignment is assigned to user
+            assignment = assignment_dal.get_assignment_by_id(assignment_id, conn=conn)
+            if assignment.user_id != user_id:
+                return 'user unauthorized'
+
+            assignment_dal.delete_assignment(assignment_id, conn=conn)
+            task_board.bump_version(conn=conn)
+            task_changes.record_assignment(assignment_id, assignment.task_id, 'deleted', [user_id])
+            analytics.invalidate(user_id, conn=conn)
+            return 'task successfully dropped'
     
     except Exception as e:
         print(f'Error dropping task: {str(e)}')
         return 'error'
     
 def get_my_tasks(user_id: str):
+    if async_db_util.is_enabled():
+        return async_db_util.run(async_task_manager.get_my_tasks(user_id))
+
     results = {'message': None, 'task_list': None}
 
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
+        user = caller_context.get_caller(user_id)
+        if user is None:
             results['message'] = 'DNE'
             return results
         # Access control for users only
-        if user_dal.get_user_role(user_id) != UserRole.USER:
+        if user.role != UserRole.USER:
             results['message'] = 'user unauthorized'
             return results
         
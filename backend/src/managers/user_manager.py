@@ -1,14 +1,20 @@
-from src.dals import user_dal
+from src.dals import user_dal, assignment_dal
+from src.utils import caller_context, task_board, task_changes
+from src.utils.db import sync_db_util, async_db_util
+from src.managers import async_task_manager
 
 def get_user_data(user_id):
+    if async_db_util.is_enabled():
+        return async_db_util.run(async_task_manager.get_user_data(user_id))
+
     results = {'message': None, 'user_data': None}
 
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
+        user_data = caller_context.get_caller(user_id)
+        if user_data is None:
             results['message'] = 'DNE'
             return results
         
-        user_data = user_dal.get_user_by_id(user_id)
         results['user_data'] = user_data.dict(exclude={"password_hash", "verified"})
         results['message'] = 'user data successfully retrieved'
         return results
@@ -19,11 +25,15 @@ def get_user_data(user_id):
 
 def update_first_name(user_id, first_name):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
-        
-        user_dal.update_user_first_name(user_id, first_name)
-        return 'first name updated successfully'
+        with sync_db_util.transaction() as conn:
+            if caller_context.get_caller(user_id, conn=conn) is None:
+                return 'DNE'
+
+            user_dal.update_user_first_name(user_id, first_name, conn=conn)
+            task_board.bump_version(conn=conn)
+            task_changes.record_user(user_id)
+            caller_context.clear_caller()
+            return 'first name updated successfully'
     
     except Exception as e:
         print(f'Error updating first name: {str(e)}')
@@ -31,11 +41,15 @@ def update_first_name(user_id, first_name):
 
 def update_last_name(user_id, last_name):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
-        
-        user_dal.update_user_last_name(user_id, last_name)
-        return 'last name updated successfully'
+        with sync_db_util.transaction() as conn:
+            if caller_context.get_caller(user_id, conn=conn) is None:
+                return 'DNE'
+
+            user_dal.update_user_last_name(user_id, last_name, conn=conn)
+            task_board.bump_version(conn=conn)
+            task_changes.record_user(user_id)
+            caller_context.clear_caller()
+            return 'last name updated successfully'
     
     except Exception as e:
         print(f'Error updating last name: {str(e)}')
@@ -43,11 +57,18 @@ def update_last_name(user_id, last_name):
 
 def delete_user(user_id):
     try:
-        if not user_dal.check_user_exists_by_id(user_id):
-            return 'DNE'
-        
-        user_dal.delete_user(user_id)
-        return 'user deleted successfully'
+        with sync_db_util.transaction() as conn:
+            if caller_context.get_caller(user_id, conn=conn) is None:
+                return 'DNE'
+
+            # Their assignments go with them, so the board has to drop them too
+            for assignment_id, task_id in assignment_dal.get_user_assignment_ids(user_id, conn=conn):
+                task_changes.record_assignment(assignment_id, task_id, 'deleted', [user_id])
+
+            user_dal.delete_user(user_id, conn=conn)
+            task_board.bump_version(conn=conn)
+            caller_context.clear_caller()
+            return 'user deleted successfully'
 
     except Exception as e:
         print(f'Error deleting user: {str(e)}')
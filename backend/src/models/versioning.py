@@ -7,11 +7,11 @@ class TaskVersion:
         """
         Creates a new version of a task by inserting it into the task_versions table.
         """
-        query = f"""
+        query = """
         INSERT INTO task_versions (task_id, version_data, created_at)
-        VALUES ('{task_id}', '{data}', '{datetime.utcnow()}');
+        VALUES (%s, %s, %s);
         """
         try:
-            execute_query_insert(query)
+            execute_query_insert(query, (task_id, str(data), datetime.utcnow()))
         except Exception as e:
             print(f"Error creating task version: {e}")
@@ -1,10 +1,46 @@
-from src.models.task_model import Task
+import os
+from dotenv import load_dotenv
+
+from src.dals import analytics_dal
+from src.utils.ttl_cache import TTLCache
+
+# Load variables from the .env file
+load_dotenv()
+
+# Set ANALYTICS_CACHE_SIZE to 0 to turn the cache off
+capacity = int(os.environ.get("ANALYTICS_CACHE_SIZE", 1024))
+# Status changes and signups invalidate right away, the TTL covers what does not, like a task moved to another start time
+ttl_seconds = float(os.environ.get("ANALYTICS_CACHE_TTL_SECONDS", 300))
+
+# user_id -> analytics
+cache = TTLCache('analytics', capacity, ttl_seconds, copy=dict)
 
 def calculate_task_analytics(user_id):
-    tasks = Task.query.filter_by(user_id=user_id).all()
-    completed_tasks = [task for task in tasks if task.status == "completed"]
-    return {
-        "total_tasks": len(tasks),
-        "completed_tasks": len(completed_tasks),
-        "completion_rate": len(completed_tasks) / len(tasks) if tasks else 0,
+    """
+    Totals, completion rate and streaks of user_id's assignments, from one
+    aggregate query or the cache.
+    """
+    cached = cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    read_generation = cache.get_generation()
+    total, completed, incompleted, pending, longest_streak, current_streak = analytics_dal.get_user_task_stats(user_id)
+    analytics = {
+        "total_tasks": total,
+        "completed_tasks": completed,
+        "incompleted_tasks": incompleted,
+        "pending_tasks": pending,
+        "completion_rate": completed / total if total else 0,
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
     }
+    cache.put(user_id, analytics, read_generation)
+    return analytics
+
+def invalidate(user_id, conn=None):
+    # Called by the managers whenever one of user_id's assignments changes
+    cache.invalidate(user_id, conn=conn)
+
+def get_stats():
+    return cache.get_stats()
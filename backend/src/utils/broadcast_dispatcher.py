@@ -0,0 +1,95 @@
+import os
+import time
+import threading
+from dotenv import load_dotenv
+
+from src.utils import task_changes
+
+# Load variables from the .env file
+load_dotenv()
+
+# Changes submitted within this window of the first one go out as a single update
+coalesce_seconds = float(os.environ.get("BROADCAST_COALESCE_MS", 50)) / 1000
+
+pending = None
+first_submitted_at = None
+condition = threading.Condition()
+worker_started = False
+
+metrics = {
+    'events_submitted': 0,
+    'events_coalesced': 0,
+    'batches_emitted': 0,
+    'emit_errors': 0,
+    'total_emit_latency_ms': 0.0,
+    'max_emit_latency_ms': 0.0,
+    'last_emit_latency_ms': 0.0,
+}
+
+def submit(changes, socketio, handle_batch):
+    """
+    Queues one request's task_changes for broadcast and returns right away.
+    handle_batch(socketio, changes) runs on the background worker once per
+    coalescing window.
+    """
+    global pending, first_submitted_at, worker_started
+
+    with condition:
+        if not worker_started:
+            socketio.start_background_task(run_worker, socketio, handle_batch)
+            worker_started = True
+
+        metrics['events_submitted'] += 1
+        if pending is None:
+            pending = task_changes.new_changes()
+            first_submitted_at = time.monotonic()
+        else:
+            metrics['events_coalesced'] += 1
+
+        task_changes.merge_changes(pending, changes)
+        condition.notify()
+
+def take_batch():
+    global pending, first_submitted_at
+    with condition:
+        while pending is None:
+            condition.wait()
+        window_ends_at = first_submitted_at + coalesce_seconds
+
+    # Let the rest of the burst arrive
+    remaining = window_ends_at - time.monotonic()
+    if remaining > 0:
+        time.sleep(remaining)
+
+    with condition:
+        batch, submitted_at = pending, first_submitted_at
+        pending = None
+        first_submitted_at = None
+    return batch, submitted_at
+
+def run_worker(socketio, handle_batch):
+    while True:
+        batch, submitted_at = take_batch()
+        try:
+            handle_batch(socketio, batch)
+        except Exception as e:
+            print(f"Error broadcasting task changes: {e}")
+            with condition:
+                metrics['emit_errors'] += 1
+            continue
+
+        # From the first change in the batch reaching the dispatcher to the emit returning
+        latency_ms = (time.monotonic() - submitted_at) * 1000
+        with condition:
+            metrics['batches_emitted'] += 1
+            metrics['total_emit_latency_ms'] += latency_ms
+            metrics['last_emit_latency_ms'] = latency_ms
+            metrics['max_emit_latency_ms'] = max(metrics['max_emit_latency_ms'], latency_ms)
+
+def get_metrics():
+    with condition:
+        result = dict(metrics)
+    batches = result['batches_emitted']
+    result['avg_emit_latency_ms'] = result['total_emit_latency_ms'] / batches if batches else 0.0
+    result['coalesce_window_ms'] = coalesce_seconds * 1000
+    return result
@@ -1,7 +1,122 @@
-from flask import current_app, jsonify
-from flask_socketio import emit
+import threading
+from flask import current_app
+
+from src.dals import task_dal, assignment_dal
+from src.utils import format_response, task_board, task_changes, broadcast_dispatcher, message_queue
+from src.utils.db import sync_db_util
+
+# Clients that keep the whole board join BOARD_ROOM, everyone is in their own user room
+# and can watch single tasks through their task rooms
+BOARD_ROOM = 'board'
+
+def user_room(user_id):
+    return f'user:{user_id}'
+
+def task_room(task_id):
+    return f'task:{task_id}'
+
+# Every tasks_delta gets the next number, a client that sees a gap asks for a full sync.
+# With a shared message queue the numbers come from Postgres, so all workers' deltas form one sequence.
+sequence = 0
+sequence_lock = threading.Lock()
+
+def next_sequence():
+    global sequence
+    if message_queue.is_shared():
+        return sync_db_util.execute_query_fetchone("SELECT nextval('tasks_delta_seq');")[0]
+
+    with sequence_lock:
+        sequence += 1
+        return sequence
+
+def get_sequence():
+    if message_queue.is_shared():
+        return sync_db_util.execute_query_fetchone('SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM tasks_delta_seq;')[0]
+    return sequence
+
+def build_tasks_delta(changes):
+    delta = {
+        'tasks': {'upserted': {}, 'deleted': []},
+        'assignments': {'upserted': [], 'deleted': []},
+    }
+
+    upserted_task_ids = [task_id for task_id, action in changes['tasks'].items() if action == 'upserted']
+    if upserted_task_ids:
+        tasks, _ = format_response.handleAllAssignments(task_dal.get_board_tasks_by_ids(upserted_task_ids))
+        delta['tasks']['upserted'] = tasks
+
+    # Tasks that were deleted, or that no longer belong on the board
+    delta['tasks']['deleted'] = [
+        task_id for task_id, action in changes['tasks'].items()
+        if action == 'deleted' or task_id not in delta['tasks']['upserted']
+    ]
+
+    upserted_assignment_ids = [assignment_id for assignment_id, (_, action) in changes['assignments'].items() if action == 'upserted']
+    if upserted_assignment_ids or changes['users']:
+        for assignment_id, task_id, user_id, first_name, last_name in assignment_dal.get_board_assignments(upserted_assignment_ids, changes['users']):
+            # Upserted tasks already carry their full users list
+            if task_id in delta['tasks']['upserted']:
+                continue
+            delta['assignments']['upserted'].append({
+                'assignment_id': assignment_id,
+                'task_id': task_id,
+                'user_id': user_id,
+                'first_name': first_name,
+                'last_name': last_name
+            })
+
+    delta['assignments']['deleted'] = [
+        {'assignment_id': str(assignment_id), 'task_id': task_id}
+        for assignment_id, (task_id, action) in changes['assignments'].items()
+        if action == 'deleted'
+    ]
+
+    return delta
+
+def build_targeted_updates(changes):
+    # (event, payload, rooms) for the users and tasks a change affects, instead of every client
+    updates = []
+
+    for task_id, action in changes['tasks'].items():
+        updates.append(('task_updated', {'task_id': task_id, 'action': action}, [task_room(task_id)]))
+
+    for assignment_id, (task_id, action) in changes['assignments'].items():
+        user_ids = sorted(changes['assignees'].get(assignment_id, ()))
+        rooms = [task_room(task_id)] + [user_room(user_id) for user_id in user_ids]
+        payload = {'assignment_id': str(assignment_id), 'task_id': task_id, 'user_ids': user_ids, 'action': action}
+        updates.append(('assignment_updated', payload, rooms))
+
+    for assignment_id, (task_id, user_id, status) in changes['statuses'].items():
+        payload = {'assignment_id': str(assignment_id), 'task_id': task_id, 'user_ids': [user_id], 'action': 'status', 'status': status}
+        updates.append(('assignment_updated', payload, [task_room(task_id), user_room(user_id)]))
+
+    return updates
+
+def broadcast_tasks_delta():
+    # Hand what the current request changed to the background dispatcher, the response does not wait for it
+    changes = task_changes.pop_changes()
+    if not changes:
+        return
 
-def broadcast_tasks_update(updated_tasks):
-    # Broadcast updated tasks to all connected clients
     socketio = current_app.extensions['socketio']
-    socketio.emit('tasks_updated', updated_tasks)
\ No newline at end of file
+    broadcast_dispatcher.submit(changes, socketio, emit_tasks_delta)
+
+def emit_tasks_delta(socketio, changes):
+    # Runs on the dispatcher with a burst of changes merged into one, so one delta goes out per window.
+    # Read from the primary, a lagging replica could miss the writes being announced.
+    if changes['tasks'] or changes['assignments'] or changes['users']:
+        with sync_db_util.use_primary():
+            delta = build_tasks_delta(changes)
+
+        delta['seq'] = next_sequence()
+        socketio.emit('tasks_delta', delta, to=BOARD_ROOM)
+
+    # A client in several of the rooms still gets each update once
+    for event, payload, rooms in build_targeted_updates(changes):
+        socketio.emit(event, payload, to=rooms)
+
+def build_full_sync():
+    # Read the sequence first, deltas are idempotent so replaying one the board already has is harmless
+    seq = get_sequence()
+    board = task_board.get_snapshot()
+    return {'seq': seq, 'tasks': board['tasks'], 'sorted_tasks': board['sorted_tasks']}
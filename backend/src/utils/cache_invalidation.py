@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import uuid
+import select
+import threading
+import psycopg2
+from dotenv import load_dotenv
+
+from src.utils.db import sync_db_util
+
+# Load variables from the .env file
+load_dotenv()
+
+# 'local' only invalidates this process, 'postgres' also tells every other worker through LISTEN/NOTIFY.
+# Workers sharing a Socket.IO message queue default to 'postgres' so they also serve the same board.
+default_backend = "postgres" if os.environ.get("SOCKETIO_MESSAGE_QUEUE") else "local"
+backend = os.environ.get("CACHE_INVALIDATION_BACKEND", default_backend).lower()
+
+NOTIFY_CHANNEL = 'psef_cache_invalidation'
+
+# Lets a worker skip the notifications it sent itself
+instance_id = uuid.uuid4().hex
+
+handlers = {}
+listener_thread = None
+listener_lock = threading.Lock()
+
+def register_handler(namespace, handler):
+    # handler(key) is called whenever key is invalidated in namespace, locally or by another worker.
+    # key is None when everything has to go, e.g. after the listener lost notifications while reconnecting.
+    handlers.setdefault(namespace, []).append(handler)
+
+def dispatch(namespace, key):
+    for handler in handlers.get(namespace, []):
+        try:
+            handler(key)
+        except Exception as e:
+            print(f"Error invalidating {namespace}:{key}: {e}")
+
+def publish(namespace, key, conn=None):
+    """
+    Invalidates key in this process and, with the postgres backend, in
+    every other worker. Given a conn, the NOTIFY is sent when that
+    transaction commits, so other workers never reload the old row.
+    """
+    dispatch(namespace, key)
+
+    if backend == 'postgres':
+        sync_db_util.execute_query_fetchone('SELECT pg_notify(%s, %s);', (NOTIFY_CHANNEL, build_payload(namespace, key)), conn=conn)
+
+def build_payload(namespace, key):
+    return json.dumps({'instance_id': instance_id, 'namespace': namespace, 'key': key})
+
+def handle_notification(payload):
+    message = json.loads(payload)
+    if message.get('instance_id') != instance_id:
+        dispatch(message['namespace'], message['key'])
+
+def listen():
+    reconnecting = False
+    while True:
+        conn = None
+        try:
+            # A dedicated connection, LISTEN has to stay open outside the pool
+            conn = psycopg2.connect(os.environ.get("DB_URL"))
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN {NOTIFY_CHANNEL};')
+
+            if reconnecting:
+                for namespace in list(handlers):
+                    dispatch(namespace, None)
+                reconnecting = False
+
+            while True:
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    handle_notification(conn.notifies.pop(0).payload)
+
+        except Exception as e:
+            print(f"Cache invalidation listener error, reconnecting: {e}")
+            reconnecting = True
+            time.sleep(1)
+        finally:
+            if conn is not None:
+                conn.close()
+
+def start_listener():
+    global listener_thread
+    if backend != 'postgres':
+        return
+
+    with listener_lock:
+        if listener_thread is None:
+            listener_thread = threading.Thread(target=listen, name="cache-invalidation-listener", daemon=True)
+            listener_thread.start()
@@ -0,0 +1,33 @@
+from flask import g, has_request_context
+
+from src.dals import user_dal
+
+# The authenticated caller is loaded once per request and shared by every manager
+
+def get_caller(user_id, conn=None):
+    """
+    Returns the User for user_id, or None if the account no longer exists.
+    Inside a request the row is only read once, later calls reuse it.
+    """
+    if has_request_context():
+        caller = g.get('caller')
+        if caller is not None and caller['user_id'] == user_id:
+            return caller['user']
+
+    user = user_dal.find_user_by_id(user_id, conn=conn)
+
+    if has_request_context():
+        g.caller = {'user_id': user_id, 'user': user}
+
+    return user
+
+def clear_caller():
+    # Call after changing or deleting the caller's own row
+    if has_request_context():
+        g.pop('caller', None)
+
+def load_caller(jwt_header, jwt_data):
+    # Registered as the JWT user lookup, so it runs once in jwt_required.
+    # Wrapped in a dict so a deleted account still reaches the managers, which answer 'DNE'.
+    user_id = jwt_data['sub']
+    return {'user_id': user_id, 'user': get_caller(user_id)}
@@ -0,0 +1,164 @@
+import threading
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from src.dals import task_dal
+from src.utils import cache_invalidation
+from src.utils.recommendation_engine import run_cpu_bound
+from src.utils.db import sync_db_util
+
+# Terms are hashed, so there is no vocabulary to refit when tasks come and go
+N_FEATURES = 2 ** 18
+vectorizer = HashingVectorizer(n_features=N_FEATURES, alternate_sign=False, norm=None)
+
+# task_id -> (hashed term indices, their counts, start timestamp)
+documents = {}
+# Number of indexed tasks containing each term, kept in step with documents for the IDF
+document_frequency = np.zeros(N_FEATURES, dtype=np.int32)
+
+# Where task text is read from, benchmarks swap in synthetic data
+get_task_content = task_dal.get_task_content
+
+loaded = False
+stale_task_ids = set()
+# Guards loaded and stale_task_ids, only ever held for a moment
+stale_lock = threading.Lock()
+# Guards documents and snapshot. Held by the calling thread while run_cpu_bound does the work,
+# which takes no locks itself, a patched lock contended from real threads deadlocks.
+index_lock = threading.Lock()
+
+# TF-IDF rows of every indexed task, rebuilt from documents on the first query after a change
+snapshot = None
+
+stats = {'full_loads': 0, 'tasks_refreshed': 0, 'snapshot_builds': 0}
+
+def mark_stale(key):
+    # cache_invalidation handler, key None means the notifications were lost and everything is reloaded
+    global loaded
+    with stale_lock:
+        if key is None:
+            loaded = False
+        else:
+            stale_task_ids.add(int(key))
+
+def task_text(task_name, task_type, description):
+    return f"{task_name} {task_type} {description}"
+
+def add_documents(rows):
+    # rows are (task_id, task_name, task_type, description, start_time)
+    counts = vectorizer.transform([task_text(*row[1:4]) for row in rows])
+    for position, row in enumerate(rows):
+        start, end = counts.indptr[position], counts.indptr[position + 1]
+        indices = counts.indices[start:end].copy()
+        documents[row[0]] = (indices, counts.data[start:end].copy(), row[4].timestamp())
+        document_frequency[indices] += 1
+
+def remove_document(task_id):
+    document = documents.pop(task_id, None)
+    if document is not None:
+        document_frequency[document[0]] -= 1
+
+def apply_changes(rows, task_ids):
+    # CPU only, the caller holds index_lock. task_ids None replaces every document.
+    if task_ids is None:
+        documents.clear()
+        document_frequency[:] = 0
+        stats['full_loads'] += 1
+    else:
+        # Deleted tasks are not in rows and simply stay removed
+        for task_id in task_ids:
+            remove_document(task_id)
+        stats['tasks_refreshed'] += len(task_ids)
+
+    if rows:
+        add_documents(rows)
+
+def refresh():
+    """
+    Brings the index up to date, a full load the first time and afterwards
+    only the tasks that were created, updated or deleted since.
+    """
+    global loaded, snapshot
+    with index_lock:
+        with stale_lock:
+            if loaded and not stale_task_ids:
+                return
+            task_ids = list(stale_task_ids) if loaded else None
+            stale_task_ids.clear()
+            loaded = True
+
+        try:
+            # Read from the primary, a lagging replica would keep the old row until the next change
+            with sync_db_util.use_primary():
+                rows = get_task_content() if task_ids is None else get_task_content(task_ids)
+        except Exception:
+            # Put the changes back for the next refresh
+            with stale_lock:
+                if task_ids is None:
+                    loaded = False
+                else:
+                    stale_task_ids.update(task_ids)
+            raise
+
+        # Hashing the text is most of the time, 0.8 s for a full load of 20k tasks
+        run_cpu_bound(apply_changes, rows, task_ids)
+        snapshot = None
+
+def build_snapshot():
+    # CPU only, the caller holds index_lock
+    items = list(documents.items())
+    task_ids = np.array([task_id for task_id, _ in items], dtype=np.int64)
+    start_times = np.array([document[2] for _, document in items], dtype=np.float64)
+    indptr = np.zeros(len(items) + 1, dtype=np.int64)
+    np.cumsum([len(document[0]) for _, document in items], out=indptr[1:])
+    indices = np.concatenate([document[0] for _, document in items]) if items else np.array([], dtype=np.int32)
+    data = np.concatenate([document[1] for _, document in items]) if items else np.array([], dtype=np.float64)
+
+    # Smooth IDF as TfidfVectorizer computes it, rows L2 normalised so dot products are cosine similarities
+    idf = np.log((1 + len(items)) / (1 + document_frequency)) + 1
+    matrix = sparse.csr_matrix((data * idf[indices], indices, indptr), shape=(len(items), N_FEATURES))
+    matrix = normalize(matrix, copy=False)
+
+    order = np.argsort(task_ids)
+    stats['snapshot_builds'] += 1
+    return {
+        'task_ids': task_ids,
+        'start_times': start_times,
+        'positions': {int(task_id): position for position, task_id in enumerate(task_ids)},
+        # For looking up many tasks at once with searchsorted
+        'sorted_task_ids': task_ids[order],
+        'sorted_start_times': start_times[order],
+        'matrix': matrix,
+    }
+
+def get_snapshot():
+    global snapshot
+    current = snapshot
+    if current is not None and loaded and not stale_task_ids:
+        # Nothing changed since it was built
+        return current
+
+    refresh()
+    with index_lock:
+        if snapshot is None:
+            snapshot = run_cpu_bound(build_snapshot)
+        return snapshot
+
+def lookup_start_times(current, task_ids):
+    # Start timestamps of task_ids in one snapshot, NaN for the tasks it does not have
+    start_times = np.full(len(task_ids), np.nan)
+    sorted_task_ids = current['sorted_task_ids']
+    if len(sorted_task_ids):
+        found = np.minimum(np.searchsorted(sorted_task_ids, task_ids), len(sorted_task_ids) - 1)
+        known = sorted_task_ids[found] == task_ids
+        start_times[known] = current['sorted_start_times'][found[known]]
+    return start_times
+
+def get_stats():
+    # Not under index_lock, which is held for the whole of a load
+    with stale_lock:
+        return dict(stats, tasks=len(documents), stale_tasks=len(stale_task_ids), loaded=loaded)
+
+cache_invalidation.register_handler('task_content', mark_stale)
@@ -1,18 +1,8 @@
-import os
-import asyncpg
-from dotenv import load_dotenv
-
-load_dotenv()
+from src.utils.db import async_db_util
 
 async def get_db_info():
-    # Get the connection string from the environment variable
-    connection_string = os.environ.get("DB_URL")
-
-    if not connection_string:
-        raise ValueError("DB_URL environment variable not set")
-
-    # Create a connection pool
-    pool = await asyncpg.create_pool(connection_string)
+    # Borrow a connection from the long-lived pool instead of building one per call
+    pool = await async_db_util.get_pool()
 
     # Acquire a connection from the pool
     async with pool.acquire() as conn:
@@ -20,9 +10,6 @@ async def get_db_info():
         current_time = await conn.fetchval('SELECT NOW();')
         postgres_version = await conn.fetchval('SELECT version();')
 
-    # Close the pool
-    await pool.close()
-
     return {
         'current_time': current_time,
         'postgres_version': postgres_version
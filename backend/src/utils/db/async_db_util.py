@@ -0,0 +1,124 @@
+import os
+import json
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+import asyncpg
+from dotenv import load_dotenv
+
+# Load variables from the .env file
+load_dotenv()
+
+# The pool and the event loop it belongs to live for the whole process
+connection_pool = None
+event_loop = None
+loop_thread = None
+loop_lock = threading.Lock()
+pool_lock = None
+
+def is_enabled():
+    # The async data layer backs the request path when the app is served with SERVER_MODE=async
+    return os.environ.get("SERVER_MODE", "eventlet").lower() == "async"
+
+def get_loop():
+    """
+    Start (once) the event loop thread that owns the asyncpg pool.
+    asyncpg pools are bound to the loop that created them, so every
+    coroutine has to run on this loop.
+    """
+    global event_loop, loop_thread
+    if event_loop is None:
+        with loop_lock:
+            if event_loop is None:
+                loop = asyncio.new_event_loop()
+                loop_thread = threading.Thread(target=loop.run_forever, name="async-db-loop", daemon=True)
+                loop_thread.start()
+                event_loop = loop
+    return event_loop
+
+def run(coro, timeout=None):
+    # Run a coroutine on the db loop from synchronous code (e.g. a Flask view) and wait for it
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    return future.result(timeout)
+
+async def init_connection(conn):
+    # Decode json columns like psycopg2 does, so both data layers return the same rows
+    await conn.set_type_codec('json', encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+async def init_db_pool():
+    global connection_pool
+    # Get the connection string from the environment variable
+    connection_string = os.environ.get("DB_URL")
+
+    if not connection_string:
+        raise ValueError("DB_URL environment variable not set")
+
+    # Create a connection pool
+    connection_pool = await asyncpg.create_pool(
+        connection_string,
+        min_size=int(os.environ.get("DB_ASYNC_POOL_MIN_SIZE", 1)),
+        max_size=int(os.environ.get("DB_ASYNC_POOL_MAX_SIZE", 10)),
+        statement_cache_size=int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 128)),
+        init=init_connection,
+    )
+    print("Async connection pool created successfully")
+
+async def get_pool():
+    global pool_lock
+    if connection_pool is None:
+        # Coroutines waiting on the first pool creation must not each build one
+        if pool_lock is None:
+            pool_lock = asyncio.Lock()
+        async with pool_lock:
+            if connection_pool is None:
+                await init_db_pool()
+    return connection_pool
+
+@asynccontextmanager
+async def checkout(conn=None):
+    # Reuse the caller's transaction, otherwise borrow a connection for one statement
+    if conn is not None:
+        yield conn
+    else:
+        pool = await get_pool()
+        async with pool.acquire() as own_conn:
+            yield own_conn
+
+@asynccontextmanager
+async def transaction():
+    # Unit of work: run a whole operation on one connection in one transaction
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            yield conn
+
+# asyncpg uses $1, $2, ... placeholders and prepares every statement itself
+async def fetch(query, *args, conn=None):
+    async with checkout(conn) as active_conn:
+        return await active_conn.fetch(query, *args)
+
+async def fetchrow(query, *args, conn=None):
+    async with checkout(conn) as active_conn:
+        return await active_conn.fetchrow(query, *args)
+
+async def fetchval(query, *args, conn=None):
+    async with checkout(conn) as active_conn:
+        return await active_conn.fetchval(query, *args)
+
+async def execute(query, *args, conn=None):
+    async with checkout(conn) as active_conn:
+        return await active_conn.execute(query, *args)
+
+async def close_pool():
+    global connection_pool
+    if connection_pool is not None:
+        await connection_pool.close()
+        connection_pool = None
+
+# Close the pool and stop the loop when the application exits
+def close_all_connections():
+    if event_loop is None:
+        return
+    print("Closing all async database connections in the pool")
+    run(close_pool(), timeout=10)
+    event_loop.call_soon_threadsafe(event_loop.stop)
@@ -0,0 +1,210 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+
+class PoolTimeoutError(Exception):
+    """
+    Raised when no connection becomes available before the acquire timeout.
+    """
+
+
+class PooledConnection(extensions.connection):
+    """
+    psycopg2 connection that carries the bookkeeping the pool needs.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class ConnectionPool:
+    """
+    Thread- and greenlet-safe connection pool.
+
+    Keeps up to max_size idle connections around and can open max_overflow
+    extra connections under load, which are closed again when returned.
+    Callers wait up to timeout seconds for a free connection before a
+    PoolTimeoutError is raised.
+    """
+    def __init__(self, dsn, min_size=1, max_size=10, max_overflow=5, timeout=30.0,
+                 recycle_seconds=1800.0, pre_ping=True, pre_ping_after_seconds=10.0):
+        if min_size > max_size:
+            raise ValueError("min_size cannot be larger than max_size")
+
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle_seconds = recycle_seconds
+        self.pre_ping = pre_ping
+        self.pre_ping_after_seconds = pre_ping_after_seconds
+
+        # threading primitives are green-aware once eventlet has monkey patched them
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._opened = 0
+        self._closed = False
+
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'waits': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'connections_created': 0,
+            'connections_recycled': 0,
+            'ping_failures': 0,
+            'connections_discarded': 0,
+        }
+
+        for _ in range(min_size):
+            self._idle.append(self._open_connection())
+            self._opened += 1
+
+    def _increment(self, counter):
+        with self._condition:
+            self._stats[counter] += 1
+
+    def _open_connection(self):
+        conn = psycopg2.connect(self.dsn, connection_factory=PooledConnection)
+        self._increment('connections_created')
+        return conn
+
+    def _close_connection(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_stale(self, conn):
+        if conn.closed:
+            return True
+
+        now = time.monotonic()
+        if self.recycle_seconds and now - conn.created_at > self.recycle_seconds:
+            self._increment('connections_recycled')
+            return True
+
+        if self.pre_ping and now - conn.last_used_at > self.pre_ping_after_seconds:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute('SELECT 1;')
+                conn.rollback()
+            except Exception:
+                self._increment('ping_failures')
+                return True
+
+        return False
+
+    def getconn(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        wait_started = None
+        conn = None
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+
+                if self._opened < self.max_size + self.max_overflow:
+                    # Reserve the slot now and open the connection outside the lock
+                    self._opened += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(f"Timed out after {timeout}s waiting for a database connection")
+
+                if wait_started is None:
+                    wait_started = time.monotonic()
+                    self._stats['waits'] += 1
+                self._condition.wait(remaining)
+
+            if wait_started is not None:
+                waited = time.monotonic() - wait_started
+                self._stats['total_wait_seconds'] += waited
+                self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+            self._stats['checkouts'] += 1
+
+        try:
+            if conn is not None and self._is_stale(conn):
+                self._close_connection(conn)
+                conn = None
+
+            if conn is None:
+                conn = self._open_connection()
+        except Exception:
+            # Give the reserved slot back so waiters are not starved
+            with self._condition:
+                self._opened -= 1
+                self._condition.notify()
+            raise
+
+        return conn
+
+    def putconn(self, conn, discard=False):
+        if not discard and not conn.closed:
+            try:
+                # Never hand out a connection with a transaction left open
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._condition:
+            if discard or conn.closed or self._closed or len(self._idle) >= self.max_size:
+                if discard or conn.closed:
+                    self._stats['connections_discarded'] += 1
+                self._close_connection(conn)
+                self._opened -= 1
+            else:
+                conn.last_used_at = time.monotonic()
+                self._idle.append(conn)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        except BaseException:
+            # Timeouts and greenlet kills included, the slot is returned below either way
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            self.putconn(conn)
+
+    def stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._opened - len(self._idle)
+            stats['opened'] = self._opened
+            stats['max_size'] = self.max_size
+            stats['max_overflow'] = self.max_overflow
+            return stats
+
+    def closeall(self):
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._close_connection(self._idle.pop())
+                self._opened -= 1
+            self._condition.notify_all()
@@ -0,0 +1,119 @@
+"""
+Runs the DAL queries under EXPLAIN and fails if any of them still needs a
+sequential scan on one of the large tables.
+
+enable_seqscan is turned off so the planner only picks a seq scan when no
+index can serve the query, which makes the check meaningful on a small dev
+database too. Everything runs in one transaction that is rolled back.
+
+Usage (from the backend directory, after python -m src.utils.db.migrate):
+    python -m src.utils.db.explain_check
+"""
+import json
+import sys
+
+from src.utils.db import sync_db_util
+from src.dals import user_dal, task_dal, assignment_dal, recommendation_dal, analytics_dal
+
+LARGE_TABLES = ('users', 'tasks', 'assignments')
+
+def get_sample_ids(conn):
+    with conn.cursor() as cur:
+        cur.execute('SELECT user_id, email FROM users LIMIT 1;')
+        user = cur.fetchone() or ('', '')
+        cur.execute('SELECT task_id, start_time, end_time FROM tasks LIMIT 1;')
+        task = cur.fetchone() or (0, None, None)
+        cur.execute('SELECT assignment_id FROM assignments LIMIT 1;')
+        assignment = cur.fetchone() or (0,)
+
+    return {
+        'user_id': user[0],
+        'email': user[1],
+        'task_id': task[0],
+        'start_time': task[1],
+        'end_time': task[2],
+        'assignment_id': assignment[0],
+    }
+
+def get_checked_calls(ids):
+    # (label, call, tables a full scan is expected on)
+    return [
+        ('user_dal.find_user_by_id', lambda conn: user_dal.find_user_by_id(ids['user_id'], conn=conn), ()),
+        ('user_dal.get_user_by_email', lambda conn: user_dal.get_user_by_email(ids['email'], conn=conn), ()),
+        ('user_dal.check_user_exists_by_id', lambda conn: user_dal.check_user_exists_by_id(ids['user_id'], conn=conn), ()),
+        ('user_dal.check_user_exists_by_email', lambda conn: user_dal.check_user_exists_by_email(ids['email'], conn=conn), ()),
+        ('user_dal.get_user_role', lambda conn: user_dal.get_user_role(ids['user_id'], conn=conn), ()),
+        ('user_dal.get_all_users', lambda conn: user_dal.get_all_users(conn=conn), ('users',)),
+        ('task_dal.get_task_by_id', lambda conn: task_dal.get_task_by_id(ids['task_id'], conn=conn), ()),
+        ('task_dal.get_all_tasks', lambda conn: task_dal.get_all_tasks(conn=conn), ()),
+        ('task_dal.get_task_metadata', lambda conn: task_dal.get_task_metadata(conn=conn), ()),
+        ('task_dal.get_task_content', lambda conn: task_dal.get_task_content([ids['task_id']], conn=conn), ()),
+        ('task_dal.get_task_content (all)', lambda conn: task_dal.get_task_content(conn=conn), ('tasks',)),
+        ('assignment_dal.get_assignment_by_id', lambda conn: assignment_dal.get_assignment_by_id(ids['assignment_id'], conn=conn), ()),
+        ('assignment_dal.get_task_assignment_count', lambda conn: assignment_dal.get_task_assignment_count(ids['task_id'], conn=conn), ()),
+        ('assignment_dal.get_my_assignments', lambda conn: assignment_dal.get_my_assignments(ids['user_id'], conn=conn), ()),
+        ('assignment_dal.get_my_pending_assignments', lambda conn: assignment_dal.get_my_pending_assignments(ids['user_id'], conn=conn), ()),
+        ('assignment_dal.check_assignment_exists', lambda conn: assignment_dal.check_assignment_exists(ids['task_id'], ids['user_id'], conn=conn), ()),
+        ('assignment_dal.check_user_free_at_time', lambda conn: assignment_dal.check_user_free_at_time(ids['user_id'], ids['start_time'], ids['end_time'], conn=conn), ()),
+        ('assignment_dal.get_assignment_eligibility', lambda conn: assignment_dal.get_assignment_eligibility(ids['task_id'], ids['user_id'], conn=conn), ()),
+        ('assignment_dal.get_user_task_interactions', lambda conn: assignment_dal.get_user_task_interactions(ids['user_id'], conn=conn), ()),
+        ('recommendation_dal.get_user_recommendations', lambda conn: recommendation_dal.get_user_recommendations(ids['user_id'], conn=conn), ()),
+        ('recommendation_dal.get_unavailable_tasks', lambda conn: recommendation_dal.get_unavailable_tasks(ids['user_id'], conn=conn), ()),
+        ('analytics_dal.get_user_task_stats', lambda conn: analytics_dal.get_user_task_stats(ids['user_id'], conn=conn), ()),
+        ('assignment_dal.get_user_task_interactions (all)', lambda conn: assignment_dal.get_user_task_interactions(conn=conn), ('assignments',)),
+    ]
+
+def find_seq_scans(plan):
+    scans = []
+    if plan.get('Node Type') == 'Seq Scan':
+        scans.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        scans.extend(find_seq_scans(child))
+    return scans
+
+def check_queries():
+    failures = []
+    original_run_statement = sync_db_util.run_statement
+
+    with sync_db_util.connection() as conn:
+        ids = get_sample_ids(conn)
+        with conn.cursor() as cur:
+            cur.execute('SET LOCAL enable_seqscan = off;')
+
+        for label, call, allowed_tables in get_checked_calls(ids):
+            plans = []
+
+            def explain_then_run(cur, query, params=None):
+                cur.execute('EXPLAIN (FORMAT JSON) ' + query, params)
+                plans.append(cur.fetchone()[0][0]['Plan'])
+                original_run_statement(cur, query, params)
+
+            sync_db_util.run_statement = explain_then_run
+            try:
+                call(conn)
+            except (TypeError, ValueError):
+                # Lookups that unpack a missing row fail after the plan was captured
+                pass
+            finally:
+                sync_db_util.run_statement = original_run_statement
+
+            seq_scans = [table for plan in plans for table in find_seq_scans(plan)
+                         if table in LARGE_TABLES and table not in allowed_tables]
+            status = 'FAIL' if seq_scans else 'ok'
+            print(f"{status:4} {label}" + (f" (seq scan on {', '.join(seq_scans)})" if seq_scans else ''))
+            if seq_scans:
+                failures.append({'query': label, 'seq_scans': seq_scans})
+
+        conn.rollback()
+
+    return failures
+
+if __name__ == "__main__":
+    try:
+        failures = check_queries()
+    finally:
+        sync_db_util.close_all_connections()
+
+    if failures:
+        print(json.dumps(failures, indent=2))
+        sys.exit(1)
@@ -0,0 +1,53 @@
+import os
+from psycopg2 import extensions, OperationalError
+from dotenv import load_dotenv
+
+# Load variables from the .env file
+load_dotenv()
+
+# Tracks whether the cooperative wait callback has been installed
+green_mode_enabled = False
+
+def is_green_mode_requested():
+    # Green mode is on by default since run.py serves through eventlet unless SERVER_MODE=async
+    default = "false" if os.environ.get("SERVER_MODE", "eventlet").lower() == "async" else "true"
+    return os.environ.get("DB_GREEN_MODE", default).lower() in ("1", "true", "yes", "on")
+
+def eventlet_wait_callback(conn, timeout=-1):
+    """
+    Wait callback for psycopg2 that yields to the eventlet hub while the
+    connection waits on the socket instead of blocking inside libpq.
+    """
+    from eventlet.hubs import trampoline
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise OperationalError(f"Bad result from poll: {state}")
+
+def enable_green_mode():
+    global green_mode_enabled
+    if green_mode_enabled:
+        return
+
+    # Must run before any connection is opened, connections created earlier keep blocking
+    extensions.set_wait_callback(eventlet_wait_callback)
+    green_mode_enabled = True
+    print("Green database mode enabled")
+
+def disable_green_mode():
+    global green_mode_enabled
+    extensions.set_wait_callback(None)
+    green_mode_enabled = False
+
+def configure_green_mode():
+    if is_green_mode_requested():
+        enable_green_mode()
+    else:
+        disable_green_mode()
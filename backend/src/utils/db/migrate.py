@@ -0,0 +1,137 @@
+"""
+Versioned schema migrations.
+
+Migrations are the NNNN_name.sql files in src/utils/db/migrations, applied
+in version order and recorded in the schema_migrations table. A file whose
+first line is "-- migrate: no-transaction" runs in autocommit one statement
+at a time, which CREATE INDEX CONCURRENTLY requires.
+
+Usage (from the backend directory):
+    python -m src.utils.db.migrate
+    python -m src.utils.db.migrate --list
+"""
+import os
+import re
+import sys
+
+from src.utils.db import sync_db_util
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_(\w+)\.sql$')
+NO_TRANSACTION_MARKER = '-- migrate: no-transaction'
+
+# Keeps two processes from migrating the same database at once
+MIGRATION_LOCK_ID = 7427001
+
+def get_migrations():
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+
+        with open(os.path.join(MIGRATIONS_DIR, filename)) as f:
+            sql = f.read()
+
+        migrations.append({
+            'version': int(match.group(1)),
+            'name': match.group(2),
+            'sql': sql,
+            'transactional': not sql.lstrip().startswith(NO_TRANSACTION_MARKER),
+        })
+
+    versions = [migration['version'] for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Duplicate migration versions in " + MIGRATIONS_DIR)
+
+    return migrations
+
+def split_statements(sql):
+    # Only used for no-transaction migrations, which hold plain statements without $$ bodies
+    statements = []
+    for statement in sql.split(';'):
+        lines = [line for line in statement.splitlines() if line.strip() and not line.strip().startswith('--')]
+        if lines:
+            statements.append('\n'.join(lines))
+    return statements
+
+def ensure_migrations_table(cur):
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    );
+    ''')
+
+def get_applied_versions(cur):
+    cur.execute('SELECT version FROM schema_migrations;')
+    return {row[0] for row in cur.fetchall()}
+
+def record_migration(cur, migration):
+    cur.execute('INSERT INTO schema_migrations (version, name) VALUES (%s, %s);', (migration['version'], migration['name']))
+
+def apply_migration(conn, migration):
+    with conn.cursor() as cur:
+        if migration['transactional']:
+            cur.execute(migration['sql'])
+            record_migration(cur, migration)
+            conn.commit()
+            return
+
+        # Each statement commits on its own, so the version is only recorded once all of them succeed.
+        # A failed CREATE INDEX CONCURRENTLY leaves an INVALID index that must be dropped before rerunning.
+        conn.autocommit = True
+        try:
+            for statement in split_statements(migration['sql']):
+                cur.execute(statement)
+            record_migration(cur, migration)
+        finally:
+            conn.autocommit = False
+
+def migrate():
+    applied = []
+
+    with sync_db_util.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT pg_advisory_lock(%s);', (MIGRATION_LOCK_ID,))
+        try:
+            with conn.cursor() as cur:
+                ensure_migrations_table(cur)
+                applied_versions = get_applied_versions(cur)
+            conn.commit()
+
+            for migration in get_migrations():
+                if migration['version'] in applied_versions:
+                    continue
+
+                print(f"Applying migration {migration['version']:04d}_{migration['name']}")
+                apply_migration(conn, migration)
+                applied.append(migration['version'])
+        finally:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute('SELECT pg_advisory_unlock(%s);', (MIGRATION_LOCK_ID,))
+            conn.commit()
+
+    return applied
+
+def list_migrations():
+    with sync_db_util.transaction() as conn:
+        with conn.cursor() as cur:
+            ensure_migrations_table(cur)
+            applied_versions = get_applied_versions(cur)
+
+    for migration in get_migrations():
+        state = 'applied' if migration['version'] in applied_versions else 'pending'
+        print(f"{migration['version']:04d}_{migration['name']}: {state}")
+
+if __name__ == "__main__":
+    try:
+        if '--list' in sys.argv[1:]:
+            list_migrations()
+        else:
+            applied = migrate()
+            print(f"Applied {len(applied)} migration(s)")
+    finally:
+        sync_db_util.close_all_connections()
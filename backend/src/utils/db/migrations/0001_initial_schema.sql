@@ -0,0 +1,58 @@
+-- Schema previously created by the one-off functions in sql_commands.py.
+-- Everything is guarded so databases created that way adopt this as their first version.
+
+DO $$ BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'task_status') THEN
+        CREATE TYPE task_status AS ENUM ('Pending', 'Completed', 'Incompleted');
+    END IF;
+END $$;
+
+DO $$ BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'user_roles') THEN
+        CREATE TYPE user_roles AS ENUM ('User', 'Coordinator');
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS users (
+user_id VARCHAR(100) NOT NULL,
+email VARCHAR(320) NOT NULL,
+password_hash VARCHAR(255) NOT NULL,
+created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+first_name VARCHAR(100) NOT NULL,
+last_name VARCHAR(100) NOT NULL,
+verified BOOLEAN DEFAULT FALSE,
+role user_roles DEFAULT 'User' NOT NULL,
+PRIMARY KEY (user_id),
+UNIQUE (email)
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+task_id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+task_name VARCHAR(100) NOT NULL,
+task_type VARCHAR(100) NOT NULL,
+description VARCHAR(320) NOT NULL,
+start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+end_time TIMESTAMP WITH TIME ZONE NOT NULL,
+max_participants INT,
+created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS assignments (
+assignment_id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+task_id INT NOT NULL,
+user_id VARCHAR(100) NOT NULL,
+assigned_by VARCHAR(320) NOT NULL,
+status task_status DEFAULT 'Pending' NOT NULL,
+updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+FOREIGN KEY (task_id) REFERENCES tasks(task_id) ON DELETE CASCADE,
+FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS task_versions (
+version_id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+task_id INT NOT NULL,
+version_data TEXT NOT NULL,
+created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,12 @@
+-- migrate: no-transaction
+-- Indexes for the DAL hot paths, built without locking writes on live tables.
+-- users.email lookups already use the index behind UNIQUE (email).
+
+-- get_my_assignments, get_my_pending_assignments, check_user_free_at_time, get_user_task_interactions
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_assignments_user_id_status ON assignments (user_id, status);
+
+-- get_all_tasks join, get_task_assignment_count, check_assignment_exists, get_assignment_eligibility
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_assignments_task_id_user_id ON assignments (task_id, user_id);
+
+-- Upcoming task filters in get_all_tasks and get_task_metadata
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_start_time ON tasks (start_time);
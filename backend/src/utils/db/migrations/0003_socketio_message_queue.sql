@@ -0,0 +1,13 @@
+-- Shared state for running several Socket.IO workers with SOCKETIO_MESSAGE_QUEUE=postgres.
+
+-- tasks_delta sequence numbers, shared so every worker's clients see one ordering
+CREATE SEQUENCE IF NOT EXISTS tasks_delta_seq;
+
+-- Messages too large for a NOTIFY payload are stored here and only their id is sent
+CREATE TABLE IF NOT EXISTS socketio_messages (
+    message_id BIGSERIAL PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_socketio_messages_created_at ON socketio_messages (created_at);
@@ -0,0 +1,8 @@
+-- Top-k task recommendations per user, written by the batch scoring job in recommendation_store.
+-- One row per user with the task ids in rank order, so serving a user is a primary key lookup.
+CREATE TABLE IF NOT EXISTS user_recommendations (
+    user_id VARCHAR(100) PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    task_ids INT[] NOT NULL,
+    scores REAL[] NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL
+);
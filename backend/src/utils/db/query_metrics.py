@@ -0,0 +1,49 @@
+import os
+import re
+import logging
+import threading
+from dotenv import load_dotenv
+
+# Load variables from the .env file
+load_dotenv()
+
+# Statements slower than this many milliseconds go to the slow-query log
+slow_query_ms = float(os.environ.get("DB_SLOW_QUERY_MS", 200))
+
+logger = logging.getLogger("slow_query_logger")
+handler = logging.FileHandler(os.environ.get("DB_SLOW_QUERY_LOG", "slow_query.log"))
+formatter = logging.Formatter("%(asctime)s - %(duration_ms).1f ms - %(statement)s")
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+# Counters for the current request (green thread under eventlet)
+request_stats = threading.local()
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+STRING_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+def normalize_statement(query):
+    # One line per statement shape, with any inlined literals replaced by ?
+    statement = STRING_LITERAL_PATTERN.sub('?', query)
+    statement = NUMBER_LITERAL_PATTERN.sub('?', statement)
+    return WHITESPACE_PATTERN.sub(' ', statement).strip()
+
+def reset_request_stats():
+    request_stats.query_count = 0
+    request_stats.db_time_ms = 0.0
+
+def get_request_stats():
+    return {
+        'query_count': getattr(request_stats, 'query_count', 0),
+        'db_time_ms': round(getattr(request_stats, 'db_time_ms', 0.0), 2),
+    }
+
+def record_query(query, duration_seconds):
+    duration_ms = duration_seconds * 1000
+    request_stats.query_count = getattr(request_stats, 'query_count', 0) + 1
+    request_stats.db_time_ms = getattr(request_stats, 'db_time_ms', 0.0) + duration_ms
+
+    if duration_ms >= slow_query_ms:
+        logger.info("", extra={"duration_ms": duration_ms, "statement": normalize_statement(query)})
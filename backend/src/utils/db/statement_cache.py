@@ -0,0 +1,100 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Only these statements can be used with PREPARE
+PREPARABLE_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'VALUES')
+
+# Counters shared by every connection's cache
+stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+stats_lock = threading.Lock()
+
+def is_preparable(query):
+    words = query.lstrip().split(None, 1)
+    return bool(words) and words[0].upper() in PREPARABLE_STATEMENTS
+
+def to_server_placeholders(query):
+    """
+    Rewrite psycopg2 style %s placeholders as $1, $2, ... for PREPARE and
+    %% as %, following the same rules psycopg2 formats unprepared queries
+    with. Returns the rewritten query and the number of parameters.
+    """
+    parts = []
+    param_count = 0
+    i = 0
+
+    while i < len(query):
+        char = query[i]
+        if char == '%':
+            next_char = query[i + 1] if i + 1 < len(query) else ''
+            if next_char == 's':
+                param_count += 1
+                parts.append(f'${param_count}')
+                i += 2
+                continue
+            elif next_char == '%':
+                parts.append('%')
+                i += 2
+                continue
+            # psycopg2 refuses these too, a literal % has to be written as %%
+            raise ValueError(f"unsupported placeholder %{next_char} in query, write a literal % as %%")
+        parts.append(char)
+        i += 1
+
+    return ''.join(parts), param_count
+
+def increment(counter):
+    with stats_lock:
+        stats[counter] += 1
+
+def get_stats():
+    with stats_lock:
+        return dict(stats)
+
+class StatementCache:
+    """
+    LRU of the named prepared statements that live on one connection.
+
+    Prepared statements belong to the server session, so each pooled
+    connection keeps its own cache and deallocates statements it evicts.
+    """
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self._statements = OrderedDict()
+
+    def execute(self, cur, query, params=None):
+        params = tuple(params) if params else ()
+        name = self.prepare(cur, query)
+        placeholders = ', '.join(['%s'] * len(params))
+
+        if placeholders:
+            cur.execute(f'EXECUTE {name} ({placeholders});', params)
+        else:
+            cur.execute(f'EXECUTE {name};')
+
+    def prepare(self, cur, query):
+        if query in self._statements:
+            self._statements.move_to_end(query)
+            increment('hits')
+            return self._statements[query]
+
+        increment('misses')
+        name = 'psef_' + hashlib.md5(query.encode('utf-8')).hexdigest()[:16]
+        server_query, _ = to_server_placeholders(query.strip().rstrip(';'))
+
+        # Prepared statements are not transactional, so this survives a rollback
+        cur.execute(f'PREPARE {name} AS {server_query}')
+        self._statements[query] = name
+
+        if len(self._statements) > self.capacity:
+            _, evicted_name = self._statements.popitem(last=False)
+            cur.execute(f'DEALLOCATE {evicted_name}')
+            increment('evictions')
+
+        return name
+
+    def clear(self):
+        self._statements.clear()
+
+    def __len__(self):
+        return len(self._statements)
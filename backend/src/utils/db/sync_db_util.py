@@ -1,13 +1,46 @@
 import os
-from psycopg2 import pool
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from src.utils.db import green_db_util, statement_cache, query_metrics
+from src.utils.db.connection_pool import ConnectionPool
+
 # Initialize connection pool globally
 connection_pool = None
+pool_lock = threading.Lock()
+
+# Optional pool for a read replica, read-only functions fall back to the primary without it
+read_pool = None
+read_pool_lock = threading.Lock()
+
+# Per request (green thread under eventlet) routing state
+routing = threading.local()
+
+# Statements that mark the current request as having written to the primary
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
 
 # Load variables from the .env file
 load_dotenv()
 
+# Server-side prepared statements can be turned off, e.g. behind pgbouncer in transaction mode
+prepared_statements_enabled = os.environ.get("DB_PREPARED_STATEMENTS", "true").lower() in ("1", "true", "yes", "on")
+statement_cache_size = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 128))
+
+def get_pool_config():
+    # Pool sizing and health checks can be tuned from the .env file
+    return {
+        'min_size': int(os.environ.get("DB_POOL_MIN_SIZE", 1)),
+        'max_size': int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        'max_overflow': int(os.environ.get("DB_POOL_MAX_OVERFLOW", 5)),
+        'timeout': float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        'recycle_seconds': float(os.environ.get("DB_POOL_RECYCLE_SECONDS", 1800)),
+        'pre_ping': os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes", "on"),
+        'pre_ping_after_seconds': float(os.environ.get("DB_POOL_PRE_PING_AFTER_SECONDS", 10)),
+    }
+
 def init_db_pool():
     global connection_pool
     # Get the connection string from the environment variable
@@ -16,118 +49,229 @@ def init_db_pool():
     if not connection_string:
         raise ValueError("DB_URL environment variable not set")
 
+    # Install the cooperative wait callback before any connection is opened
+    green_db_util.configure_green_mode()
+
     # Create a connection pool
-    connection_pool = pool.SimpleConnectionPool(
-        1,  # Minimum number of connections in the pool
-        10,  # Maximum number of connections in the pool
-        connection_string
-    )
+    connection_pool = ConnectionPool(connection_string, **get_pool_config())
 
-    # Check if the pool was created successfully
-    if not connection_pool:
-        raise Exception("Connection pool creation failed")
-    else:
-        print("Connection pool created successfully")
+    print("Connection pool created successfully")
 
-def get_connection():
-    global connection_pool
+def get_pool():
+    # Concurrent first requests must not each build their own pool
     if connection_pool is None:
-        init_db_pool()
-    return connection_pool.getconn()
+        with pool_lock:
+            if connection_pool is None:
+                init_db_pool()
+    return connection_pool
+
+def is_read_pool_configured():
+    return bool(os.environ.get("DB_READ_URL"))
+
+def init_read_pool():
+    global read_pool
+    green_db_util.configure_green_mode()
+
+    # The replica shares the primary's pool settings
+    read_pool = ConnectionPool(os.environ.get("DB_READ_URL"), **get_pool_config())
 
-def release_connection(conn):
+    print("Read connection pool created successfully")
+
+def get_read_pool():
+    if read_pool is None:
+        with read_pool_lock:
+            if read_pool is None:
+                init_read_pool()
+    return read_pool
+
+def read_only(func):
+    """
+    Marks a DAL function as safe to run on the read replica. Calls that
+    pass conn= still run on that connection, and once the request has
+    written to the primary its reads stay there (read-your-writes).
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        depth = getattr(routing, 'read_only_depth', 0)
+        routing.read_only_depth = depth + 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            routing.read_only_depth = depth
+    return wrapper
+
+def mark_written():
+    routing.has_written = True
+
+def reset_read_routing():
+    # Called at the start of every request
+    routing.read_only_depth = 0
+    routing.has_written = False
+
+@contextmanager
+def use_primary():
+    # Explicit read-your-writes override for the rest of the block
+    previous = getattr(routing, 'has_written', False)
+    routing.has_written = True
+    try:
+        yield
+    finally:
+        routing.has_written = previous
+
+def should_use_read_pool():
+    return (
+        is_read_pool_configured()
+        and getattr(routing, 'read_only_depth', 0) > 0
+        and not getattr(routing, 'has_written', False)
+    )
+
+def get_connection(timeout=None):
+    return get_pool().getconn(timeout)
+
+def release_connection(conn, discard=False):
     global connection_pool
     if connection_pool:
-        connection_pool.putconn(conn)
+        connection_pool.putconn(conn, discard)
 
-def execute_query_fetchall(query):
-    conn = None
-    try:
-        conn = get_connection()
+@contextmanager
+def connection(timeout=None):
+    # Checks out a connection and always returns it, rolling back on errors
+    with get_pool().connection(timeout) as conn:
+        yield conn
+
+@contextmanager
+def transaction(timeout=None):
+    """
+    Unit of work: every DAL call given this connection runs in one
+    transaction that is committed once at the end, or rolled back if
+    anything inside the block raises.
+    """
+    with connection(timeout) as conn:
+        try:
+            yield conn
+            conn.commit()
+            callbacks = getattr(conn, 'after_commit_callbacks', [])
+        finally:
+            conn.after_commit_callbacks = []
 
-        # Create a cursor object
-        cur = conn.cursor()
+        for callback in callbacks:
+            callback()
 
-        cur.execute(query)
+def after_commit(conn, callback):
+    # Runs callback once conn's transaction commits, or right away when there is no transaction
+    if conn is None:
+        callback()
+    else:
+        conn.after_commit_callbacks = getattr(conn, 'after_commit_callbacks', []) + [callback]
+
+@contextmanager
+def read_connection(timeout=None):
+    with get_read_pool().connection(timeout) as conn:
+        yield conn
         conn.commit()
-        records = cur.fetchall()
 
-        release_connection(conn)
+@contextmanager
+def checkout(conn=None):
+    # Reuse the caller's transaction, otherwise run the statement in its own
+    if conn is not None:
+        yield conn
+    elif should_use_read_pool():
+        with read_connection() as own_conn:
+            yield own_conn
+    else:
+        with transaction() as own_conn:
+            yield own_conn
+
+def get_pool_stats():
+    if connection_pool is None:
+        return {}
+    return connection_pool.stats()
+
+def get_read_pool_stats():
+    if read_pool is None:
+        return {}
+    return read_pool.stats()
+
+def get_statement_cache(conn):
+    cache = getattr(conn, 'statement_cache', None)
+    if cache is None:
+        cache = statement_cache.StatementCache(statement_cache_size)
+        conn.statement_cache = cache
+    return cache
+
+def run_statement(cur, query, params=None):
+    # Queries use %s placeholders, values are always sent as bind parameters
+    if query.lstrip().split(None, 1)[0].upper() in WRITE_STATEMENTS:
+        mark_written()
+
+    start = time.perf_counter()
+    try:
+        if prepared_statements_enabled and statement_cache.is_preparable(query):
+            get_statement_cache(cur.connection).execute(cur, query, params)
+        else:
+            # Never None, so psycopg2 always formats the query and %% is a literal % on both paths
+            cur.execute(query, params if params is not None else ())
+    finally:
+        query_metrics.record_query(query, time.perf_counter() - start)
+
+def execute_query_fetchall(query, params=None, conn=None):
+    try:
+        with checkout(conn) as active_conn:
+            with active_conn.cursor() as cur:
+                run_statement(cur, query, params)
+                records = cur.fetchall()
 
         return records
-    
+
     except Exception as e:
         print(f"An error occurred: {e}")
-
-        if conn:
-            release_connection(conn)
         raise
 
-def execute_query_fetchone(query):
-    conn = None
+def execute_query_fetchone(query, params=None, conn=None):
     try:
-        conn = get_connection()
-
-        cur = conn.cursor()
-        
-        cur.execute(query)
-        conn.commit()
-        record = cur.fetchone()
-        release_connection(conn)
+        with checkout(conn) as active_conn:
+            with active_conn.cursor() as cur:
+                run_statement(cur, query, params)
+                record = cur.fetchone()
 
         return record
-    
+
     except Exception as e:
         print(f"An error occurred while trying to execute the query: {e}")
-       
-        if conn:
-            release_connection(conn)
         raise
 
-def execute_query_return_row_count(query):
-    conn = None
+def execute_query_return_row_count(query, params=None, conn=None):
     try:
-        conn = get_connection()
-
-        cur = conn.cursor()
-        print(f"Executing query: {query}")
-        cur.execute(query)
-        conn.commit()
-        affected_rows = cur.rowcount
-        release_connection(conn)
+        with checkout(conn) as active_conn:
+            with active_conn.cursor() as cur:
+                run_statement(cur, query, params)
+                affected_rows = cur.rowcount
 
         return affected_rows
-    
+
     except Exception as e:
         print(f"An error occurred while trying to execute the query: {e}")
-       
-        if conn:
-            release_connection(conn)
         raise
 
-def execute_query_insert(query):
-    conn = None
+def execute_query_insert(query, params=None, conn=None):
     try:
-        conn = get_connection()
-
-        cur = conn.cursor()
-        print(f"Executing query: {query}")
-        cur.execute(query)
-        conn.commit()
-        release_connection(conn)
+        with checkout(conn) as active_conn:
+            with active_conn.cursor() as cur:
+                run_statement(cur, query, params)
 
         return
-    
+
     except Exception as e:
         print(f"An error occurred while trying to execute the query: {e}")
-       
-        if conn:
-            release_connection(conn)
         raise
 
 # Close all connections in the pool when the application exits
 def close_all_connections():
     print("Closing all database connections in the pool")
-    global connection_pool
+    global connection_pool, read_pool
     if connection_pool:
         connection_pool.closeall()
+        connection_pool = None
+    if read_pool:
+        read_pool.closeall()
+        read_pool = None
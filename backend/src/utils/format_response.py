@@ -1,19 +1,7 @@
-from src.dals import user_dal
-
 def handleUpdates(updates):
     new_updates = {key: value for key, value in updates.items() if value}
     return new_updates
 
-def handleUserData(user_id, assignment_id):
-    user = user_dal.get_user_by_id(user_id)
-    user_data = {
-        'user_id': user.user_id,
-        'first_name': user.first_name,
-        'last_name': user.last_name,
-        'assignment_id': assignment_id
-    }
-    return user_data
-
 def handleAllAssignments(task_list):
     tasks = {}
     sorted_tasks = []
@@ -27,15 +15,10 @@ def handleAllAssignments(task_list):
         tasks[task_id]['start_time'] = task[4].isoformat()
         tasks[task_id]['end_time'] = task[5].isoformat()
         tasks[task_id]['max_participants'] = task[6]
-        tasks[task_id]['users'] = []
+        # Assigned users come back already aggregated by get_all_tasks
+        tasks[task_id]['users'] = task[7]
 
         sorted_tasks.append(task_id)
-
-        if task[7]:
-            pairs = task[7].split(',')
-            for pair in pairs:
-                user_id, assignment_id = pair.split(':')
-                tasks[task_id]['users'].append(handleUserData(user_id, assignment_id))
     
     return tasks, sorted_tasks
 
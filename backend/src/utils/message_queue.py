@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import select
+import psycopg2
+import socketio
+from dotenv import load_dotenv
+
+from src.utils.db import sync_db_util
+
+# Load variables from the .env file
+load_dotenv()
+
+# Unset for a single worker. 'postgres' shares Socket.IO events between workers through LISTEN/NOTIFY
+# on the app database, any other value is a queue URL handed to Flask-SocketIO (redis://, amqp://, kafka://)
+queue_setting = os.environ.get("SOCKETIO_MESSAGE_QUEUE", "").strip()
+
+CHANNEL = 'psef_socketio'
+
+# NOTIFY payloads are limited to 8000 bytes, anything larger is stored in socketio_messages
+MAX_NOTIFY_BYTES = 7900
+STORED_MESSAGE_TTL_SECONDS = 300
+
+def is_shared():
+    # True when other workers see what this one emits
+    return bool(queue_setting)
+
+def socketio_options():
+    # Extra SocketIO() keyword arguments for the configured queue
+    if not queue_setting:
+        return {}
+    if queue_setting.lower() == 'postgres':
+        return {'client_manager': PostgresManager(os.environ.get("DB_URL"))}
+    return {'message_queue': queue_setting}
+
+class PostgresManager(socketio.PubSubManager):
+    """
+    Socket.IO client manager that publishes with pg_notify and listens on a
+    dedicated connection, so workers on one box need nothing but Postgres.
+    Emits are queued and sent by one background task, everything queued
+    while it was sending goes out together in the next NOTIFY.
+    """
+    name = 'postgres'
+
+    def __init__(self, url, channel=CHANNEL, logger=None):
+        super().__init__(channel=channel, logger=logger)
+        self.url = url
+        self.publish_queue = None
+        self.published = 0
+
+    def initialize(self):
+        super().initialize()
+        self.publish_queue = self.server.eio.create_queue()
+        self.server.start_background_task(self.run_publisher)
+
+    def _publish(self, data):
+        # Called from emit(), which must not wait on the database
+        self.publish_queue.put(data)
+
+    def run_publisher(self):
+        queue_empty = self.server.eio.get_queue_empty_exception()
+        while True:
+            messages = [self.publish_queue.get()]
+            while True:
+                try:
+                    messages.append(self.publish_queue.get(block=False))
+                except queue_empty:
+                    break
+
+            try:
+                self.send(messages)
+            except Exception as e:
+                print(f"Error publishing {len(messages)} Socket.IO message(s): {e}")
+
+    def send(self, messages):
+        payload = json.dumps(messages, separators=(',', ':'))
+
+        if len(payload.encode('utf-8')) <= MAX_NOTIFY_BYTES:
+            sync_db_util.execute_query_fetchone('SELECT pg_notify(%s, %s);', (self.channel, payload))
+            return
+
+        with sync_db_util.transaction() as conn:
+            message_id = sync_db_util.execute_query_fetchone('INSERT INTO socketio_messages (payload) VALUES (%s) RETURNING message_id;', (payload,), conn=conn)[0]
+            # Sent on commit, so listeners can always read the row
+            pointer = json.dumps({'message_id': message_id, 'host_id': self.host_id})
+            sync_db_util.execute_query_fetchone('SELECT pg_notify(%s, %s);', (self.channel, pointer), conn=conn)
+
+        self.published += 1
+        if self.published % 100 == 0:
+            sync_db_util.execute_query_return_row_count('DELETE FROM socketio_messages WHERE created_at < CURRENT_TIMESTAMP - %s * INTERVAL \'1 second\';', (STORED_MESSAGE_TTL_SECONDS,))
+
+    def _listen(self):
+        while True:
+            conn = None
+            try:
+                # A dedicated connection, LISTEN has to stay open outside the pool
+                conn = psycopg2.connect(self.url)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN {self.channel};')
+
+                while True:
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        messages = json.loads(conn.notifies.pop(0).payload)
+                        if isinstance(messages, dict):
+                            # Stored batch, this worker already handled the ones it sent itself
+                            if messages['host_id'] == self.host_id:
+                                continue
+                            messages = self.load_stored_messages(conn, messages['message_id'])
+                        yield from messages
+
+            except Exception as e:
+                # Events published while reconnecting are lost, clients recover them with a full sync
+                print(f"Socket.IO message queue listener error, reconnecting: {e}")
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def load_stored_messages(self, conn, message_id):
+        with conn.cursor() as cur:
+            cur.execute('SELECT payload FROM socketio_messages WHERE message_id = %s;', (message_id,))
+            record = cur.fetchone()
+        return json.loads(record[0]) if record else []
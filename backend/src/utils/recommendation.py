@@ -1,25 +1,44 @@
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.decomposition import TruncatedSVD
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
 from src.dals.assignment_dal import get_user_task_interactions
 from src.dals.task_dal import get_task_metadata
 
+def build_interaction_matrix(interactions):
+    """
+    Binary users x tasks CSR matrix built straight from (user_id, task_id)
+    pairs. Rows and columns follow the sorted ids, so the same data always
+    maps to the same indices.
+    """
+    user_column, task_column = zip(*interactions)
+    user_ids, rows = np.unique(np.array(user_column), return_inverse=True)
+    task_ids, columns = np.unique(np.array(task_column, dtype=np.int64), return_inverse=True)
+
+    values = np.ones(len(rows), dtype=np.float32)
+    interaction_matrix = sparse.csr_matrix((values, (rows, columns)), shape=(len(user_ids), len(task_ids)))
+    # Repeated pairs were summed, an interaction counts once (signed up or completed)
+    interaction_matrix.data[:] = 1
+
+    return interaction_matrix, user_ids, task_ids
+
 def train_collaborative_filtering(interactions):
     """
-    Train a collaborative filtering model using SVD.
+    Train a collaborative filtering model using SVD on the sparse interaction matrix.
     """
-    # Create a user-task interaction matrix
-    df = pd.DataFrame(interactions, columns=["user_id", "task_id"])
-    df["interaction"] = 1  # Binary interaction (signed up or completed)
-    user_task_matrix = df.pivot(index="user_id", columns="task_id", values="interaction").fillna(0)
+    interaction_matrix, user_ids, task_ids = build_interaction_matrix(interactions)
+
+    if len(task_ids) < 2:
+        # Nothing to factorise, TruncatedSVD needs two tasks or more
+        return interaction_matrix, user_ids, task_ids, interaction_matrix.toarray(), np.eye(len(task_ids), dtype=np.float32)
 
-    # Train SVD model
-    svd = TruncatedSVD(n_components=10)
-    user_factors = svd.fit_transform(user_task_matrix)
+    # Fewer components than tasks, TruncatedSVD rejects anything else
+    svd = TruncatedSVD(n_components=min(10, len(task_ids) - 1), random_state=0)
+    user_factors = svd.fit_transform(interaction_matrix)
     task_factors = svd.components_
 
-    return user_task_matrix, user_factors, task_factors
+    return interaction_matrix, user_ids, task_ids, user_factors, task_factors
 
 def train_content_based_filtering(task_metadata):
     """
@@ -28,43 +47,133 @@ def train_content_based_filtering(task_metadata):
     df = pd.DataFrame(task_metadata, columns=["task_id", "task_name", "task_type", "description"])
     df["combined_features"] = df["task_name"] + " " + df["task_type"] + " " + df["description"]
 
-    # Compute TF-IDF matrix
+    # Compute TF-IDF matrix, rows are L2 normalised so a dot product is the cosine similarity
     vectorizer = TfidfVectorizer()
     tfidf_matrix = vectorizer.fit_transform(df["combined_features"])
 
-    # Compute cosine similarity
-    similarity_matrix = cosine_similarity(tfidf_matrix)
+    return df, tfidf_matrix
 
-    return df, similarity_matrix
+def rank_by_centrality(tfidf_matrix):
+    # Same order as the column means of the all-pairs cosine matrix, from one product with the summed rows
+    centroid = np.asarray(tfidf_matrix.sum(axis=0)).ravel()
+    return np.argsort(-(tfidf_matrix @ centroid), kind='stable')
 
-def recommend_tasks_for_user(user_id):
+def build_model(interactions, task_metadata):
     """
-    Hybrid recommendation system for recommending tasks to a user.
+    Trains both models and keeps only what scoring a request needs, the
+    user and task factors and the content-based ranking for new users.
     """
-    try:
-        # Fetch all user-task interactions
-        interactions = get_user_task_interactions()
-        task_metadata = get_task_metadata()
-
-        # Train collaborative filtering model
-        user_task_matrix, user_factors, task_factors = train_collaborative_filtering(interactions)
-
-        # Check if the user exists in the interaction matrix
-        if user_id in user_task_matrix.index:
-            # Collaborative filtering for users with history
-            user_index = user_task_matrix.index.get_loc(user_id)
-            user_vector = user_factors[user_index]
-            task_scores = user_vector @ task_factors
-            recommended_task_indices = task_scores.argsort()[::-1][:5]
-            recommended_tasks = user_task_matrix.columns[recommended_task_indices]
+    model = {
+        'user_ids': np.array([], dtype=object),
+        'user_index': {},
+        'task_ids': np.array([], dtype=np.int64),
+        'user_factors': None,
+        'task_factors': None,
+        'interaction_matrix': None,
+        'content_task_ids': np.array([], dtype=np.int64),
+    }
+
+    if interactions:
+        interaction_matrix, user_ids, task_ids, user_factors, task_factors = train_collaborative_filtering(interactions)
+        model['user_ids'] = user_ids
+        model['user_index'] = {user_id: index for index, user_id in enumerate(user_ids.tolist())}
+        model['task_ids'] = task_ids
+        model['user_factors'] = user_factors
+        model['task_factors'] = task_factors
+        model['interaction_matrix'] = interaction_matrix
+
+    if task_metadata:
+        task_df, tfidf_matrix = train_content_based_filtering(task_metadata)
+        model['content_task_ids'] = task_df["task_id"].to_numpy(dtype=np.int64)[rank_by_centrality(tfidf_matrix)]
+
+    return model
+
+def top_k_indices(scores, count):
+    # Partial sort, only the best count scores are ordered
+    if count <= 0:
+        return np.array([], dtype=np.int64)
+    if count >= len(scores):
+        return scores.argsort()[::-1]
+    best = np.argpartition(scores, -count)[-count:]
+    return best[scores[best].argsort()[::-1]]
+
+def build_availability_masks(task_ids, start_times, unavailable, now):
+    """
+    One boolean mask over task_ids per reason a task cannot be recommended,
+    True where the reason applies. start_times is NaN for unknown tasks,
+    which count as started. unavailable maps the other reasons to arrays of
+    task ids.
+    """
+    masks = {'already_started': ~(start_times >= now)}
+    for reason, reason_task_ids in unavailable.items():
+        masks[reason] = np.isin(task_ids, reason_task_ids)
+    return masks
+
+def recommend_from_model(model, user_id, count=5, unavailable=None):
+    """
+    Scores one user against a trained model, a vector product and a top-k.
+    unavailable is a boolean mask over the model's tasks that are never
+    recommended, applied before the top-k.
+    """
+    user_index = model['user_index'].get(user_id)
+
+    if user_index is not None:
+        # Collaborative filtering for users with history
+        task_scores = model['user_factors'][user_index] @ model['task_factors']
+        if unavailable is None:
+            recommended_tasks = model['task_ids'][top_k_indices(task_scores, count)]
         else:
-            # Content-based filtering for new users
-            task_df, similarity_matrix = train_content_based_filtering(task_metadata)
-            recommended_task_indices = similarity_matrix.mean(axis=0).argsort()[::-1][:5]
-            recommended_tasks = task_df.iloc[recommended_task_indices]["task_id"]
+            task_scores = np.where(unavailable, -np.inf, task_scores)
+            best = top_k_indices(task_scores, count)
+            # Fewer than count tasks are left when most of them are masked
+            recommended_tasks = model['task_ids'][best[np.isfinite(task_scores[best])]]
+    else:
+        # Content-based filtering for new users
+        recommended_tasks = model['content_task_ids'][:max(count, 0)]
+
+    return [{"task_id": int(task_id)} for task_id in recommended_tasks]
+
+def score_all_users(model, open_task_ids, count, batch_size=1024):
+    """
+    Top count open tasks for every user in the model, scored a block of
+    users at a time. Yields (user_ids, task_ids, scores) for each block,
+    with one ranked list of task ids and one of scores per user.
+    """
+    if model['user_factors'] is None or count <= 0:
+        return
 
-        # Return recommended tasks
-        return [{"task_id": task_id} for task_id in recommended_tasks]
+    # Tasks that are not open, and the ones a user already has, can never be picked
+    closed = ~np.isin(model['task_ids'], np.asarray(list(open_task_ids), dtype=np.int64))
+    count = min(count, len(model['task_ids']))
+
+    for start in range(0, len(model['user_ids']), batch_size):
+        end = start + batch_size
+        scores = model['user_factors'][start:end] @ model['task_factors']
+        scores[:, closed] = -np.inf
+        taken = model['interaction_matrix'][start:end].tocoo()
+        scores[taken.row, taken.col] = -np.inf
+
+        # Partial sort per row, then order just the count best
+        best = np.argpartition(scores, -count, axis=1)[:, -count:]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+
+        # Masked tasks sort last, users with fewer open tasks left get shorter lists
+        found = np.isfinite(best_scores)
+        task_ids = [model['task_ids'][row[keep]].tolist() for row, keep in zip(best, found)]
+        scores = [row[keep].tolist() for row, keep in zip(best_scores, found)]
+        yield model['user_ids'][start:end].tolist(), task_ids, scores
+
+def recommend_tasks_on_demand(user_id):
+    """
+    Trains on the current data and scores the user in the same call. Kept
+    for comparison with the trained model served by recommendation_store.
+    """
+    try:
+        model = build_model(get_user_task_interactions(), get_task_metadata())
+        return recommend_from_model(model, user_id)
 
     except Exception as e:
         print(f"Error in hybrid recommendation system: {e}")
@@ -0,0 +1,241 @@
+"""
+Everything web code needs from the recommender, without importing it.
+
+recommendation_store and the modules it trains with pull in numpy, pandas,
+scipy and scikit-learn, seconds of import time and tens of MB per process.
+With RECOMMENDER_ENGINE=inline they are imported into this process the first
+time they are needed, with RECOMMENDER_ENGINE=process they live in a separate
+engine process and this module forwards calls to it.
+
+An engine can also be run on its own and shared by every worker
+(from the backend directory):
+    RECOMMENDER_ENGINE_ADDRESS=127.0.0.1:5100 RECOMMENDER_ENGINE_AUTHKEY=... python -m src.utils.recommendation_engine
+"""
+import os
+import sys
+import atexit
+import secrets
+import datetime
+import importlib
+import threading
+import subprocess
+from multiprocessing.connection import Client, Listener
+from dotenv import load_dotenv
+
+from src.dals import recommendation_dal
+from src.utils import cache_invalidation
+
+# Load variables from the .env file
+load_dotenv()
+
+# 'inline' loads the recommender into this process on first use, 'process' keeps it in an engine process
+mode = os.environ.get("RECOMMENDER_ENGINE", "inline").lower()
+# host:port of a shared engine, without it every worker in 'process' mode starts its own
+engine_address = os.environ.get("RECOMMENDER_ENGINE_ADDRESS", "")
+engine_authkey = os.environ.get("RECOMMENDER_ENGINE_AUTHKEY", "")
+# Recommendations stored per user by recommendation_store.precompute(), 0 scores every request on demand instead
+precompute_count = int(os.environ.get("RECOMMENDER_PRECOMPUTE_COUNT", 20))
+# Read by recommendation_store as well, here it only decides whether to load the recommender at startup
+background_training = float(os.environ.get("RECOMMENDER_RETRAIN_SECONDS", 600)) > 0
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+store = None
+store_lock = threading.Lock()
+
+engine_process = None
+connection = None
+connection_lock = threading.Lock()
+
+def run_cpu_bound(func, *args):
+    # Under eventlet a fit on a green thread would stall every other request, so it runs on a real thread
+    eventlet = sys.modules.get('eventlet')
+    if eventlet is not None and eventlet.patcher.is_monkey_patched('thread'):
+        from eventlet import tpool
+        return tpool.execute(func, *args)
+    return func(*args)
+
+def load_store():
+    global store
+    if store is None:
+        with store_lock:
+            if store is None:
+                # The imports alone take seconds of CPU, kept off the event loop like a fit
+                store = run_cpu_bound(importlib.import_module, 'src.utils.recommendation_store')
+    return store
+
+def is_loaded():
+    return store is not None
+
+def start_training():
+    try:
+        load_store().start_trainer()
+    except Exception as e:
+        print(f"Error loading recommendation engine: {e}")
+
+def local_call(method, *args):
+    current = load_store()
+    handlers = {
+        'recommend_tasks_for_user': current.recommend_tasks_for_user,
+        'similar_tasks': current.task_vector_index.similar_tasks,
+        'get_stats': current.get_stats,
+        'dispatch': cache_invalidation.dispatch,
+    }
+    return handlers[method](*args)
+
+def connect():
+    host, port = engine_address.rsplit(':', 1)
+    return Client((host, int(port)), authkey=engine_authkey.encode())
+
+def remote_call(method, *args):
+    global connection
+    with connection_lock:
+        for attempt in range(2):
+            try:
+                if connection is None:
+                    connection = connect()
+                connection.send((method, args))
+                status, result = connection.recv()
+                break
+            except (OSError, EOFError):
+                # The engine was restarted or the socket dropped, one new connection is tried
+                connection = None
+                if attempt:
+                    raise
+
+    if status == 'error':
+        raise RuntimeError(f"recommendation engine: {result}")
+    return result
+
+def call(method, *args):
+    if mode == 'process':
+        return remote_call(method, *args)
+    return local_call(method, *args)
+
+def start_engine_process():
+    # A private engine for this worker on a port the OS picks, it exits when this process does
+    global engine_process, engine_address, engine_authkey
+    engine_authkey = secrets.token_hex(16)
+    env = dict(os.environ, RECOMMENDER_ENGINE_ADDRESS='127.0.0.1:0', RECOMMENDER_ENGINE_AUTHKEY=engine_authkey)
+    engine_process = subprocess.Popen(
+        [sys.executable, '-m', 'src.utils.recommendation_engine', '--exit-with-parent'],
+        cwd=BACKEND_DIR, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+    )
+    # The engine prints its address once it is listening
+    engine_address = engine_process.stdout.readline().decode().strip()
+    if not engine_address:
+        raise RuntimeError("recommendation engine process exited on startup")
+    atexit.register(engine_process.terminate)
+
+def forward_event(namespace, key):
+    try:
+        remote_call('dispatch', namespace, key)
+    except Exception as e:
+        print(f"Error forwarding {namespace} event to the recommendation engine: {e}")
+
+def forwarder(namespace):
+    def handler(key):
+        # Not waited for, publish() may be called inside a transaction
+        threading.Thread(target=forward_event, args=(namespace, key), daemon=True).start()
+    return handler
+
+def start():
+    """
+    Starts the engine for this worker. Inline, the recommender is loaded
+    and trained in the background when the trainer is on, otherwise on
+    first use. In process mode the engine process is started, or the shared
+    one at RECOMMENDER_ENGINE_ADDRESS used.
+    """
+    if mode != 'process':
+        if background_training:
+            threading.Thread(target=start_training, name="recommendation-engine-loader", daemon=True).start()
+        return
+
+    if not engine_address:
+        start_engine_process()
+    # With the postgres backend the engine listens for the notifications itself
+    if cache_invalidation.backend != 'postgres':
+        for namespace in ('recommendations', 'task_content'):
+            cache_invalidation.register_handler(namespace, forwarder(namespace))
+
+def recommend_tasks_for_user(user_id, count=5):
+    """
+    Hybrid recommendations for user_id scored by the engine.
+    """
+    try:
+        return call('recommend_tasks_for_user', user_id, count)
+    except Exception as e:
+        print(f"Error in hybrid recommendation system: {e}")
+        return []
+
+def get_recommendations(user_id, count=5):
+    """
+    The precomputed recommendations for user_id and when they were computed.
+    Users the last batch did not cover are scored on demand.
+    """
+    if precompute_count > 0:
+        # A plain indexed read, the recommender is not needed for it
+        rows = recommendation_dal.get_user_recommendations(user_id)
+        if rows:
+            return [{"task_id": task_id} for task_id, _ in rows[:max(count, 0)]], rows[0][1]
+
+    return recommend_tasks_for_user(user_id, count), datetime.datetime.now(datetime.timezone.utc)
+
+def similar_tasks(task_id, count=5):
+    """
+    Upcoming tasks most similar to task_id as (task_id, score) pairs, None
+    when the task does not exist.
+    """
+    return call('similar_tasks', task_id, count)
+
+def record_assignment(assignment_id, conn=None):
+    # Counted by every engine, each keeps its own model
+    cache_invalidation.publish('recommendations', int(assignment_id), conn=conn)
+
+def get_stats():
+    if mode != 'process' and not is_loaded():
+        return {'engine': mode, 'loaded': False}
+    return dict(call('get_stats'), engine=mode, loaded=True)
+
+def serve_connection(conn):
+    while True:
+        try:
+            method, args = conn.recv()
+        except (EOFError, OSError):
+            break
+        try:
+            conn.send(('ok', local_call(method, *args)))
+        except Exception as e:
+            conn.send(('error', str(e)))
+    conn.close()
+
+def exit_with_parent():
+    # stdin is a pipe from the worker, it closes when the worker exits for any reason
+    sys.stdin.buffer.read()
+    os._exit(0)
+
+def serve(watch_parent=False):
+    if not engine_address or not engine_authkey:
+        raise SystemExit("The engine needs RECOMMENDER_ENGINE_ADDRESS and RECOMMENDER_ENGINE_AUTHKEY")
+
+    host, port = engine_address.rsplit(':', 1)
+    listener = Listener((host, int(port)), authkey=engine_authkey.encode())
+    print(f"{listener.address[0]}:{listener.address[1]}", flush=True)
+    if watch_parent:
+        # stdout was only for the address, nobody reads it any more
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        threading.Thread(target=exit_with_parent, daemon=True).start()
+
+    cache_invalidation.start_listener()
+    threading.Thread(target=start_training, name="recommendation-engine-loader", daemon=True).start()
+
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as e:
+            print(f"Error accepting recommendation engine connection: {e}")
+            continue
+        threading.Thread(target=serve_connection, args=(conn,), daemon=True).start()
+
+if __name__ == "__main__":
+    serve(watch_parent='--exit-with-parent' in sys.argv)
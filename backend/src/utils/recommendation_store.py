@@ -0,0 +1,200 @@
+import os
+import time
+import datetime
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+from src.dals import assignment_dal, task_dal, recommendation_dal
+from src.utils import cache_invalidation, content_index, recommendation, task_vector_index
+from src.utils.recommendation_engine import precompute_count, run_cpu_bound
+from src.utils.db import sync_db_util
+
+# Load variables from the .env file
+load_dotenv()
+
+# The trainer rebuilds the model this often, or sooner once enough assignments were made.
+# RECOMMENDER_RETRAIN_SECONDS=0 turns the background trainer off, the model is then trained on first use only.
+retrain_seconds = float(os.environ.get("RECOMMENDER_RETRAIN_SECONDS", 600))
+retrain_after_assignments = int(os.environ.get("RECOMMENDER_RETRAIN_AFTER_ASSIGNMENTS", 50))
+
+# Where interactions and the tasks a user cannot take are read from, benchmarks swap in synthetic data
+get_user_task_interactions = assignment_dal.get_user_task_interactions
+get_unavailable_tasks = recommendation_dal.get_unavailable_tasks
+
+UNAVAILABLE_REASONS = ('assigned', 'at_capacity', 'time_conflict')
+
+# Replaced whole by train(), a request holding the old model keeps using it
+model = None
+version = 0
+train_lock = threading.Lock()
+
+assignments_since_training = 0
+counter_lock = threading.Lock()
+retrain_requested = threading.Event()
+
+last_precompute = None
+
+trainer_thread = None
+trainer_lock = threading.Lock()
+
+def train(only_if_missing=False):
+    global model, version, assignments_since_training
+
+    with train_lock:
+        if only_if_missing and model is not None:
+            return model
+
+        # Assignments made from here on are not in the data read below
+        with counter_lock:
+            assignments_since_training = 0
+
+        start = time.perf_counter()
+        interactions = get_user_task_interactions()
+        # Users outside the model are served by content_index, which follows task changes on its own
+        new_model = run_cpu_bound(recommendation.build_model, interactions, ())
+
+        version += 1
+        new_model['version'] = version
+        new_model['trained_at'] = time.time()
+        new_model['training_ms'] = (time.perf_counter() - start) * 1000
+        model = new_model
+        return new_model
+
+def get_model():
+    current = model
+    if current is None:
+        current = train(only_if_missing=True)
+    return current
+
+def get_unavailable_task_ids(user_id):
+    # Task ids per reason, from one query
+    unavailable = {reason: [] for reason in UNAVAILABLE_REASONS}
+    for task_id, reason in get_unavailable_tasks(user_id):
+        unavailable[reason].append(task_id)
+    return {reason: np.array(task_ids, dtype=np.int64) for reason, task_ids in unavailable.items()}
+
+def recommend_tasks_for_user(user_id, count=5):
+    """
+    Hybrid recommendations for user_id from the latest trained model. Tasks
+    the user could not sign up for, already taken, full, overlapping one of
+    theirs or started, are masked out before the top-k.
+    """
+    try:
+        current = get_model()
+        unavailable = get_unavailable_task_ids(user_id)
+        recommended = []
+        if user_id in current['user_index']:
+            start_times = content_index.lookup_start_times(content_index.get_snapshot(), current['task_ids'])
+            masks = recommendation.build_availability_masks(current['task_ids'], start_times, unavailable, time.time())
+            recommended = recommendation.recommend_from_model(current, user_id, count, np.logical_or.reduce(list(masks.values())))
+            if len(recommended) == count:
+                return recommended
+
+        # New users, users whose first assignments came after the last training, and users
+        # who can take fewer than count of the model's tasks. Started tasks are never candidates here.
+        history = unavailable['assigned'].tolist()
+        unavailable_task_ids = np.concatenate([
+            unavailable['at_capacity'], unavailable['time_conflict'],
+            np.array([task['task_id'] for task in recommended], dtype=np.int64),
+        ])
+        similar = task_vector_index.recommend(history, count - len(recommended), unavailable_task_ids)
+        return recommended + [{"task_id": task_id} for task_id in similar]
+
+    except Exception as e:
+        print(f"Error in hybrid recommendation system: {e}")
+        return []
+
+def precompute(current=None):
+    """
+    Scores every user in the model against the open tasks in one batch and
+    replaces user_recommendations with their top precompute_count tasks.
+    """
+    global last_precompute
+    if precompute_count <= 0:
+        return None
+
+    current = current or get_model()
+    start = time.perf_counter()
+    computed_at = datetime.datetime.now(datetime.timezone.utc)
+
+    rows = 0
+    with sync_db_util.transaction() as conn:
+        # Another worker is writing the same table, its results are as fresh, so nothing is scored here
+        if not recommendation_dal.try_lock_recommendations(conn):
+            return None
+
+        # Scored with the lock held, the scores of a worker that did not get it would be thrown away
+        open_task_ids = [row[0] for row in task_dal.get_task_metadata(conn=conn)]
+        batches = run_cpu_bound(lambda: list(recommendation.score_all_users(current, open_task_ids, precompute_count)))
+
+        recommendation_dal.clear_recommendations(conn=conn)
+        for user_ids, task_ids, scores in batches:
+            rows += recommendation_dal.insert_recommendations(user_ids, task_ids, scores, computed_at, conn=conn)
+
+    last_precompute = {
+        'version': current.get('version'),
+        'computed_at': computed_at.timestamp(),
+        'users': rows,
+        'precompute_ms': round((time.perf_counter() - start) * 1000, 2),
+    }
+    return last_precompute
+
+def count_assignment(key):
+    global assignments_since_training
+    with counter_lock:
+        assignments_since_training += 1
+        due = assignments_since_training >= retrain_after_assignments
+
+    # key is None when notifications were lost, so the count cannot be trusted
+    if due or key is None:
+        retrain_requested.set()
+
+def run_trainer():
+    while True:
+        try:
+            precompute(train())
+            content_index.refresh()
+            task_vector_index.fit()
+        except Exception as e:
+            print(f"Error training recommendation model: {e}")
+
+        retrain_requested.wait(retrain_seconds)
+        retrain_requested.clear()
+
+def start_trainer():
+    global trainer_thread
+    if retrain_seconds <= 0:
+        return
+
+    with trainer_lock:
+        if trainer_thread is None:
+            trainer_thread = threading.Thread(target=run_trainer, name="recommendation-trainer", daemon=True)
+            trainer_thread.start()
+
+def get_stats():
+    current = model
+    with counter_lock:
+        stats = {'assignments_since_training': assignments_since_training}
+    if current is not None:
+        stats.update(
+            version=current['version'],
+            trained_at=current['trained_at'],
+            training_ms=round(current['training_ms'], 2),
+            users=len(current['user_index']),
+            tasks=len(current['task_ids']),
+        )
+    stats['content_index'] = content_index.get_stats()
+    stats['task_vector_index'] = task_vector_index.get_stats()
+    stats['precompute'] = last_precompute
+    return stats
+
+cache_invalidation.register_handler('recommendations', count_assignment)
+
+if __name__ == "__main__":
+    # One-off training and batch scoring, e.g. from cron with RECOMMENDER_RETRAIN_SECONDS=0
+    try:
+        precompute(train())
+        print(get_stats())
+    finally:
+        sync_db_util.close_all_connections()
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+
+HEAVY_MODULES = ('numpy', 'pandas', 'scipy', 'sklearn')
+
+def get_rss_mb():
+    # Current resident set from /proc, the peak where there is no /proc
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+# Taken when src is first imported, before the views, DALs and utils are
+imports_started = time.perf_counter()
+rss_before_mb = get_rss_mb()
+
+last_report = None
+
+def report(create_app_started):
+    """
+    Prints how long importing src and create_app took and the RSS before
+    and after them, with the heavy libraries that got loaded on the way.
+    """
+    global last_report
+    now = time.perf_counter()
+    last_report = {
+        'import_ms': round((create_app_started - imports_started) * 1000, 1),
+        'create_app_ms': round((now - create_app_started) * 1000, 1),
+        'rss_before_mb': round(rss_before_mb, 1),
+        'rss_after_mb': round(get_rss_mb(), 1),
+        'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+    print(
+        f"Startup: imports {last_report['import_ms']} ms, create_app {last_report['create_app_ms']} ms, "
+        f"RSS {last_report['rss_before_mb']} MB -> {last_report['rss_after_mb']} MB, "
+        f"loaded {', '.join(last_report['heavy_modules']) or 'no heavy modules'}"
+    )
+    return last_report
@@ -0,0 +1,77 @@
+import json
+import time
+import hashlib
+import threading
+
+from src.dals import task_dal, async_task_dal
+from src.utils import format_response, cache_invalidation
+from src.utils.db import sync_db_util, async_db_util
+
+# The formatted all-tasks board, rebuilt only after a write bumps the version
+version = 0
+snapshot = None
+version_lock = threading.Lock()
+build_lock = threading.Lock()
+
+def increment_version(key=None):
+    global version
+    with version_lock:
+        version += 1
+
+def bump_version(conn=None):
+    """
+    Called by every write that changes the board. Other workers are told
+    through cache_invalidation, and the version is bumped again once conn
+    commits so a rebuild that raced with the write is thrown away.
+    """
+    cache_invalidation.publish('task_board', None, conn=conn)
+    sync_db_util.after_commit(conn, increment_version)
+
+def is_current(board):
+    return (
+        board is not None
+        and board['version'] == version
+        and (board['expires_at'] is None or time.time() < board['expires_at'])
+    )
+
+def load_task_list():
+    if async_db_util.is_enabled():
+        return async_db_util.run(async_task_dal.get_all_tasks())
+
+    # A lagging replica would get cached until the next write, so rebuild from the primary
+    with sync_db_util.use_primary():
+        return task_dal.get_all_tasks()
+
+def build_snapshot():
+    build_version = version
+    task_list = load_task_list()
+    tasks, sorted_tasks = format_response.handleAllAssignments(task_list)
+
+    # A strong ETag over the content, so workers with different version numbers agree on it
+    content = json.dumps({'tasks': tasks, 'sorted_tasks': sorted_tasks}, sort_keys=True, separators=(',', ':'))
+    etag = hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    return {
+        'version': build_version,
+        'tasks': tasks,
+        'sorted_tasks': sorted_tasks,
+        'etag': etag,
+        # Tasks leave the board once they start, so the snapshot expires with the earliest one
+        'expires_at': task_list[0][4].timestamp() if task_list else None,
+    }
+
+def get_snapshot():
+    global snapshot
+    board = snapshot
+    if is_current(board):
+        return board
+
+    # One rebuild at a time, requests that waited reuse its result
+    with build_lock:
+        board = snapshot
+        if not is_current(board):
+            board = build_snapshot()
+            snapshot = board
+    return board
+
+cache_invalidation.register_handler('task_board', increment_version)
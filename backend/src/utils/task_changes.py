@@ -0,0 +1,49 @@
+from flask import g, has_request_context
+
+from src.models.assignment_model import Status
+
+# Board changes made during the current request, broadcast as one tasks_delta by the view
+
+def new_changes():
+    return {'tasks': {}, 'assignments': {}, 'users': set(), 'assignees': {}, 'statuses': {}}
+
+def merge_changes(target, changes):
+    # Later actions win, e.g. an upsert followed by a delete in the same window is sent as a delete
+    target['tasks'].update(changes['tasks'])
+    target['assignments'].update(changes['assignments'])
+    target['users'].update(changes['users'])
+    target['statuses'].update(changes['statuses'])
+    for assignment_id, user_ids in changes['assignees'].items():
+        target['assignees'].setdefault(assignment_id, set()).update(user_ids)
+
+def get_changes():
+    if 'task_changes' not in g:
+        g.task_changes = new_changes()
+    return g.task_changes
+
+def record_task(task_id, action):
+    # action is 'upserted' or 'deleted'
+    if has_request_context():
+        get_changes()['tasks'][int(task_id)] = action
+
+def record_assignment(assignment_id, task_id, action, user_ids=()):
+    # user_ids are the assignees to notify, both the old and the new one when an assignment is handed over
+    if has_request_context():
+        changes = get_changes()
+        changes['assignments'][int(assignment_id)] = (int(task_id), action)
+        changes['assignees'].setdefault(int(assignment_id), set()).update(user_ids)
+
+def record_status(assignment_id, task_id, user_id, status):
+    # Status is not on the board, so this only reaches the assignee and the task's watchers
+    if has_request_context():
+        get_changes()['statuses'][int(assignment_id)] = (int(task_id), user_id, Status(status).value)
+
+def record_user(user_id):
+    # The user's name changed, so every board entry for them has to be resent
+    if has_request_context():
+        get_changes()['users'].add(user_id)
+
+def pop_changes():
+    if not has_request_context():
+        return None
+    return g.pop('task_changes', None)
@@ -0,0 +1,203 @@
+import os
+import time
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+from src.utils import content_index, recommendation
+from src.utils.recommendation_engine import run_cpu_bound
+
+# Load variables from the .env file
+load_dotenv()
+
+# Size of the task embeddings, the TF-IDF rows of content_index reduced with SVD
+dimensions = int(os.environ.get("TASK_INDEX_DIMENSIONS", 64))
+# 'auto' answers queries from an inverted file index once there are ANN_MIN_TASKS upcoming tasks,
+# 'ivf' always does and 'brute' always scores every upcoming task
+ann_setting = os.environ.get("TASK_INDEX_ANN", "auto").lower()
+# Clusters searched per query by the inverted file index, more is slower and closer to exact
+nprobe = int(os.environ.get("TASK_INDEX_NPROBE", 16))
+
+ANN_MIN_TASKS = 2000
+
+# SVD components and cluster centroids, refitted by fit() when the model is trained
+basis = None
+# Embeddings of every task in one content_index snapshot, reprojected when that snapshot changes
+index = None
+index_lock = threading.Lock()
+fit_lock = threading.Lock()
+
+def use_ann(task_count):
+    return ann_setting == 'ivf' or (ann_setting == 'auto' and task_count >= ANN_MIN_TASKS)
+
+def fit_basis(snapshot):
+    # Seconds of CPU for large boards, run_cpu_bound moves it to a real thread, so it takes no locks
+    matrix = snapshot['matrix']
+
+    new_basis = {'columns': None, 'components': None, 'centroids': None, 'fitted_at': time.time()}
+    # Only the hashed terms that occur, the SVD would otherwise work on all N_FEATURES columns
+    columns = np.unique(matrix.indices)
+    if matrix.shape[0] >= 2 and len(columns) >= 2:
+        svd = TruncatedSVD(n_components=min(dimensions, matrix.shape[0] - 1, len(columns) - 1), random_state=0)
+        svd.fit(matrix[:, columns])
+        new_basis['columns'] = columns
+        new_basis['components'] = svd.components_.astype(np.float32)
+
+        upcoming = np.flatnonzero(snapshot['start_times'] >= time.time())
+        if len(upcoming) and use_ann(len(upcoming)):
+            embeddings = normalize(matrix[upcoming][:, columns] @ new_basis['components'].T)
+            # About sqrt(n) clusters, a query then scores roughly nprobe * sqrt(n) tasks
+            kmeans = MiniBatchKMeans(n_clusters=int(np.sqrt(len(upcoming))), n_init=1, random_state=0)
+            kmeans.fit(embeddings)
+            new_basis['centroids'] = normalize(kmeans.cluster_centers_).astype(np.float32)
+
+    return new_basis
+
+def fit_locked():
+    # Caller holds fit_lock
+    global basis, index
+    new_basis = run_cpu_bound(fit_basis, content_index.get_snapshot())
+    with index_lock:
+        basis = new_basis
+        index = None
+    return new_basis
+
+def fit():
+    """
+    Fits the embedding on every indexed task and, when the inverted file
+    index is on, the clusters of the upcoming ones.
+    """
+    with fit_lock:
+        return fit_locked()
+
+def project(snapshot, current_basis):
+    # Tasks created or edited since fit() are placed with the fitted components and centroids, no refit.
+    # Terms that first appeared after fit() have no component and are left out. CPU only, like fit_basis().
+    if current_basis['components'] is None:
+        # Fewer than two tasks when fitted, nothing to embed
+        upcoming = np.flatnonzero(snapshot['start_times'] >= time.time())
+        return {'content': snapshot, 'components': None, 'centroids': None, 'embeddings': None, 'upcoming': upcoming, 'lists': None, 'centroid': None}
+
+    embeddings = normalize(snapshot['matrix'][:, current_basis['columns']] @ current_basis['components'].T).astype(np.float32)
+    upcoming = np.flatnonzero(snapshot['start_times'] >= time.time())
+
+    lists = None
+    if current_basis['centroids'] is not None and len(upcoming):
+        labels = np.argmax(embeddings[upcoming] @ current_basis['centroids'].T, axis=1)
+        order = np.argsort(labels, kind='stable')
+        lists = np.split(upcoming[order], np.searchsorted(labels[order], np.arange(1, len(current_basis['centroids']))))
+
+    return {
+        'content': snapshot,
+        # The basis the embeddings and lists were built with, a refit replaces the global one
+        'components': current_basis['components'],
+        'centroids': current_basis['centroids'],
+        'embeddings': embeddings,
+        'upcoming': upcoming,
+        'lists': lists,
+        # Query of a user without history
+        'centroid': normalize(embeddings[upcoming].sum(axis=0, keepdims=True))[0] if len(upcoming) else None,
+    }
+
+def get_index():
+    global index
+    snapshot = content_index.get_snapshot()
+    current = index
+    if current is not None and current['content'] is snapshot:
+        return current
+
+    # Fitting and projecting run on real threads, the locks are only ever taken by the calling thread
+    with fit_lock:
+        if basis is None:
+            fit_locked()
+    with index_lock:
+        if index is None or index['content'] is not snapshot:
+            # One read of the global, fit() may replace it meanwhile
+            index = run_cpu_bound(project, snapshot, basis)
+        return index
+
+def nearest(current, query, count, exclude=()):
+    """
+    Positions and scores of the count upcoming tasks closest to query.
+    """
+    if current['lists'] is not None:
+        # Inverted file: only the tasks in the nprobe clusters closest to the query are scored
+        probe = recommendation.top_k_indices(current['centroids'] @ query, nprobe)
+        candidates = np.concatenate([current['lists'][cluster] for cluster in probe])
+        scores = current['embeddings'][candidates] @ query
+    else:
+        candidates = current['upcoming']
+        scores = (current['embeddings'] @ query)[candidates]
+
+    # Tasks that started since the index was projected, and the excluded ones, are skipped
+    keep = current['content']['start_times'][candidates] >= time.time()
+    if len(exclude):
+        keep &= ~np.isin(candidates, exclude)
+    candidates, scores = candidates[keep], scores[keep]
+    if current['lists'] is not None and len(candidates) < count:
+        # The probed clusters ran short, score every upcoming task instead
+        return nearest(dict(current, lists=None), query, count, exclude)
+
+    best = recommendation.top_k_indices(scores, count)
+    return candidates[best], scores[best]
+
+def similar_tasks(task_id, count=5):
+    """
+    Upcoming tasks most similar to task_id as (task_id, score) pairs, None
+    when the task does not exist.
+    """
+    current = get_index()
+    position = current['content']['positions'].get(task_id)
+    if position is None:
+        return None
+    if current['embeddings'] is None:
+        return []
+
+    positions, scores = nearest(current, current['embeddings'][position], count, exclude=[position])
+    task_ids = current['content']['task_ids'][positions]
+    return [(int(similar_task_id), float(score)) for similar_task_id, score in zip(task_ids, scores)]
+
+def recommend(history_task_ids, count=5, unavailable_task_ids=()):
+    """
+    Upcoming tasks closest to the mean embedding of the tasks in
+    history_task_ids, leaving out those tasks and the ones in
+    unavailable_task_ids. With no history the mean of the upcoming tasks
+    is used, which ranks the tasks most typical of the board first.
+    """
+    current = get_index()
+    if current['embeddings'] is None:
+        # Fewer than two tasks, nothing to rank
+        upcoming_task_ids = current['content']['task_ids'][current['upcoming']]
+        excluded = np.isin(upcoming_task_ids, list(history_task_ids)) | np.isin(upcoming_task_ids, list(unavailable_task_ids))
+        return [int(task_id) for task_id in upcoming_task_ids[~excluded][:max(count, 0)]]
+
+    positions = current['content']['positions']
+    history = np.array([positions[task_id] for task_id in history_task_ids if task_id in positions], dtype=np.int64)
+    if len(history):
+        query = normalize(current['embeddings'][history].sum(axis=0, keepdims=True))[0]
+    elif current['centroid'] is not None:
+        query = current['centroid']
+    else:
+        return []
+
+    unavailable = [positions[task_id] for task_id in unavailable_task_ids if task_id in positions]
+    best, _ = nearest(current, query, count, exclude=np.concatenate([history, np.array(unavailable, dtype=np.int64)]))
+    return [int(task_id) for task_id in current['content']['task_ids'][best]]
+
+def get_stats():
+    current = index
+    current_basis = basis
+    stats = {'ann': ann_setting, 'nprobe': nprobe}
+    if current_basis is not None:
+        stats.update(
+            fitted_at=current_basis['fitted_at'],
+            dimensions=0 if current_basis['components'] is None else len(current_basis['components']),
+            terms=0 if current_basis['columns'] is None else len(current_basis['columns']),
+            clusters=0 if current_basis['centroids'] is None else len(current_basis['centroids']),
+        )
+    if current is not None:
+        stats['upcoming_tasks'] = len(current['upcoming'])
+    return stats
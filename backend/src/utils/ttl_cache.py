@@ -0,0 +1,105 @@
+import time
+import threading
+from collections import OrderedDict
+
+from src.utils import cache_invalidation
+from src.utils.db import sync_db_util
+
+
+class TTLCache:
+    """
+    Process-wide LRU cache whose entries also expire after ttl_seconds,
+    invalidated through cache_invalidation under namespace.
+
+    Every invalidation bumps a generation counter. Take get_generation()
+    before reading the database and hand it to put(), a read that started
+    before an invalidation is then not cached.
+    """
+    def __init__(self, namespace, capacity, ttl_seconds, copy=None, on_remove=None):
+        self.namespace = namespace
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        # Callers get their own copy so nothing can change a cached value
+        self.copy = copy or (lambda value: value)
+        # on_remove(key, value) is called with lock held whenever an entry leaves the cache
+        self.on_remove = on_remove
+
+        # key -> (expires_at, value), least recently used first
+        self.entries = OrderedDict()
+        # Reentrant so owners can keep their own indexes in step under it
+        self.lock = threading.RLock()
+        self.generation = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+        cache_invalidation.register_handler(namespace, self.invalidate_local)
+
+    def remove_entry(self, key):
+        # Caller holds lock
+        _, value = self.entries.pop(key)
+        if self.on_remove is not None:
+            self.on_remove(key, value)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self.remove_entry(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+
+        return self.copy(value)
+
+    def get_generation(self):
+        return self.generation
+
+    def put(self, key, value, read_generation):
+        # Returns whether value was cached
+        if self.capacity <= 0:
+            return False
+
+        with self.lock:
+            if read_generation != self.generation:
+                return False
+
+            if key in self.entries:
+                self.remove_entry(key)
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, self.copy(value))
+
+            while len(self.entries) > self.capacity:
+                self.remove_entry(next(iter(self.entries)))
+                self.stats['evictions'] += 1
+            return True
+
+    def invalidate_local(self, key):
+        # key None drops everything
+        with self.lock:
+            self.generation += 1
+            if key is None:
+                self.stats['invalidations'] += len(self.entries)
+                for cached_key in list(self.entries):
+                    self.remove_entry(cached_key)
+            elif key in self.entries:
+                self.remove_entry(key)
+                self.stats['invalidations'] += 1
+
+    def invalidate(self, key, conn=None):
+        """
+        Drops key now, tells the other workers, and drops it again once conn
+        commits so a read of the old rows that finishes after the commit
+        cannot put it back.
+        """
+        cache_invalidation.publish(self.namespace, key, conn=conn)
+        sync_db_util.after_commit(conn, lambda: self.invalidate_local(key))
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, size=len(self.entries), capacity=self.capacity, ttl_seconds=self.ttl_seconds)
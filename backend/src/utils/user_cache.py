@@ -0,0 +1,57 @@
+import os
+from dotenv import load_dotenv
+
+from src.utils.ttl_cache import TTLCache
+
+# Load variables from the .env file
+load_dotenv()
+
+# Set USER_CACHE_SIZE to 0 to turn the cache off
+capacity = int(os.environ.get("USER_CACHE_SIZE", 1024))
+ttl_seconds = float(os.environ.get("USER_CACHE_TTL_SECONDS", 300))
+
+# email -> user_id of the cached users, guarded by cache.lock
+email_index = {}
+
+def forget_email(user_id, user):
+    if email_index.get(user.email) == user_id:
+        del email_index[user.email]
+
+# user_id -> User
+cache = TTLCache('user', capacity, ttl_seconds, copy=lambda user: user.model_copy(), on_remove=forget_email)
+
+def get(user_id):
+    return cache.get(user_id)
+
+def get_by_email(email):
+    with cache.lock:
+        user_id = email_index.get(email)
+        if user_id is None:
+            cache.stats['misses'] += 1
+            return None
+    return get(user_id)
+
+def get_generation():
+    # Take this before querying the database and pass it to put()
+    return cache.get_generation()
+
+def put(user, read_generation):
+    if user is None:
+        return
+
+    with cache.lock:
+        if cache.put(user.user_id, user, read_generation):
+            email_index[user.email] = user.user_id
+
+def invalidate_local(user_id):
+    cache.invalidate_local(user_id)
+
+def invalidate(user_id, conn=None):
+    # Write-through invalidation for user_dal writes
+    cache.invalidate(user_id, conn=conn)
+
+def clear():
+    invalidate_local(None)
+
+def get_stats():
+    return cache.get_stats()
@@ -0,0 +1,62 @@
+from flask import current_app
+from flask_socketio import emit, join_room, leave_room, ConnectionRefusedError
+from flask_jwt_extended import decode_token
+
+from src.dals import user_dal
+from src.utils import broadcasts
+
+def authenticate(auth):
+    # Clients pass their access token in the handshake, e.g. io(url, { auth: { token } })
+    token = (auth or {}).get('token')
+    if not token:
+        return None
+
+    try:
+        claims = decode_token(token.removeprefix('Bearer '))
+    except Exception:
+        return None
+
+    user_id = claims[current_app.config['JWT_IDENTITY_CLAIM']]
+    if claims.get('type') != 'access' or not user_dal.check_user_exists_by_id(user_id):
+        return None
+    return user_id
+
+def register_socket_handlers(socketio):
+    @socketio.on('connect')
+    def connect(auth=None):
+        user_id = authenticate(auth)
+        if user_id is None:
+            raise ConnectionRefusedError('unauthorized')
+
+        join_room(broadcasts.user_room(user_id))
+
+    @socketio.on('request_full_sync')
+    def request_full_sync():
+        # Sent by a client that keeps the board and missed a tasks_delta sequence number.
+        # Joining first means a delta sent while the board is read is not lost.
+        join_room(broadcasts.BOARD_ROOM)
+        emit('tasks_full_sync', broadcasts.build_full_sync())
+
+    @socketio.on('leave_board')
+    def leave_board():
+        leave_room(broadcasts.BOARD_ROOM)
+
+    @socketio.on('watch_task')
+    def watch_task(data):
+        try:
+            task_id = int(data['task_id'])
+        except (TypeError, KeyError, ValueError):
+            return {'error': 'Invalid task_id'}
+
+        join_room(broadcasts.task_room(task_id))
+        return {'message': 'Watching task'}
+
+    @socketio.on('unwatch_task')
+    def unwatch_task(data):
+        try:
+            task_id = int(data['task_id'])
+        except (TypeError, KeyError, ValueError):
+            return {'error': 'Invalid task_id'}
+
+        leave_room(broadcasts.task_room(task_id))
+        return {'message': 'Stopped watching task'}
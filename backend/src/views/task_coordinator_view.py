@@ -38,11 +38,8 @@ def create_task():
         result = task_coordinator_manager.create_task(user_id, task)
 
         if result == 'task successfully created':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
 
             log_action(user_id, "create_task", data)  # Log action
 
@@ -81,11 +78,8 @@ def assign_task():
         result = task_coordinator_manager.assign_task(user_id, assignee_id, task_id)
 
         if result == 'assignment successfully created':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
 
             return jsonify({'message': 'Assignment has been successfully created'}), HTTP_201_CREATED
         elif result == 'assignment already exists':
@@ -117,11 +111,8 @@ def delete_task(task_id):
         result = task_coordinator_manager.delete_task(user_id, task_id)
 
         if result == 'task successfully deleted':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
             
             return jsonify({'message': 'Task successfully deleted'}), HTTP_200_OK
         elif result == 'user unauthorized':
@@ -145,11 +136,8 @@ def delete_assignment(assignment_id):
         result = task_coordinator_manager.delete_assignment(user_id, assignment_id)
 
         if result == 'assignment successfully deleted':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
             
             return jsonify({'message': 'Assignment successfully deleted'}), HTTP_200_OK
         elif result == 'user unauthorized':
@@ -190,11 +178,8 @@ def update_task(task_id):
         result = task_coordinator_manager.update_task(user_id, data, task_id)
 
         if result == 'task successfully updated':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
             
             return jsonify({'message': 'Task successfully updated'}), HTTP_200_OK
         elif result == 'user unauthorized':
@@ -225,11 +210,8 @@ def update_assignment(assignment_id):
         result = task_coordinator_manager.update_assignment(user_id, assignee_id, assignment_id)
 
         if result == 'assignment successfully updated':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
             
             return jsonify({'message': 'Assignment successfully updated'}), HTTP_200_OK
         elif result == 'assignment already exists':
@@ -293,6 +275,7 @@ def override_status(assignment_id):
         result = task_coordinator_manager.override_status(user_id, status, assignment_id)
 
         if result == 'task status successfully overridden':
+            broadcasts.broadcast_tasks_delta()
             return jsonify({'message': 'Task status successfully overriden'}), HTTP_200_OK
         elif result == 'task not over':
             return jsonify({'message': 'Task is not over yet'}), HTTP_400_BAD_REQUEST
@@ -317,11 +300,8 @@ def delete_user(user_to_delete):
         result = task_coordinator_manager.delete_user(user_id, user_to_delete)
 
         if result == 'user deleted successfully':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
 
             return jsonify({'message': 'User deleted successfully'}), HTTP_200_OK
         elif result == 'DNE':
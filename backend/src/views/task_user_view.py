@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 from pydantic import ValidationError
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from src.managers import task_manager, task_user_manager
+from src.managers import task_user_manager
 from src.constants.http_status_codes import *
 from src.utils import broadcasts
 
@@ -25,11 +25,8 @@ def signup_task():
         result = task_user_manager.signup_task(user_id, task_id)
 
         if result == 'assignment successfully created':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
             
             return jsonify({'message': 'Assignment has been successfully created'}), HTTP_201_CREATED
         elif result == 'assignment already exists':
@@ -59,11 +56,8 @@ def drop_task(assignment_id):
         result = task_user_manager.drop_task(user_id, assignment_id)
 
         if result == 'task successfully dropped':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
             
             return jsonify({'message': 'Task successfully dropped'}), HTTP_200_OK
         elif result == 'user unauthorized':
@@ -1,10 +1,11 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, make_response
 from pydantic import ValidationError
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from src.managers import task_manager
 from src.models.assignment_model import Status
 from src.constants.http_status_codes import *
+from src.utils import broadcasts
 
 task = Blueprint("task", __name__, url_prefix="/api/v1/tasks")
 
@@ -18,9 +19,19 @@ def get_all_tasks():
         message = result.get('message')
 
         if message == 'tasks successfully retrieved':
-            tasks = result.get('tasks')
-            sorted_tasks = result.get('sorted_tasks')
-            return jsonify({'message': 'Tasks successfully retrieved', 'tasks': tasks, 'sorted_tasks': sorted_tasks}), HTTP_200_OK
+            etag = result.get('etag')
+
+            # The board has not changed since the client's copy
+            if request.if_none_match.contains(etag):
+                response = make_response('', HTTP_304_NOT_MODIFIED)
+            else:
+                tasks = result.get('tasks')
+                sorted_tasks = result.get('sorted_tasks')
+                response = make_response(jsonify({'message': 'Tasks successfully retrieved', 'tasks': tasks, 'sorted_tasks': sorted_tasks}), HTTP_200_OK)
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
         elif message == 'DNE':
             return jsonify({'error': 'Account deleted'}), HTTP_403_FORBIDDEN
         else:
@@ -72,6 +83,7 @@ def update_status(assignment_id):
         result = task_manager.update_status(user_id, status, assignment_id)
         
         if result == 'task status successfully updated':
+            broadcasts.broadcast_tasks_delta()
             return jsonify({'message': 'Task status successfully updated'}), HTTP_200_OK
         elif result == 'task not pending':
             return jsonify({'error': 'Task status already updated'}), HTTP_208_ALREADY_REPORTED
@@ -100,7 +112,8 @@ def recommend_tasks():
 
         if message == 'tasks successfully recommended':
             recommended_tasks = result.get('recommended_tasks')
-            return jsonify({'message': 'Tasks successfully recommended', 'recommended_tasks': recommended_tasks}), HTTP_200_OK
+            computed_at = result.get('computed_at')
+            return jsonify({'message': 'Tasks successfully recommended', 'recommended_tasks': recommended_tasks, 'computed_at': computed_at.isoformat()}), HTTP_200_OK
         elif message == 'DNE':
             return jsonify({'error': 'Account deleted'}), HTTP_403_FORBIDDEN
         elif message == 'error':
@@ -113,6 +126,29 @@ def recommend_tasks():
     except Exception as e:
         return jsonify({'error': str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
+@task.get("/similar_tasks/<int:task_id>")
+@jwt_required()
+def similar_tasks(task_id):
+    user_id = get_jwt_identity()
+
+    try:
+        result = task_manager.get_similar_tasks(user_id, task_id)
+        message = result.get('message')
+
+        if message == 'similar tasks successfully retrieved':
+            return jsonify({'message': 'Similar tasks successfully retrieved', 'similar_tasks': result.get('similar_tasks')}), HTTP_200_OK
+        elif message == 'task DNE':
+            return jsonify({'error': 'Task not found'}), HTTP_404_NOT_FOUND
+        elif message == 'DNE':
+            return jsonify({'error': 'Account deleted'}), HTTP_403_FORBIDDEN
+        elif message == 'error':
+            return jsonify({'error': 'An error occurred while fetching similar tasks'}), HTTP_500_INTERNAL_SERVER_ERROR
+        else:
+            return jsonify({'error': 'Unknown error'}), HTTP_500_INTERNAL_SERVER_ERROR
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
 @task.get("/analytics")
 @jwt_required()
 def get_task_analytics():
@@ -3,7 +3,6 @@ from pydantic import ValidationError
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from src.managers import user_manager
-from src.managers import task_manager
 from src.utils import broadcasts
 from src.constants.http_status_codes import *
 
@@ -48,11 +47,8 @@ def update_first_name():
         result = user_manager.update_first_name(user_id, first_name)
 
         if result == 'first name updated successfully':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
         
             return jsonify({'message': 'First name updated successfully'}), HTTP_200_OK
         elif result == 'DNE':
@@ -82,11 +78,8 @@ def update_last_name():
         result = user_manager.update_last_name(user_id, last_name)
 
         if result == 'last name updated successfully':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
         
             return jsonify({'message': 'Last name updated successfully'}), HTTP_200_OK
         elif result == 'DNE':
@@ -108,11 +101,8 @@ def delete_user():
         result = user_manager.delete_user(user_id)
 
         if result == 'user deleted successfully':
-            # Retrieve the updated task list to broadcast
-            updated_tasks = task_manager.get_all_tasks(user_id)
-
-            # Broadcast updated task list
-            broadcasts.broadcast_tasks_update(updated_tasks)
+            # Broadcast only what this request changed
+            broadcasts.broadcast_tasks_delta()
 
             return jsonify({'message': 'User deleted successfully'}), HTTP_200_OK
         elif result == 'DNE':
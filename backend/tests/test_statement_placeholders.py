@@ -0,0 +1,62 @@
+"""
+%% has to mean a literal % whether run_statement prepares a query or
+hands it to psycopg2 unprepared.
+
+Usage (from the backend directory, the database tests need DB_URL):
+    python -m unittest discover tests
+"""
+import os
+import unittest
+
+from src.utils.db import statement_cache, sync_db_util
+
+
+class ToServerPlaceholdersTest(unittest.TestCase):
+
+    def test_rewrites_placeholders_and_escaped_percent(self):
+        query, param_count = statement_cache.to_server_placeholders("SELECT %s WHERE name LIKE '%%x' AND id = %s")
+        self.assertEqual(query, "SELECT $1 WHERE name LIKE '%x' AND id = $2")
+        self.assertEqual(param_count, 2)
+
+    def test_refuses_lone_percent_like_psycopg2(self):
+        with self.assertRaises(ValueError):
+            statement_cache.to_server_placeholders("SELECT 1 WHERE name LIKE '%x'")
+        with self.assertRaises(ValueError):
+            statement_cache.to_server_placeholders("SELECT 5 %")
+
+
+@unittest.skipUnless(os.environ.get("DB_URL"), "DB_URL not set")
+class RunStatementPercentTest(unittest.TestCase):
+
+    def run_both_paths(self, query, params=None):
+        # Same query prepared and unprepared, in a transaction that is rolled back
+        results = {}
+        enabled = sync_db_util.prepared_statements_enabled
+        try:
+            for prepared in (True, False):
+                sync_db_util.prepared_statements_enabled = prepared
+                before = statement_cache.get_stats()
+                with sync_db_util.connection() as conn:
+                    with conn.cursor() as cur:
+                        sync_db_util.run_statement(cur, query, params)
+                        results[prepared] = cur.fetchone()
+                after = statement_cache.get_stats()
+                # Only the prepared run goes through the statement cache
+                self.assertEqual(after['hits'] + after['misses'] > before['hits'] + before['misses'], prepared)
+        finally:
+            sync_db_util.prepared_statements_enabled = enabled
+        return results
+
+    def test_like_with_params(self):
+        results = self.run_both_paths("SELECT %s LIKE '%%x', 'a%%x';", ('abx',))
+        self.assertEqual(results[True], (True, 'a%x'))
+        self.assertEqual(results[False], (True, 'a%x'))
+
+    def test_like_without_params(self):
+        results = self.run_both_paths("SELECT 'abx' LIKE '%%x', 'a%%x';")
+        self.assertEqual(results[True], (True, 'a%x'))
+        self.assertEqual(results[False], (True, 'a%x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,4 @@
-import React, { createContext, ReactNode, useContext, useState, useEffect } from "react";
+import React, { createContext, ReactNode, useContext, useState, useEffect, useRef } from "react";
 import { io, Socket } from "socket.io-client";
 import { getToken } from "../utils/auth_storage";
 import { get_all_tasks } from "../services/task_api_services";
@@ -33,12 +33,58 @@ interface TasksProviderProps {
     children: ReactNode;
 };
 
+interface TasksDelta {
+    seq: number;
+    tasks: {
+        upserted: { [key: string]: any };
+        deleted: number[];
+    };
+    assignments: {
+        upserted: { assignment_id: string; task_id: number; user_id: string; first_name: string; last_name: string }[];
+        deleted: { assignment_id: string; task_id: number }[];
+    };
+};
+
 const TasksContext = createContext<TasksContextType | undefined>(undefined);
 
+// Applies a tasks_delta to the board, re-applying one that is already included changes nothing
+const applyTasksDelta = (current: any, delta: TasksDelta) => {
+    const tasks = { ...(current?.tasks ?? {}) };
+
+    Object.entries(delta.tasks.upserted).forEach(([taskId, task]) => {
+        tasks[taskId] = task;
+    });
+    delta.tasks.deleted.forEach((taskId) => {
+        delete tasks[taskId];
+    });
+
+    delta.assignments.deleted.forEach(({ assignment_id, task_id }) => {
+        if (tasks[task_id]) {
+            tasks[task_id] = {
+                ...tasks[task_id],
+                users: tasks[task_id].users.filter((user: any) => String(user.assignment_id) !== String(assignment_id))
+            };
+        }
+    });
+    delta.assignments.upserted.forEach(({ task_id, ...user }) => {
+        if (tasks[task_id]) {
+            const users = tasks[task_id].users.filter((existing: any) => String(existing.assignment_id) !== String(user.assignment_id));
+            tasks[task_id] = { ...tasks[task_id], users: [...users, user] };
+        }
+    });
+
+    const sorted_tasks = Object.keys(tasks).sort(
+        (a, b) => new Date(tasks[a].start_time).getTime() - new Date(tasks[b].start_time).getTime()
+    );
+
+    return { ...current, tasks, sorted_tasks };
+};
+
 export const TasksProvider: React.FC<TasksProviderProps> = ({ children }: any) => {
     const [tasks, setTasks] = useState<any>({});
     const [socket, setSocket] = useState<Socket | null>(null);
     const [loading, setLoading] = useState<boolean>(true);
+    const lastSeq = useRef<number | null>(null);
 
     const getAllTasks = async () => {
         try {
@@ -61,7 +107,11 @@ export const TasksProvider: React.FC<TasksProviderProps> = ({ children }: any) =
 
     // Establish WebSocket connection
     useEffect(() => {
-        const newSocket = io(BACKEND_URL, { transports: ["websocket"] });
+        // The server only accepts connections carrying an access token, read again on every reconnect
+        const newSocket = io(BACKEND_URL, {
+            transports: ["websocket"],
+            auth: async (cb) => cb({ token: await getToken() })
+        });
         setSocket(newSocket);
 
         return () => {
@@ -69,18 +119,41 @@ export const TasksProvider: React.FC<TasksProviderProps> = ({ children }: any) =
         };
     }, []);
 
-    // Listen for 'tasks_updated' WebSocket event
+    // Listen for 'tasks_delta' WebSocket events, asking for the whole board when one was missed
     useEffect(() => {
         if (socket) {
-            socket.on("tasks_updated", (updatedTasks: any) => {
-                console.log("Received updated tasks");
-                setTasks(updatedTasks); // Updated the tasks state with new data
+            const requestFullSync = () => {
+                socket.emit("request_full_sync");
+            };
+
+            // (Re)connecting may have missed deltas, so start from a full board
+            socket.on("connect", requestFullSync);
+
+            socket.on("tasks_full_sync", (board: { seq: number; tasks: any; sorted_tasks: any }) => {
+                lastSeq.current = board.seq;
+                setTasks((current: any) => ({ ...current, tasks: board.tasks, sorted_tasks: board.sorted_tasks }));
+            });
+
+            socket.on("tasks_delta", (delta: TasksDelta) => {
+                if (lastSeq.current === null || delta.seq > lastSeq.current + 1 || delta.seq < lastSeq.current) {
+                    console.log("Missed task updates, requesting full sync");
+                    requestFullSync();
+                    return;
+                }
+                if (delta.seq === lastSeq.current) {
+                    return;
+                }
+
+                lastSeq.current = delta.seq;
+                setTasks((current: any) => applyTasksDelta(current, delta));
             });
         }
 
         return () => {
             if (socket) {
-                socket.off("tasks_updated");
+                socket.off("connect");
+                socket.off("tasks_full_sync");
+                socket.off("tasks_delta");
             }
         };
     }, [socket])